@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import User, LearningRequestPost, Session, SessionTimer, Review, CreditTransaction, Bank
+from .models import User, LearningRequestPost, Session, SessionTimer, SessionTombstone, SessionTransition, Review, CreditTransaction, Bank, BankLedgerEntry, JournalEntry, UserDailyStats, CreditMonthlyRollup, SettlementJob, IdempotencyKey
 
 
 @admin.register(User)
@@ -27,6 +27,19 @@ class SessionAdmin(admin.ModelAdmin):
     ordering = ('-start_time',)
 
 
+@admin.register(SessionTransition)
+class SessionTransitionAdmin(admin.ModelAdmin):
+    list_display = ('session', 'event', 'from_status', 'to_status', 'actor', 'created_at')
+    list_filter = ('event',)
+    ordering = ('-created_at',)
+
+
+@admin.register(SessionTombstone)
+class SessionTombstoneAdmin(admin.ModelAdmin):
+    list_display = ('session_id', 'user1_id', 'user2_id', 'deleted_at')
+    ordering = ('-deleted_at',)
+
+
 @admin.register(SessionTimer)
 class SessionTimerAdmin(admin.ModelAdmin):
     list_display = ('session', 'teacher', 'start_time', 'end_time', 'duration_seconds')
@@ -51,5 +64,52 @@ class CreditTransactionAdmin(admin.ModelAdmin):
 
 @admin.register(Bank)
 class BankAdmin(admin.ModelAdmin):
-    list_display = ('id', 'total_credits', 'updated_at')
-    readonly_fields = ('total_credits', 'updated_at')
+    list_display = ('id', 'total_credits', 'balance', 'updated_at')
+    readonly_fields = ('total_credits', 'balance', 'updated_at')
+
+    @admin.display(description='Balance (incl. un-rolled ledger)')
+    def balance(self, obj):
+        return Bank.get_balance()
+
+
+@admin.register(BankLedgerEntry)
+class BankLedgerEntryAdmin(admin.ModelAdmin):
+    list_display = ('id', 'entry_type', 'amount', 'session', 'user', 'rolled_up', 'created_at')
+    list_filter = ('entry_type', 'rolled_up')
+    ordering = ('-created_at',)
+
+
+@admin.register(JournalEntry)
+class JournalEntryAdmin(admin.ModelAdmin):
+    list_display = ('id', 'session', 'description', 'created_at')
+    ordering = ('-created_at',)
+
+
+@admin.register(UserDailyStats)
+class UserDailyStatsAdmin(admin.ModelAdmin):
+    list_display = ('user', 'date', 'credits_earned', 'seconds_taught')
+    search_fields = ('user__email',)
+    ordering = ('-date',)
+
+
+@admin.register(CreditMonthlyRollup)
+class CreditMonthlyRollupAdmin(admin.ModelAdmin):
+    list_display = ('user', 'month', 'transaction_type', 'counterparty', 'total', 'count')
+    list_filter = ('transaction_type',)
+    search_fields = ('user__email',)
+    ordering = ('-month',)
+
+
+@admin.register(SettlementJob)
+class SettlementJobAdmin(admin.ModelAdmin):
+    list_display = ('session', 'status', 'attempts', 'run_after', 'updated_at')
+    list_filter = ('status',)
+    ordering = ('-created_at',)
+
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ('user', 'scope', 'key', 'status_code', 'created_at')
+    list_filter = ('scope',)
+    search_fields = ('user__email', 'key')
+    ordering = ('-created_at',)
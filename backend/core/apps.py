@@ -7,5 +7,4 @@ class CoreConfig(AppConfig):
     verbose_name = 'Link & Learn Core'
 
     def ready(self):
-        # Import signals here if needed
-        pass
+        from . import signals  # noqa: F401
@@ -0,0 +1,126 @@
+"""
+In-process prefix index for search-as-you-type.
+
+User names and active post topics are kept in sorted arrays so a prefix
+lookup is a ``bisect`` plus a short scan instead of an ``icontains`` table
+scan per keystroke. Each process keeps its own warm copy; writers bump a
+version key in the Django cache (see ``core.signals``) and the index is
+rebuilt lazily on the next lookup that sees a new version, or after
+``AUTOCOMPLETE_MAX_AGE`` seconds as a fallback for per-process caches.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+
+VERSION_CACHE_KEY = 'autocomplete_index_version'
+
+
+def invalidate():
+    """Mark every process's index as stale."""
+    try:
+        cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        cache.set(VERSION_CACHE_KEY, 1, timeout=None)
+
+
+def _tokens(text):
+    """Lowercased full string plus each later word, for mid-name matches."""
+    lowered = text.lower().strip()
+    words = lowered.split()
+    return [lowered] + [' '.join(words[i:]) for i in range(1, len(words))]
+
+
+class PrefixIndex:
+    """Sorted (key, entry_id) pairs with prefix lookup."""
+
+    def __init__(self, items):
+        pairs = sorted(
+            (token, entry_id)
+            for entry_id, text in items
+            for token in _tokens(text)
+        )
+        self._keys = [key for key, _ in pairs]
+        self._ids = [entry_id for _, entry_id in pairs]
+
+    def search(self, prefix, limit, exclude=()):
+        prefix = prefix.lower()
+        found = []
+        i = bisect_left(self._keys, prefix)
+        while i < len(self._keys) and self._keys[i].startswith(prefix):
+            entry_id = self._ids[i]
+            if entry_id not in found and entry_id not in exclude:
+                found.append(entry_id)
+                if len(found) >= limit:
+                    break
+            i += 1
+        return found
+
+
+class AutocompleteIndex:
+    """User and topic suggestions built from the database."""
+
+    def __init__(self):
+        from django.contrib.auth import get_user_model
+        from .models import LearningRequestPost
+
+        User = get_user_model()
+
+        self.users = {
+            row['id']: row
+            for row in User.objects.filter(
+                is_active=True, is_superuser=False
+            ).values('id', 'name').iterator()
+        }
+        self.user_index = PrefixIndex(
+            (user_id, row['name']) for user_id, row in self.users.items()
+        )
+
+        # Topic -> number of active posts mentioning it (learn or teach)
+        self.topics = {}
+        for learn, teach in LearningRequestPost.get_active_posts().values_list(
+            'topic_to_learn', 'topic_to_teach'
+        ).iterator():
+            for topic in {learn.strip(), teach.strip()}:
+                if topic:
+                    key = topic.lower()
+                    label, count = self.topics.get(key, (topic, 0))
+                    self.topics[key] = (label, count + 1)
+        self.topic_index = PrefixIndex((key, key) for key in self.topics)
+
+    def suggest(self, prefix, limit=8, exclude_user_id=None):
+        """Up to ``limit`` users and topics; ``exclude_user_id`` does not count towards it."""
+        exclude = () if exclude_user_id is None else (exclude_user_id,)
+        users = [self.users[i] for i in self.user_index.search(prefix, limit, exclude)]
+        topic_keys = self.topic_index.search(prefix, limit * 4)
+        topics = sorted(
+            ({'topic': self.topics[k][0], 'post_count': self.topics[k][1]} for k in topic_keys),
+            key=lambda t: -t['post_count']
+        )[:limit]
+        return {'users': users, 'topics': topics}
+
+
+_lock = threading.Lock()
+_state = {'index': None, 'version': None, 'built_at': 0.0}
+
+
+def get_index():
+    """Return this process's index, rebuilding it if stale."""
+    max_age = getattr(settings, 'AUTOCOMPLETE_MAX_AGE', 60)
+    version = cache.get(VERSION_CACHE_KEY, 0)
+    now = time.monotonic()
+
+    if (
+        _state['index'] is None
+        or _state['version'] != version
+        or now - _state['built_at'] > max_age
+    ):
+        with _lock:
+            if _state['index'] is None or _state['version'] != version or now - _state['built_at'] > max_age:
+                _state['index'] = AutocompleteIndex()
+                _state['version'] = version
+                _state['built_at'] = time.monotonic()
+    return _state['index']
@@ -0,0 +1,171 @@
+"""
+Model fields for opaque, pre-encoded JSON.
+
+Whiteboard and code payloads can be megabytes of JSON. The server never
+needs their contents, so they are kept as the encoded bytes end to end.
+Sync encodes them once on the way in. The ORM and the sync buffer move
+the bytes around as ``RawJSON``, and ``core.renderers.JSONRenderer``
+splices them into responses. Code that really needs the contents calls
+``RawJSON.parse()``.
+
+``CompressedRawJSONField`` also compresses the bytes it stores (zstd when
+the optional ``zstandard`` package is installed, zlib otherwise). A value
+read back is only decompressed when its bytes are first used.
+"""
+
+import json
+import zlib
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import models
+
+try:
+    import zstandard
+except ImportError:  # optional: fall back to zlib
+    zstandard = None
+
+# Stored blobs start with a codec tag. Encoded JSON never starts with
+# these bytes, so untagged blobs are plain JSON (e.g. rows written before
+# compression was enabled).
+CODEC_TAGS = {'zlib': b'\x01', 'zstd': b'\x02'}
+
+# Payloads smaller than this are stored as they are
+COMPRESS_MIN_BYTES = 512
+
+
+def default_codec():
+    """ROOM_SNAPSHOT_CODEC, or the best codec available."""
+    codec = getattr(settings, 'ROOM_SNAPSHOT_CODEC', None)
+    if codec is None or (codec == 'zstd' and zstandard is None):
+        codec = 'zstd' if zstandard is not None else 'zlib'
+    if codec not in CODEC_TAGS:
+        raise ImproperlyConfigured(f'Unknown ROOM_SNAPSHOT_CODEC {codec!r}.')
+    return codec
+
+
+def stored_codec(blob):
+    """Codec a stored blob was compressed with, or None if it is plain."""
+    tag = bytes(blob[:1])
+    return next((codec for codec, codec_tag in CODEC_TAGS.items() if codec_tag == tag), None)
+
+
+def compress(data, codec=None):
+    codec = codec or default_codec()
+    if codec == 'zstd':
+        return CODEC_TAGS['zstd'] + zstandard.ZstdCompressor().compress(data)
+    return CODEC_TAGS['zlib'] + zlib.compress(data)
+
+
+def decompress(blob):
+    codec = stored_codec(blob)
+    body = memoryview(blob)[1:]
+    if codec == 'zlib':
+        return zlib.decompress(body)
+    if codec == 'zstd':
+        if zstandard is None:
+            raise ImproperlyConfigured('zstd-compressed data needs the zstandard package.')
+        return zstandard.ZstdDecompressor().decompress(body)
+    return bytes(blob)
+
+
+class RawJSON:
+    """Already-encoded JSON, passed through without parsing."""
+
+    __slots__ = ('_encoded', 'stored')
+
+    def __init__(self, encoded):
+        self._encoded = bytes(encoded)
+        # Compressed form as read from the database, if any
+        self.stored = None
+
+    @classmethod
+    def from_stored(cls, blob):
+        """Wrap a column value; compressed blobs are decompressed lazily."""
+        blob = bytes(blob)
+        if stored_codec(blob) is None:
+            return cls(blob)
+        raw = cls.__new__(cls)
+        raw._encoded = None
+        raw.stored = blob
+        return raw
+
+    @classmethod
+    def from_value(cls, value):
+        """Encode a Python value (compact, UTF-8)."""
+        return cls(json.dumps(value, separators=(',', ':'), ensure_ascii=False).encode())
+
+    @property
+    def encoded(self):
+        if self._encoded is None:
+            self._encoded = decompress(self.stored)
+        return self._encoded
+
+    def parse(self):
+        return json.loads(self.encoded)
+
+    def __eq__(self, other):
+        return isinstance(other, RawJSON) and self.encoded == other.encoded
+
+    def __len__(self):
+        return len(self.encoded)
+
+    def __repr__(self):
+        if self._encoded is None:
+            return f'RawJSON({len(self.stored)} bytes compressed)'
+        return f'RawJSON({len(self._encoded)} bytes)'
+
+
+class RawJSONField(models.BinaryField):
+    """
+    Stores a JSON document as its encoded bytes.
+
+    Values read from the database are ``RawJSON`` and are never decoded by
+    the ORM. Bytes and strings are taken to be encoded JSON already (as in
+    fixtures); any other value is encoded once on save.
+    """
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return None
+        return RawJSON.from_stored(value)
+
+    def to_python(self, value):
+        if value is None or isinstance(value, RawJSON):
+            return value
+        if isinstance(value, (bytes, memoryview)):
+            return RawJSON.from_stored(value)
+        if isinstance(value, str):
+            return RawJSON(value.encode())
+        return RawJSON.from_value(value)
+
+    def get_prep_value(self, value):
+        value = self.to_python(value)
+        if value is None:
+            return None
+        return value.encoded
+
+    def value_to_string(self, obj):
+        value = self.value_from_object(obj)
+        return None if value is None else value.encoded.decode()
+
+
+class CompressedRawJSONField(RawJSONField):
+    """
+    RawJSONField that stores its bytes compressed.
+
+    Values loaded from the database keep the compressed blob and only
+    decompress when their bytes are read, and are written back without
+    recompressing if untouched. Plain (untagged) rows are still read
+    correctly; ``manage.py compress_room_snapshots`` compresses them.
+    """
+
+    def get_prep_value(self, value):
+        value = self.to_python(value)
+        if value is None:
+            return None
+        if value.stored is not None:
+            return value.stored
+        if len(value.encoded) < COMPRESS_MIN_BYTES:
+            return value.encoded
+        return compress(value.encoded)
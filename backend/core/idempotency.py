@@ -0,0 +1,136 @@
+"""
+Idempotency keys for credit-moving endpoints.
+
+Clients send an ``Idempotency-Key`` header (any unique string, e.g. a UUID)
+with requests that move credits. The first response for a (user, scope,
+key) is stored and duplicates within ``IDEMPOTENCY_KEY_TTL`` seconds get
+that response back without running the handler again. Lookups hit the
+Django cache first and fall back to the ``IdempotencyKey`` table.
+
+The key row is inserted in the same transaction as the handler's writes:
+a concurrent duplicate blocks on the unique constraint until the first
+request commits and then replays its response, and if the handler fails
+the key is rolled back with everything else so the client can retry.
+"""
+
+import functools
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+
+def _ttl():
+    return getattr(settings, 'IDEMPOTENCY_KEY_TTL', 24 * 60 * 60)
+
+
+def _cache_key(user_id, scope, key):
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return f'idempotency_{user_id}_{scope}_{digest}'
+
+
+def _fingerprint(request, include_body):
+    payload = {'method': request.method, 'path': request.path}
+    if include_body:
+        payload['data'] = request.data
+    encoded = json.dumps(payload, sort_keys=True, cls=DjangoJSONEncoder, default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def _replay(fingerprint, stored_fingerprint, status_code, body):
+    if stored_fingerprint != fingerprint:
+        return Response(
+            {'error': f'{HEADER} was already used for a different request.'},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+    response = Response(body, status=status_code)
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def run_idempotent(request, user, scope, handler, include_body=True):
+    """
+    Run ``handler()`` (which returns a Response) at most once per key.
+
+    Without an ``Idempotency-Key`` header the handler simply runs. Server
+    errors are not stored. Set ``include_body=False`` when the request body
+    holds secrets that should not be hashed into the fingerprint.
+    """
+    from .models import IdempotencyKey
+
+    key = request.headers.get(HEADER)
+    if not key:
+        return handler()
+    if len(key) > MAX_KEY_LENGTH:
+        return Response(
+            {'error': f'{HEADER} must be at most {MAX_KEY_LENGTH} characters.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    fingerprint = _fingerprint(request, include_body)
+    cache_key = _cache_key(user.pk, scope, key)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return _replay(fingerprint, *cached)
+
+    cutoff = timezone.now() - timedelta(seconds=_ttl())
+    keys = IdempotencyKey.objects.filter(user=user, scope=scope, key=key)
+
+    def replay_stored(record):
+        stored = (record.fingerprint, record.status_code, record.response_body)
+        remaining = (record.created_at - cutoff).total_seconds()
+        if remaining > 0:
+            cache.set(cache_key, stored, timeout=remaining)
+        return _replay(fingerprint, *stored)
+
+    record = keys.filter(created_at__gte=cutoff).first()
+    if record is not None:
+        return replay_stored(record)
+
+    with transaction.atomic():
+        keys.filter(created_at__lt=cutoff).delete()
+        try:
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(
+                    user=user, scope=scope, key=key, fingerprint=fingerprint
+                )
+        except IntegrityError:
+            # Concurrent duplicate: the first request has committed, replay it
+            return replay_stored(keys.get())
+
+        response = handler()
+        if response.status_code >= 500:
+            transaction.set_rollback(True)
+            return response
+
+        record.status_code = response.status_code
+        record.response_body = response.data
+        record.save(update_fields=['status_code', 'response_body'])
+        stored = (record.fingerprint, record.status_code, record.response_body)
+        transaction.on_commit(lambda: cache.set(cache_key, stored, timeout=_ttl()))
+
+    return response
+
+
+def idempotent(scope, include_body=True):
+    """Decorator form of run_idempotent() for view methods on request.user."""
+    def decorator(view_method):
+        @functools.wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            return run_idempotent(
+                request, request.user, scope,
+                lambda: view_method(self, request, *args, **kwargs),
+                include_body=include_body
+            )
+        return wrapper
+    return decorator
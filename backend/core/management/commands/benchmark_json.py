@@ -0,0 +1,162 @@
+import json
+import timeit
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework import renderers
+
+from ...fields import RawJSON
+from ...renderers import JSONRenderer
+
+
+class StdlibJSONRenderer(JSONRenderer):
+    """core.renderers.JSONRenderer with the stock (stdlib json) encoder."""
+
+    def encode(self, data, accepted_media_type=None, renderer_context=None):
+        return renderers.JSONRenderer.render(self, data, accepted_media_type, renderer_context)
+
+
+def _user(pk):
+    return {
+        'id': pk,
+        'name': f'User {pk}',
+        'is_online': pk % 3 == 0,
+        'availability': 'Weekday evenings, weekends after 10:00',
+        'average_rating': 4.25,
+        'total_reviews': 12,
+        'total_credits_earned': '146.50',
+        'hours_taught': 31.75,
+    }
+
+
+def _session(pk, now):
+    return {
+        'id': pk,
+        'user1': 1,
+        'user2': 2,
+        'user1_details': _user(1),
+        'user2_details': _user(2),
+        'learning_request': pk,
+        'topic': 'Intro to Rust ownership and borrowing',
+        'status': 'active',
+        'start_time': now.isoformat(),
+        'end_time': None,
+        'scheduled_time': (now - timedelta(minutes=5)).isoformat(),
+        'proposed_time': None,
+        'active_timer': {
+            'id': pk,
+            'teacher': 1,
+            'start_time': now.isoformat(),
+            'end_time': None,
+            'duration_seconds': 0,
+        },
+        'user1_teaching_time': 1260,
+        'user2_teaching_time': 840,
+    }
+
+
+def updates_payload(now):
+    """GET /api/sessions/<id>/updates/, mid-call with a small whiteboard."""
+    scene = {
+        'elements': [
+            {'id': f'el{i}', 'type': 'freedraw', 'x': i * 1.5, 'y': i * 2.25, 'version': i,
+             'points': [[j, j * 0.5] for j in range(20)], 'strokeColor': '#1e1e1e'}
+            for i in range(40)
+        ],
+        'appState': {'viewBackgroundColor': '#ffffff'},
+    }
+    candidate = {'type': 'candidate', 'candidate': 'candidate:1 1 udp 2122260223 10.0.0.2 54400 typ host',
+                 'sdpMid': '0', 'sdpMLineIndex': 0, 'sender_id': 2}
+    return {
+        'session': _session(1, now),
+        'is_peer_in_room': True,
+        'whiteboard_data': RawJSON.from_value(scene),
+        'code_data': RawJSON.from_value({'language': 'python', 'code': 'print("hi")\n' * 30}),
+        'last_sync_time': now.isoformat(),
+        'last_sync_by': 2,
+        'sync_version': 418,
+        'signal_data': {'candidates_callee': [candidate] * 10},
+        'signal_timestamp': now,
+        'your_credits': 23.5,
+    }
+
+
+def post_feed_payload(now):
+    """GET /api/posts/, one page of 20."""
+    return {
+        'count': 240,
+        'next': 'http://localhost:8000/api/posts/?page=2',
+        'previous': None,
+        'results': [
+            {
+                'id': pk,
+                'creator_id': pk,
+                'creator_name': f'User {pk}',
+                'creator_rating': 4.5,
+                'creator_availability': 'Weekends',
+                'topic_to_learn': 'Spanish conversation, intermediate level',
+                'topic_to_teach': 'Python for data analysis',
+                'ok_with_just_learning': pk % 2 == 0,
+                'bounty_enabled': pk % 5 == 0,
+                'created_at': (now - timedelta(hours=pk)).isoformat(),
+                'is_completed': False,
+            }
+            for pk in range(20)
+        ],
+    }
+
+
+def profile_payload(now):
+    """GET /api/users/<id>/ (UserPublicSerializer with expanded stats)."""
+    profile = _user(7)
+    profile['weekly_activity'] = [
+        {'date': (now - timedelta(days=day)).strftime('%Y-%m-%d'),
+         'hours_taught': round(0.75 * day, 2), 'credits_earned': 1.5 * day}
+        for day in range(7)
+    ]
+    return profile
+
+
+PAYLOADS = {
+    'updates': updates_payload,
+    'post feed': post_feed_payload,
+    'profile': profile_payload,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare JSON encode time of the default API renderer against the '
+        'stdlib json encoder on representative response payloads.'
+    )
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=2000,
+            help='Renders per payload and renderer (default 2000).',
+        )
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        now = timezone.now()
+        fast, stdlib = JSONRenderer(), StdlibJSONRenderer()
+
+        for name, build in PAYLOADS.items():
+            data = build(now)
+            expected = stdlib.render(data)
+            rendered = fast.render(data)
+            if json.loads(rendered) != json.loads(expected):
+                self.stderr.write(self.style.ERROR(f'{name}: renderers disagree.'))
+                continue
+
+            fast_us = timeit.timeit(lambda: fast.render(data), number=iterations) / iterations * 1e6
+            stdlib_us = timeit.timeit(lambda: stdlib.render(data), number=iterations) / iterations * 1e6
+            self.stdout.write(
+                f'{name:<10} {len(rendered):>7} bytes  '
+                f'stdlib {stdlib_us:8.1f} us  ujson {fast_us:8.1f} us  '
+                f'({stdlib_us / fast_us:.1f}x)'
+            )
@@ -0,0 +1,85 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ...fields import COMPRESS_MIN_BYTES, RawJSON, compress, default_codec, stored_codec
+from ...models import Session
+
+FIELDS = ('whiteboard_data', 'code_data')
+
+
+class Command(BaseCommand):
+    help = (
+        'Compress stored whiteboard/code snapshots that are still plain JSON, '
+        'walking sessions in primary-key batches. A session synced since its '
+        'batch was read is left for the next run.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Sessions to read and rewrite per transaction (default 500).',
+        )
+        parser.add_argument(
+            '--recompress',
+            action='store_true',
+            help='Also rewrite snapshots compressed with a different codec than the configured one.',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        codec = default_codec()
+        sessions = Session.objects.exclude(
+            whiteboard_data__isnull=True, code_data__isnull=True
+        ).order_by('pk')
+
+        last_pk = 0
+        rows = skipped = bytes_before = bytes_after = 0
+        while True:
+            batch = list(
+                sessions.filter(pk__gt=last_pk).values_list(
+                    'pk', 'sync_version', *FIELDS
+                )[:batch_size]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1][0]
+
+            with transaction.atomic():
+                for pk, sync_version, *values in batch:
+                    changes = {}
+                    for field, value in zip(FIELDS, values):
+                        if value is None:
+                            continue
+                        if value.stored is None:
+                            if len(value.encoded) < COMPRESS_MIN_BYTES:
+                                continue
+                        elif stored_codec(value.stored) == codec or not options['recompress']:
+                            continue
+                        blob = compress(value.encoded, codec)
+                        changes[field] = (RawJSON.from_stored(blob), len(value.stored or value.encoded))
+                    if not changes:
+                        continue
+                    # Every sync and checkpoint bumps sync_version; only
+                    # rewrite the snapshot this batch actually read
+                    updated = Session.objects.filter(pk=pk, sync_version=sync_version).update(
+                        **{field: blob for field, (blob, _) in changes.items()}
+                    )
+                    if not updated:
+                        skipped += 1
+                        continue
+                    rows += 1
+                    for blob, size in changes.values():
+                        bytes_before += size
+                        bytes_after += len(blob.stored)
+
+            self.stdout.write(f'Processed sessions up to id {last_pk}.')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Compressed {rows} session(s) with {codec}: {bytes_before} -> {bytes_after} bytes.'
+        ))
+        if skipped:
+            self.stdout.write(
+                f'Skipped {skipped} session(s) synced during the run; run again to compress them.'
+            )
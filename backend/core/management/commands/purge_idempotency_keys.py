@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from ...models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = 'Delete idempotency keys older than the replay window. Run periodically (e.g. cron).'
+
+    def handle(self, *args, **options):
+        deleted = IdempotencyKey.purge_expired()
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {deleted} expired idempotency key{"" if deleted == 1 else "s"}.'
+        ))
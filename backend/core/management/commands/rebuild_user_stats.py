@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+
+from ...stats import rebuild_daily_stats, rebuild_monthly_rollups, rebuild_user_stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute denormalized user stats (ratings, credits earned, hours taught) '
+        'and the UserDailyStats / CreditMonthlyRollup rollups.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=int,
+            action='append',
+            dest='user_ids',
+            help='Only rebuild the given user id (can be repeated).',
+        )
+        parser.add_argument(
+            '--skip-daily',
+            action='store_true',
+            help='Do not rebuild the UserDailyStats rollups.',
+        )
+        parser.add_argument(
+            '--skip-monthly',
+            action='store_true',
+            help='Do not rebuild the CreditMonthlyRollup statement rollups.',
+        )
+
+    def handle(self, *args, **options):
+        users = None
+        if options['user_ids']:
+            users = get_user_model().objects.filter(pk__in=options['user_ids'])
+
+        updated = rebuild_user_stats(users)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt stats for {updated} user(s).'))
+
+        if not options['skip_daily']:
+            rows = rebuild_daily_stats(users)
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt {rows} daily rollup row(s).'))
+
+        if not options['skip_monthly']:
+            rows = rebuild_monthly_rollups(users)
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt {rows} monthly rollup row(s).'))
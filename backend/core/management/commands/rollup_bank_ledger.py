@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from ...models import Bank
+
+
+class Command(BaseCommand):
+    help = 'Fold un-rolled bank ledger entries into the bank balance. Run periodically (e.g. cron).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Number of ledger entries folded in per transaction.',
+        )
+
+    def handle(self, *args, **options):
+        rolled = Bank.roll_up(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Rolled up {rolled} ledger entr{"y" if rolled == 1 else "ies"}. '
+            f'Bank balance: {Bank.get_balance()}'
+        ))
@@ -0,0 +1,63 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ...models import Bank, SettlementJob
+
+
+class Command(BaseCommand):
+    help = (
+        'Process queued session settlements (DB-backed queue, no broker needed) '
+        'and periodically roll up the bank ledger.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Drain the currently due jobs and exit.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50,
+            help='Jobs claimed per batch.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=2.0,
+            help='Seconds to sleep when the queue is empty.',
+        )
+
+    def handle(self, *args, **options):
+        max_attempts = getattr(settings, 'SETTLEMENT_MAX_ATTEMPTS', 5)
+        rollup_interval = getattr(settings, 'BANK_ROLLUP_INTERVAL', 300)
+        next_rollup = time.monotonic()
+
+        while True:
+            # Keep the un-rolled bank ledger tail (summed by every
+            # Bank.get_balance) short
+            if time.monotonic() >= next_rollup:
+                rolled = Bank.roll_up()
+                if rolled:
+                    self.stdout.write(f'Rolled up {rolled} bank ledger entries.')
+                next_rollup = time.monotonic() + rollup_interval
+
+            jobs = SettlementJob.claim_batch(limit=options['batch_size'])
+            for job in jobs:
+                if job.run(max_attempts=max_attempts):
+                    self.stdout.write(f'Settled session {job.session_id}.')
+                elif job.status == 'running':
+                    self.stdout.write(f'Session {job.session_id} was reclaimed by another worker.')
+                else:
+                    self.stderr.write(
+                        f'Settlement for session {job.session_id} {job.status} '
+                        f'(attempt {job.attempts}): {job.last_error}'
+                    )
+
+            if not jobs:
+                if options['once']:
+                    return
+                time.sleep(options['interval'])
@@ -0,0 +1,65 @@
+# Generated by Django 5.0.1 on 2026-10-19 08:50
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_user_stats(apps, schema_editor):
+    User = apps.get_model('core', 'User')
+    Review = apps.get_model('core', 'Review')
+    CreditTransaction = apps.get_model('core', 'CreditTransaction')
+    SessionTimer = apps.get_model('core', 'SessionTimer')
+
+    reviews = Review.objects.filter(reviewee=OuterRef('pk')).order_by().values('reviewee')
+    earned = CreditTransaction.objects.filter(
+        user=OuterRef('pk'),
+        transaction_type__in=['TEACHING', 'SIGNUP', 'BOUNTY'],
+        amount__gt=0,
+    ).order_by().values('user')
+    taught = SessionTimer.objects.filter(
+        teacher=OuterRef('pk'), end_time__isnull=False
+    ).order_by().values('teacher')
+
+    User.objects.update(
+        review_count=Coalesce(Subquery(reviews.annotate(n=Count('id')).values('n')), Value(0)),
+        rating_total=Coalesce(Subquery(reviews.annotate(t=Sum('rating')).values('t')), Value(0)),
+        credits_earned_total=Coalesce(
+            Subquery(earned.annotate(t=Sum('amount')).values('t')), Value(Decimal('0.00'))
+        ),
+        seconds_taught_total=Coalesce(
+            Subquery(taught.annotate(t=Sum('duration_seconds')).values('t')), Value(0)
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_session_sync_version_alter_session_last_sync_time_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='credits_earned_total',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='All-time credits earned (teaching, signup, bounty)', max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='rating_total',
+            field=models.PositiveIntegerField(default=0, help_text='Sum of all ratings received'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0, help_text='Number of reviews received'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='seconds_taught_total',
+            field=models.PositiveBigIntegerField(default=0, help_text='All-time seconds taught across stopped timers'),
+        ),
+        migrations.RunPython(backfill_user_stats, migrations.RunPython.noop),
+    ]
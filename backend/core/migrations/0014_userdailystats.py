@@ -0,0 +1,61 @@
+# Generated by Django 5.0.1 on 2026-10-19 08:51
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_daily_stats(apps, schema_editor):
+    CreditTransaction = apps.get_model('core', 'CreditTransaction')
+    SessionTimer = apps.get_model('core', 'SessionTimer')
+    UserDailyStats = apps.get_model('core', 'UserDailyStats')
+
+    earned = CreditTransaction.objects.filter(
+        transaction_type__in=['TEACHING', 'SIGNUP', 'BOUNTY'], amount__gt=0
+    ).annotate(day=TruncDate('created_at')).order_by().values('user_id', 'day').annotate(t=Sum('amount'))
+    taught = SessionTimer.objects.filter(
+        end_time__isnull=False
+    ).annotate(day=TruncDate('end_time')).order_by().values('teacher_id', 'day').annotate(t=Sum('duration_seconds'))
+
+    rollups = {}
+    for row in earned.iterator():
+        key = (row['user_id'], row['day'])
+        rollups[key] = UserDailyStats(user_id=key[0], date=key[1], credits_earned=row['t'])
+    for row in taught.iterator():
+        key = (row['teacher_id'], row['day'])
+        rollups.setdefault(key, UserDailyStats(user_id=key[0], date=key[1])).seconds_taught = row['t']
+
+    UserDailyStats.objects.bulk_create(rollups.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_user_denormalized_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('credits_earned', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Credits earned on this day (teaching, signup, bounty)', max_digits=12)),
+                ('seconds_taught', models.PositiveIntegerField(default=0, help_text='Seconds taught on this day (by timer end time)')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'user daily stats',
+                'verbose_name_plural': 'user daily stats',
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='userdailystats',
+            constraint=models.UniqueConstraint(fields=('user', 'date'), name='unique_user_daily_stats'),
+        ),
+        migrations.RunPython(backfill_daily_stats, migrations.RunPython.noop),
+    ]
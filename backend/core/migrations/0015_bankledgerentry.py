@@ -0,0 +1,40 @@
+# Generated by Django 5.0.1 on 2026-10-19 08:56
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_userdailystats'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='bank',
+            name='total_credits',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Credits rolled up from the bank ledger', max_digits=15),
+        ),
+        migrations.CreateModel(
+            name='BankLedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, help_text='Positive for credits in, negative for payouts', max_digits=12)),
+                ('entry_type', models.CharField(choices=[('CUT', 'Transaction Cut'), ('SUPPORT', 'Support Payout'), ('ADJUSTMENT', 'Adjustment')], max_length=20)),
+                ('description', models.CharField(blank=True, default='', max_length=255)),
+                ('rolled_up', models.BooleanField(default=False, help_text='Whether this entry has been folded into Bank.total_credits')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('session', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bank_entries', to='core.session')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bank_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'bank ledger entry',
+                'verbose_name_plural': 'bank ledger entries',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(condition=models.Q(('rolled_up', False)), fields=['id'], name='bank_ledger_unrolled_idx')],
+            },
+        ),
+    ]
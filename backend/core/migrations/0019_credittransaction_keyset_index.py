@@ -0,0 +1,21 @@
+# Generated by Django 5.0.1 on 2026-10-19 09:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='credittransaction',
+            name='core_credit_user_id_c97634_idx',
+        ),
+        migrations.AddIndex(
+            model_name='credittransaction',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='core_credit_user_id_5f8d5c_idx'),
+        ),
+    ]
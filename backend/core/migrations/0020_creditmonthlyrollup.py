@@ -0,0 +1,72 @@
+# Generated by Django 5.0.1 on 2026-10-19 09:12
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Case, Count, DateField, F, Sum, Value, When
+from django.db.models.functions import TruncMonth
+
+
+def backfill_monthly_rollups(apps, schema_editor):
+    CreditTransaction = apps.get_model('core', 'CreditTransaction')
+    CreditMonthlyRollup = apps.get_model('core', 'CreditMonthlyRollup')
+
+    grouped = CreditTransaction.objects.annotate(
+        month=TruncMonth('created_at', output_field=DateField()),
+        counterparty_id=Case(
+            When(session__isnull=True, then=Value(None)),
+            When(session__user1=F('user'), then=F('session__user2')),
+            default=F('session__user1'),
+        ),
+    ).order_by().values(
+        'user_id', 'month', 'transaction_type', 'counterparty_id'
+    ).annotate(t=Sum('amount'), n=Count('id'))
+
+    CreditMonthlyRollup.objects.bulk_create(
+        (
+            CreditMonthlyRollup(
+                user_id=row['user_id'],
+                month=row['month'],
+                transaction_type=row['transaction_type'],
+                counterparty_id=row['counterparty_id'],
+                total=Decimal(str(row['t'])).quantize(Decimal('0.01')),
+                count=row['n'],
+            )
+            for row in grouped.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_credittransaction_keyset_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CreditMonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month')),
+                ('transaction_type', models.CharField(max_length=20)),
+                ('total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Net amount (positive earned, negative spent)', max_digits=12)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('counterparty', models.ForeignKey(blank=True, help_text='Other participant of the session, if any', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'credit monthly rollup',
+                'verbose_name_plural': 'credit monthly rollups',
+                'ordering': ['-month'],
+                'indexes': [models.Index(fields=['user', 'month'], name='core_credit_user_id_da627a_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='creditmonthlyrollup',
+            constraint=models.UniqueConstraint(fields=('user', 'month', 'transaction_type', 'counterparty'), name='unique_credit_monthly_rollup'),
+        ),
+        migrations.RunPython(backfill_monthly_rollups, migrations.RunPython.noop),
+    ]
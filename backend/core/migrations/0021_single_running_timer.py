@@ -0,0 +1,36 @@
+# Generated by Django 5.0.1 on 2026-10-19 09:16
+
+from django.db import migrations, models
+
+
+def stop_duplicate_running_timers(apps, schema_editor):
+    """Keep only the newest running timer per session; stop the others when it started."""
+    SessionTimer = apps.get_model('core', 'SessionTimer')
+
+    newest = {}
+    for timer in SessionTimer.objects.filter(end_time__isnull=True).order_by('session_id', '-start_time', '-id'):
+        if timer.session_id not in newest:
+            newest[timer.session_id] = timer
+            continue
+        timer.end_time = max(newest[timer.session_id].start_time, timer.start_time)
+        timer.duration_seconds = int((timer.end_time - timer.start_time).total_seconds())
+        timer.save(update_fields=['end_time', 'duration_seconds'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_creditmonthlyrollup'),
+    ]
+
+    operations = [
+        migrations.RunPython(stop_duplicate_running_timers, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='sessiontimer',
+            index=models.Index(fields=['session', 'end_time'], name='core_sessio_session_5cd6f6_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='sessiontimer',
+            constraint=models.UniqueConstraint(condition=models.Q(('end_time__isnull', True)), fields=('session',), name='one_running_timer_per_session'),
+        ),
+    ]
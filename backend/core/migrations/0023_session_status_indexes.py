@@ -0,0 +1,21 @@
+# Generated by Django 5.0.1 on 2026-10-19 09:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_session_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='session',
+            index=models.Index(fields=['user1', 'status', '-start_time'], name='core_sessio_user1_i_527369_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='session',
+            index=models.Index(fields=['user2', 'status', '-start_time'], name='core_sessio_user2_i_e93999_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.1 on 2026-10-19 09:23
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_session_status_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SessionTransition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event', models.CharField(max_length=20)),
+                ('from_status', models.CharField(max_length=20)),
+                ('to_status', models.CharField(max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transitions', to='core.session')),
+            ],
+            options={
+                'verbose_name': 'session transition',
+                'verbose_name_plural': 'session transitions',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['session', 'created_at'], name='core_sessio_session_aa5f2b_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.0.1 on 2026-10-19 09:40
+
+import core.fields
+from django.db import migrations
+from django.db.models import Q
+
+
+def encode_workspace(apps, schema_editor):
+    Session = apps.get_model('core', 'Session')
+    RawJSON = core.fields.RawJSON
+
+    rows = Session.objects.filter(
+        Q(whiteboard_data__isnull=False) | Q(code_data__isnull=False)
+    ).values_list('pk', 'whiteboard_data', 'code_data')
+    for pk, whiteboard_data, code_data in rows.iterator():
+        Session.objects.filter(pk=pk).update(
+            whiteboard_raw=None if whiteboard_data is None else RawJSON.from_value(whiteboard_data),
+            code_raw=None if code_data is None else RawJSON.from_value(code_data),
+        )
+
+
+def decode_workspace(apps, schema_editor):
+    Session = apps.get_model('core', 'Session')
+
+    rows = Session.objects.filter(
+        Q(whiteboard_raw__isnull=False) | Q(code_raw__isnull=False)
+    ).values_list('pk', 'whiteboard_raw', 'code_raw')
+    for pk, whiteboard_raw, code_raw in rows.iterator():
+        Session.objects.filter(pk=pk).update(
+            whiteboard_data=None if whiteboard_raw is None else whiteboard_raw.parse(),
+            code_data=None if code_raw is None else code_raw.parse(),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_session_transition'),
+    ]
+
+    # JSON columns can't be cast to binary in place on every backend, so the
+    # payloads are copied into new columns which then take over the names
+    operations = [
+        migrations.AddField(
+            model_name='session',
+            name='whiteboard_raw',
+            field=core.fields.RawJSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='session',
+            name='code_raw',
+            field=core.fields.RawJSONField(blank=True, null=True),
+        ),
+        migrations.RunPython(encode_workspace, decode_workspace),
+        migrations.RemoveField(
+            model_name='session',
+            name='whiteboard_data',
+        ),
+        migrations.RemoveField(
+            model_name='session',
+            name='code_data',
+        ),
+        migrations.RenameField(
+            model_name='session',
+            old_name='whiteboard_raw',
+            new_name='whiteboard_data',
+        ),
+        migrations.RenameField(
+            model_name='session',
+            old_name='code_raw',
+            new_name='code_data',
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.0.1 on 2026-10-19 09:31
+
+import core.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0025_raw_json_workspace'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='session',
+            name='code_data',
+            field=core.fields.CompressedRawJSONField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='session',
+            name='whiteboard_data',
+            field=core.fields.CompressedRawJSONField(blank=True, null=True),
+        ),
+    ]
@@ -1,17 +1,28 @@
 from .user import User
 from .learning_request import LearningRequestPost
-from .session import Session, SessionTimer
+from .session import Session, SessionTimer, SessionTombstone, SessionTransition
 from .review import Review
-from .credit import CreditTransaction, Bank
+from .credit import CreditTransaction, Bank, BankLedgerEntry, JournalEntry
 from .chat import ChatMessage
+from .stats import UserDailyStats, CreditMonthlyRollup
+from .settlement import SettlementJob
+from .idempotency import IdempotencyKey
 
 __all__ = [
     'User',
     'LearningRequestPost',
     'Session',
     'SessionTimer',
+    'SessionTombstone',
+    'SessionTransition',
     'Review',
     'CreditTransaction',
     'Bank',
+    'BankLedgerEntry',
+    'JournalEntry',
     'ChatMessage',
+    'UserDailyStats',
+    'CreditMonthlyRollup',
+    'SettlementJob',
+    'IdempotencyKey',
 ]
@@ -3,19 +3,38 @@ from django.conf import settings
 from decimal import Decimal
 
 
+def _can_return_from_update(connection):
+    """
+    Whether the backend supports ``UPDATE ... RETURNING``.
+    
+    Not ``features.can_return_columns_from_insert``: that flag is about
+    INSERT, and MariaDB sets it without supporting RETURNING on UPDATE.
+    """
+    if connection.vendor == 'postgresql':
+        return True
+    if connection.vendor == 'sqlite':
+        return connection.Database.sqlite_version_info >= (3, 35)
+    return False
+
+
 class Bank(models.Model):
     """
     System Bank model.
     Accumulates 10% cut from all teaching transactions.
     No fixed balance - grows from transaction cuts.
     Singleton pattern - only one bank instance.
+    
+    Movements are appended to BankLedgerEntry instead of updating this row,
+    so concurrent settlements never contend on it. ``total_credits`` holds
+    the rolled-up balance; the live balance is that plus the un-rolled tail
+    (see ``get_balance`` and ``roll_up``).
     """
     
     total_credits = models.DecimalField(
         max_digits=15,
         decimal_places=2,
         default=Decimal('0.00'),
-        help_text='Total credits accumulated from transaction cuts'
+        help_text='Credits rolled up from the bank ledger'
     )
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -32,18 +51,163 @@ class Bank(models.Model):
         bank, _ = cls.objects.get_or_create(pk=1)
         return bank
     
-    def add_credits(self, amount):
+    @classmethod
+    def get_balance(cls):
+        """
+        Current bank balance: rolled-up total plus the un-rolled ledger tail.
+        
+        Both are read in one statement (the tail as a subquery against the
+        bank row), so a concurrent ``roll_up`` cannot be seen half-applied.
+        """
+        from django.db.models import OuterRef, Subquery, Sum, Value
+        from django.db.models.functions import Coalesce
+        
+        tail = BankLedgerEntry.objects.filter(rolled_up=False).annotate(
+            bank=Value(1)
+        ).order_by().values('bank').annotate(total=Sum('amount')).values('total')
+        balance = None
+        while balance is None:
+            balance = cls.objects.filter(pk=1).annotate(
+                tail=Coalesce(
+                    Subquery(tail),
+                    Value(Decimal('0.00')),
+                    output_field=models.DecimalField(max_digits=15, decimal_places=2)
+                )
+            ).values_list('total_credits', 'tail').first()
+            if balance is None:
+                # Nothing to roll up against yet; create the row and re-read
+                cls.get_instance()
+        rolled_up, tail_total = balance
+        return (rolled_up + Decimal(str(tail_total))).quantize(Decimal('0.01'))
+    
+    @classmethod
+    def add_credits(cls, amount, session=None, journal_entry=None, description=''):
         """Add credits to the bank (from transaction cuts)."""
-        self.total_credits += Decimal(str(amount))
-        self.save(update_fields=['total_credits', 'updated_at'])
+        return BankLedgerEntry.objects.create(
+            amount=Decimal(str(amount)),
+            entry_type='CUT',
+            session=session,
+            journal_entry=journal_entry,
+            description=description
+        )
     
-    def deduct_credits(self, amount):
-        """Deduct credits from bank (for support payouts)."""
+    @classmethod
+    def deduct_credits(cls, amount, user=None, description=''):
+        """
+        Deduct credits from bank (for support payouts).
+        
+        Payouts lock the bank row so the balance check and the insert are
+        serialized against each other (and against ``roll_up``); cuts stay
+        lock-free, and can only raise the balance meanwhile.
+        """
+        from django.db import transaction as db_transaction
+        
         amount = Decimal(str(amount))
-        if self.total_credits < amount:
-            raise ValueError('Insufficient bank credits.')
-        self.total_credits -= amount
-        self.save(update_fields=['total_credits', 'updated_at'])
+        with db_transaction.atomic():
+            cls.objects.select_for_update().get_or_create(pk=1)
+            if cls.get_balance() < amount:
+                raise ValueError('Insufficient bank credits.')
+            return BankLedgerEntry.objects.create(
+                amount=-amount,
+                entry_type='SUPPORT',
+                user=user,
+                description=description
+            )
+    
+    @classmethod
+    def roll_up(cls, batch_size=5000):
+        """
+        Fold un-rolled ledger entries into ``total_credits``.
+        Only the roll-up itself locks the bank row. Returns the number of
+        entries folded in.
+        """
+        from django.db import transaction as db_transaction
+        
+        rolled = 0
+        while True:
+            with db_transaction.atomic():
+                bank = cls.objects.select_for_update().get_or_create(pk=1)[0]
+                batch = list(
+                    BankLedgerEntry.objects.filter(rolled_up=False)
+                    .order_by('id')
+                    .values_list('id', 'amount')[:batch_size]
+                )
+                if not batch:
+                    return rolled
+                ids = [entry_id for entry_id, _ in batch]
+                BankLedgerEntry.objects.filter(id__in=ids).update(rolled_up=True)
+                bank.total_credits += sum((amount for _, amount in batch), Decimal('0.00'))
+                bank.save(update_fields=['total_credits', 'updated_at'])
+            rolled += len(batch)
+
+
+class BankLedgerEntry(models.Model):
+    """
+    Append-only record of a bank movement.
+    Positive amounts are cuts taken in, negative amounts are payouts.
+    """
+    
+    ENTRY_TYPES = [
+        ('CUT', 'Transaction Cut'),
+        ('SUPPORT', 'Support Payout'),
+        ('ADJUSTMENT', 'Adjustment'),
+    ]
+    
+    amount = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        help_text='Positive for credits in, negative for payouts'
+    )
+    entry_type = models.CharField(
+        max_length=20,
+        choices=ENTRY_TYPES
+    )
+    session = models.ForeignKey(
+        'Session',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='bank_entries'
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='bank_entries'
+    )
+    journal_entry = models.ForeignKey(
+        'JournalEntry',
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='bank_legs'
+    )
+    description = models.CharField(
+        max_length=255,
+        blank=True,
+        default=''
+    )
+    rolled_up = models.BooleanField(
+        default=False,
+        help_text='Whether this entry has been folded into Bank.total_credits'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'bank ledger entry'
+        verbose_name_plural = 'bank ledger entries'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(
+                fields=['id'],
+                condition=models.Q(rolled_up=False),
+                name='bank_ledger_unrolled_idx'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"Bank {self.amount:+.2f} ({self.entry_type})"
 
 
 class CreditTransaction(models.Model):
@@ -72,6 +236,13 @@ class CreditTransaction(models.Model):
         blank=True,
         related_name='credit_transactions'
     )
+    journal_entry = models.ForeignKey(
+        'JournalEntry',
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='user_legs'
+    )
     amount = models.DecimalField(
         max_digits=10,
         decimal_places=2,
@@ -98,32 +269,173 @@ class CreditTransaction(models.Model):
         verbose_name_plural = 'credit transactions'
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['user', '-created_at']),
+            # Keyset pagination of a user's history on (created_at, id)
+            models.Index(fields=['user', '-created_at', '-id']),
             models.Index(fields=['transaction_type', '-created_at']),
         ]
     
     def __str__(self):
         return f"{self.user.name}: {self.amount:+.2f} ({self.transaction_type})"
     
+    @classmethod
+    def apply_balance_change(cls, user, amount):
+        """
+        Atomically add ``amount`` to the user's balance and return the new one.
+        
+        Runs a single guarded ``UPDATE ... SET credits = credits + x WHERE
+        credits + x >= 0`` (with ``RETURNING`` on PostgreSQL and SQLite 3.35+),
+        so concurrent writers never overwrite each other's changes. Raises
+        ValueError if the balance would go negative. ``user.credits`` is
+        updated in memory to the new balance.
+        """
+        from django.db import connection
+        
+        amount = Decimal(str(amount))
+        User = type(user)
+        
+        if _can_return_from_update(connection):
+            qn = connection.ops.quote_name
+            table = qn(User._meta.db_table)
+            credits = qn(User._meta.get_field('credits').column)
+            pk = qn(User._meta.pk.column)
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'UPDATE {table} SET {credits} = {credits} + %s '
+                    f'WHERE {pk} = %s AND {credits} + %s >= 0 '
+                    f'RETURNING {credits}',
+                    [amount, user.pk, amount]
+                )
+                row = cursor.fetchone()
+            if row is None:
+                raise ValueError('Insufficient credits.')
+            new_balance = row[0]
+        else:
+            updated = User.objects.filter(
+                pk=user.pk,
+                credits__gte=-amount
+            ).update(credits=models.F('credits') + amount)
+            if not updated:
+                raise ValueError('Insufficient credits.')
+            new_balance = User.objects.values_list('credits', flat=True).get(pk=user.pk)
+        
+        user.credits = Decimal(str(new_balance)).quantize(Decimal('0.01'))
+        return user.credits
+    
     @classmethod
     def record_transaction(cls, user, amount, transaction_type, session=None, description=''):
-        """Record a credit transaction and update user balance."""
+        """Record a credit transaction and atomically update user balance."""
         from django.db import transaction as db_transaction
         
+        amount = Decimal(str(amount))
         with db_transaction.atomic():
-            # Update user credits
-            new_balance = user.credits + Decimal(str(amount))
-            if new_balance < 0:
-                raise ValueError('Insufficient credits.')
-            user.credits = new_balance
-            user.save(update_fields=['credits'])
+            new_balance = cls.apply_balance_change(user, amount)
             
             # Create transaction record
             return cls.objects.create(
                 user=user,
                 session=session,
-                amount=Decimal(str(amount)),
+                amount=amount,
                 transaction_type=transaction_type,
-                balance_after=user.credits,
+                balance_after=new_balance,
                 description=description
             )
+
+
+class JournalEntry(models.Model):
+    """
+    Double-entry journal entry grouping the legs of one settlement.
+    
+    User legs are CreditTransaction rows and the bank leg is a
+    BankLedgerEntry, all pointing back here. The legs of every entry sum to
+    zero; ``unbalanced()`` finds any that do not.
+    """
+    
+    session = models.ForeignKey(
+        'Session',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='journal_entries'
+    )
+    description = models.CharField(
+        max_length=255,
+        blank=True,
+        default=''
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'journal entry'
+        verbose_name_plural = 'journal entries'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"Journal #{self.pk}: {self.description}"
+    
+    @classmethod
+    def post(cls, user_legs, bank_amount=Decimal('0.00'), session=None, description=''):
+        """
+        Write a balanced entry in one transaction.
+        
+        ``user_legs`` are unsaved CreditTransaction instances with
+        ``balance_after`` already computed by the caller (which should hold
+        the user rows locked). Balances are applied with one guarded UPDATE
+        per user, the legs with a single bulk_create.
+        """
+        from collections import defaultdict
+        from django.db import transaction as db_transaction
+        from .. import stats
+        
+        bank_amount = Decimal(str(bank_amount))
+        total = sum((leg.amount for leg in user_legs), Decimal('0.00')) + bank_amount
+        if total != 0:
+            raise ValueError(f'Journal entry does not balance (off by {total}).')
+        
+        with db_transaction.atomic():
+            entry = cls.objects.create(session=session, description=description)
+            
+            net = defaultdict(lambda: Decimal('0.00'))
+            users = {}
+            for leg in user_legs:
+                leg.journal_entry = entry
+                net[leg.user_id] += leg.amount
+                users[leg.user_id] = leg.user
+            for user_id, amount in net.items():
+                if amount:
+                    CreditTransaction.apply_balance_change(users[user_id], amount)
+            
+            # bulk_create skips post_save, so update the user stats explicitly
+            CreditTransaction.objects.bulk_create(user_legs)
+            for leg in user_legs:
+                stats.record_credit_transaction(leg)
+            
+            if bank_amount:
+                Bank.add_credits(
+                    bank_amount,
+                    session=session,
+                    journal_entry=entry,
+                    description=description
+                )
+        return entry
+    
+    @classmethod
+    def unbalanced(cls):
+        """Entries whose user and bank legs do not sum to zero."""
+        from django.db.models import OuterRef, Subquery, Sum, Value
+        from django.db.models.functions import Coalesce
+        
+        def leg_sum(model):
+            return Coalesce(
+                Subquery(
+                    model.objects.filter(journal_entry=OuterRef('pk'))
+                    .order_by().values('journal_entry')
+                    .annotate(total=Sum('amount')).values('total')
+                ),
+                Value(Decimal('0.00')),
+                output_field=models.DecimalField(max_digits=15, decimal_places=2)
+            )
+        
+        # Compare with a half-cent tolerance: SQLite sums decimals as floats
+        return cls.objects.annotate(
+            imbalance=leg_sum(CreditTransaction) + leg_sum(BankLedgerEntry),
+        ).exclude(imbalance__range=(Decimal('-0.005'), Decimal('0.005')))
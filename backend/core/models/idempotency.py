@@ -0,0 +1,60 @@
+from django.db import models
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+class IdempotencyKey(models.Model):
+    """
+    First response to a request sent with an ``Idempotency-Key`` header.
+    
+    Duplicates of the same request (same user, scope and key) within
+    ``IDEMPOTENCY_KEY_TTL`` replay the stored response instead of running
+    the handler again. See core.idempotency.
+    """
+    
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='idempotency_keys'
+    )
+    scope = models.CharField(
+        max_length=100,
+        help_text='Endpoint the key was used for'
+    )
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(
+        max_length=64,
+        help_text='Hash of the request, to reject a key reused for a different request'
+    )
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(
+        encoder=DjangoJSONEncoder,
+        null=True,
+        blank=True
+    )
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    class Meta:
+        verbose_name = 'idempotency key'
+        verbose_name_plural = 'idempotency keys'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'scope', 'key'],
+                name='unique_idempotency_key'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.scope} {self.key} ({self.user_id})"
+    
+    @classmethod
+    def purge_expired(cls, ttl=None):
+        """Delete keys older than the replay window. Returns the count deleted."""
+        from datetime import timedelta
+        from django.utils import timezone
+        
+        if ttl is None:
+            ttl = getattr(settings, 'IDEMPOTENCY_KEY_TTL', 24 * 60 * 60)
+        cutoff = timezone.now() - timedelta(seconds=ttl)
+        deleted, _ = cls.objects.filter(created_at__lt=cutoff).delete()
+        return deleted
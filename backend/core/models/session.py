@@ -1,7 +1,9 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.conf import settings
 from django.utils import timezone
 
+from ..fields import CompressedRawJSONField
+
 
 class Session(models.Model):
     """
@@ -61,9 +63,10 @@ class Session(models.Model):
     user1_lobby_joined_at = models.DateTimeField(null=True, blank=True)
     user2_lobby_joined_at = models.DateTimeField(null=True, blank=True)
     
-    # Collaborative data for polling sync
-    whiteboard_data = models.JSONField(null=True, blank=True)
-    code_data = models.JSONField(null=True, blank=True)
+    # Collaborative data for polling sync, kept as compressed encoded JSON
+    # (see core.fields)
+    whiteboard_data = CompressedRawJSONField(null=True, blank=True)
+    code_data = CompressedRawJSONField(null=True, blank=True)
     # FIX: Use a manually-updated timestamp (not auto_now) so presence pings
     # don't falsely update last_sync_time and break the peer sync check.
     last_sync_time = models.DateTimeField(null=True, blank=True)
@@ -93,17 +96,57 @@ class Session(models.Model):
     user1_last_room_presence = models.DateTimeField(null=True, blank=True)
     user2_last_room_presence = models.DateTimeField(null=True, blank=True)
     
+    # Last change to anything shown in session lists (see LIST_FIELDS);
+    # drives incremental list sync (GET /sessions/?updated_since=)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    
+    # Saving any of these bumps updated_at; presence and sync writes don't
+    LIST_FIELDS = {
+        'user1', 'user2', 'end_time', 'is_active', 'status',
+        'scheduled_time', 'proposed_time',
+    }
+    
+    # Lifecycle events: event -> (statuses it can be applied in, new status).
+    # Applied with transition(); the terminal statuses also end is_active.
+    TRANSITIONS = {
+        'accept': (('pending',), 'accepted'),
+        'reject': (('pending',), 'rejected'),
+        'schedule': (('accepted', 'scheduled'), 'scheduled'),
+        'activate': (('scheduled',), 'active'),
+        'expire': (('scheduled',), 'expired'),
+        'complete': (('pending', 'accepted', 'scheduled', 'active'), 'completed'),
+    }
+    TERMINAL_STATUSES = ('completed', 'expired', 'rejected')
+    
     class Meta:
         verbose_name = 'session'
         verbose_name_plural = 'sessions'
         ordering = ['-start_time']
         indexes = [
             models.Index(fields=['is_active', '-start_time']),
+            # Per-participant status filters, counts and keyset pages
+            models.Index(fields=['user1', 'status', '-start_time']),
+            models.Index(fields=['user2', 'status', '-start_time']),
         ]
     
     def __str__(self):
         return f"Session: {self.user1.name} <-> {self.user2.name}"
     
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if (
+            update_fields is not None
+            and 'updated_at' not in update_fields
+            and self.LIST_FIELDS & set(update_fields)
+        ):
+            kwargs['update_fields'] = [*update_fields, 'updated_at']
+        super().save(*args, **kwargs)
+    
+    @classmethod
+    def touch(cls, session_id):
+        """Mark a session as changed for list sync (e.g. its teaching time moved)."""
+        cls.objects.filter(pk=session_id).update(updated_at=timezone.now())
+    
     @property
     def total_duration(self):
         """Calculate total session duration in seconds."""
@@ -111,8 +154,51 @@ class Session(models.Model):
             return (self.end_time - self.start_time).total_seconds()
         return (timezone.now() - self.start_time).total_seconds()
     
+    @staticmethod
+    def teaching_time_annotations():
+        """
+        Queryset annotations for list views: finished teaching seconds per
+        participant and the running timer's teacher/start, all computed in
+        SQL. get_teaching_time() uses them when present.
+        """
+        from django.db.models import OuterRef, Subquery, Sum
+        
+        def finished_seconds(participant):
+            return Subquery(
+                SessionTimer.objects.filter(
+                    session=OuterRef('pk'),
+                    teacher=OuterRef(participant),
+                    end_time__isnull=False
+                ).order_by().values('session').annotate(
+                    total=Sum('duration_seconds')
+                ).values('total')
+            )
+        
+        running = SessionTimer.objects.filter(
+            session=OuterRef('pk'),
+            end_time__isnull=True
+        ).order_by('-start_time')
+        
+        return {
+            'user1_finished_seconds': finished_seconds('user1'),
+            'user2_finished_seconds': finished_seconds('user2'),
+            'running_teacher_id': Subquery(running.values('teacher')[:1]),
+            'running_start_time': Subquery(running.values('start_time')[:1]),
+        }
+    
     def get_teaching_time(self, user):
         """Get total teaching time for a specific user in this session."""
+        # Use SQL annotations (see teaching_time_annotations) when present
+        if hasattr(self, 'running_start_time') and user.id in (self.user1_id, self.user2_id):
+            if user.id == self.user1_id:
+                total_seconds = self.user1_finished_seconds or 0
+            else:
+                total_seconds = self.user2_finished_seconds or 0
+            if self.running_teacher_id == user.id:
+                # Include elapsed time for running timer
+                total_seconds += int((timezone.now() - self.running_start_time).total_seconds())
+            return total_seconds
+        
         # Use prefetched data if available to avoid N+1 queries
         if hasattr(self, '_prefetched_objects_cache') and 'timers' in self._prefetched_objects_cache:
             timers = [t for t in self.timers.all() if t.teacher_id == user.id]
@@ -129,18 +215,64 @@ class Session(models.Model):
                 total_seconds += int(elapsed)
         return total_seconds
     
-    def end_session(self):
-        """End the session and stop any running timers."""
-        self.is_active = False
-        self.status = 'completed'
-        self.end_time = timezone.now()
+    def transition(self, event, actor=None, guard=None, **changes):
+        """
+        Apply lifecycle ``event`` if nobody changed the status under us.
+        
+        The change is one conditional ``UPDATE ... WHERE status = <status we
+        read>`` (narrowed further by ``guard`` lookups), together with any
+        extra field ``changes``, and a SessionTransition row is recorded when
+        it applies. Returns whether this call won; when it lost, the
+        instance is refreshed so the caller sees the winner's state.
+        """
+        sources, target = self.TRANSITIONS[event]
+        if self.status not in sources:
+            return False
+        
+        changes['status'] = target
+        if target in self.TERMINAL_STATUSES:
+            changes['is_active'] = False
+        # update() skips auto_now, and status is shown in session lists
+        changes['updated_at'] = timezone.now()
+        
+        with transaction.atomic():
+            won = Session.objects.filter(
+                pk=self.pk, status=self.status, **(guard or {})
+            ).update(**changes)
+            if won:
+                SessionTransition.objects.create(
+                    session=self,
+                    event=event,
+                    from_status=self.status,
+                    to_status=target,
+                    actor=actor,
+                )
         
-        # Stop any running timers
-        running_timers = self.timers.filter(end_time__isnull=True)
-        for timer in running_timers:
-            timer.stop()
+        if not won:
+            self.refresh_from_db(fields=[
+                'status', 'is_active', 'end_time', 'scheduled_time',
+                'proposed_time', 'proposer', 'room_id', 'updated_at',
+            ])
+            return False
         
-        self.save(update_fields=['is_active', 'status', 'end_time'])
+        for name, value in changes.items():
+            setattr(self, name, value)
+        return True
+    
+    def end_session(self, actor=None):
+        """
+        End the session and stop any running timers.
+        
+        Returns whether this call ended it (False if it had already ended).
+        """
+        with transaction.atomic():
+            if not self.transition('complete', actor=actor, end_time=timezone.now()):
+                return False
+            
+            # Stop any running timers
+            for timer in self.timers.filter(end_time__isnull=True):
+                timer.stop()
+        return True
     
     def has_active_timer(self):
         """Check if there's an active timer in this session."""
@@ -155,6 +287,61 @@ class Session(models.Model):
         return self.timers.filter(end_time__isnull=True).first()
 
 
+class SessionTransition(models.Model):
+    """
+    Audit record of a lifecycle change applied by Session.transition().
+    """
+    
+    session = models.ForeignKey(
+        Session,
+        on_delete=models.CASCADE,
+        related_name='transitions'
+    )
+    event = models.CharField(max_length=20)
+    from_status = models.CharField(max_length=20)
+    to_status = models.CharField(max_length=20)
+    # Null for transitions triggered by the system (e.g. expiry)
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'session transition'
+        verbose_name_plural = 'session transitions'
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['session', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"Session {self.session_id}: {self.from_status} -> {self.to_status}"
+
+
+class SessionTombstone(models.Model):
+    """
+    Record of a deleted session, so incremental list sync can tell clients
+    to drop it. Written by core.signals; kept for SESSION_TOMBSTONE_TTL.
+    """
+    
+    session_id = models.BigIntegerField()
+    user1_id = models.BigIntegerField()
+    user2_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    class Meta:
+        verbose_name = 'session tombstone'
+        verbose_name_plural = 'session tombstones'
+        ordering = ['-deleted_at']
+    
+    def __str__(self):
+        return f"Deleted session {self.session_id}"
+
+
 class SessionTimer(models.Model):
     """
     Per-user teaching timer within a session.
@@ -182,6 +369,17 @@ class SessionTimer(models.Model):
         verbose_name = 'session timer'
         verbose_name_plural = 'session timers'
         ordering = ['-start_time']
+        indexes = [
+            models.Index(fields=['session', 'end_time']),
+        ]
+        constraints = [
+            # At most one running timer per session
+            models.UniqueConstraint(
+                fields=['session'],
+                condition=models.Q(end_time__isnull=True),
+                name='one_running_timer_per_session'
+            ),
+        ]
     
     def __str__(self):
         return f"Timer: {self.teacher.name} teaching in session {self.session.id}"
@@ -192,28 +390,62 @@ class SessionTimer(models.Model):
         return self.end_time is None
     
     def stop(self):
-        """Stop the timer and calculate duration."""
-        if self.end_time is None:
-            self.end_time = timezone.now()
-            self.duration_seconds = int(
-                (self.end_time - self.start_time).total_seconds()
-            )
-            self.save(update_fields=['end_time', 'duration_seconds'])
+        """
+        Stop the timer and calculate duration.
+        
+        The stop is a conditional UPDATE, so when two requests race only one
+        of them stops the timer (and counts the teaching time). Returns
+        whether this call stopped it.
+        """
+        from .. import stats
+        
+        if self.end_time is not None:
+            return False
+        
+        end_time = timezone.now()
+        duration_seconds = int((end_time - self.start_time).total_seconds())
+        stopped = SessionTimer.objects.filter(
+            pk=self.pk, end_time__isnull=True
+        ).update(end_time=end_time, duration_seconds=duration_seconds)
+        
+        if not stopped:
+            self.refresh_from_db(fields=['end_time', 'duration_seconds'])
+            return False
+        
+        self.end_time = end_time
+        self.duration_seconds = duration_seconds
+        # update() skips post_save, so count the teaching time explicitly
+        stats.record_teaching(self)
+        Session.touch(self.session_id)
+        return True
     
     @classmethod
     def start_timer(cls, session, teacher):
         """
         Start a new timer for a teacher in a session.
         Stops any running timer first.
+        
+        Runs in one transaction with a fixed number of queries: lock and
+        stop the running timer (found via the (session, end_time) index),
+        then insert the new one. The one_running_timer_per_session
+        constraint rules out a second running timer; if a concurrent start
+        wins the race, we retry once and stop its timer instead.
         """
-        # Stop any running timer in this session
-        running_timer = session.get_active_timer()
-        if running_timer:
-            running_timer.stop()
-        
-        # Create new timer
-        return cls.objects.create(
-            session=session,
-            teacher=teacher,
-            start_time=timezone.now()
-        )
+        for attempt in range(2):
+            try:
+                with transaction.atomic():
+                    running = cls.objects.select_for_update().filter(
+                        session=session, end_time__isnull=True
+                    ).first()
+                    if running is not None:
+                        running.stop()
+                    else:
+                        Session.touch(session.pk)
+                    return cls.objects.create(
+                        session=session,
+                        teacher=teacher,
+                        start_time=timezone.now()
+                    )
+            except IntegrityError:
+                if attempt:
+                    raise
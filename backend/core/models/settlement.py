@@ -0,0 +1,162 @@
+from django.db import models, transaction
+from django.utils import timezone
+from datetime import timedelta
+
+
+class SettlementJob(models.Model):
+    """
+    DB-backed queue entry for settling an ended session's credits.
+    
+    Ending a session enqueues one job per session; ``run_settlement_worker``
+    claims due jobs in batches and settles them, retrying failures with
+    backoff. Settlement and marking the job done commit together under a
+    lock on the job row, and ``settle_session`` itself refuses to settle a
+    session twice.
+    """
+    
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    
+    session = models.OneToOneField(
+        'Session',
+        on_delete=models.CASCADE,
+        related_name='settlement_job'
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='pending'
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default='')
+    result = models.JSONField(
+        null=True,
+        blank=True,
+        help_text='Final credit summary once settled'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'settlement job'
+        verbose_name_plural = 'settlement jobs'
+        ordering = ['run_after']
+        indexes = [
+            models.Index(fields=['status', 'run_after']),
+        ]
+    
+    def __str__(self):
+        return f"Settlement for session {self.session_id} ({self.status})"
+    
+    @classmethod
+    def enqueue(cls, session):
+        """Queue a settlement for ``session`` (no-op if already queued)."""
+        job, _ = cls.objects.get_or_create(session=session)
+        return job
+    
+    @classmethod
+    def claim_batch(cls, limit=50, stale_after=timedelta(minutes=5)):
+        """
+        Claim up to ``limit`` due jobs for this worker.
+        
+        Each job is claimed with a conditional UPDATE, so concurrent workers
+        never run the same job. Jobs left ``running`` by a crashed worker are
+        reclaimed after ``stale_after``.
+        """
+        now = timezone.now()
+        due = cls.objects.filter(
+            models.Q(status='pending', run_after__lte=now) |
+            models.Q(status='running', locked_at__lt=now - stale_after)
+        ).order_by('run_after').values_list('pk', 'status', 'locked_at')[:limit]
+        
+        claimed = []
+        for pk, seen_status, seen_locked_at in due:
+            won = cls.objects.filter(pk=pk, status=seen_status, locked_at=seen_locked_at).update(
+                status='running',
+                locked_at=now,
+                attempts=models.F('attempts') + 1,
+                updated_at=now
+            )
+            if won:
+                claimed.append(pk)
+        return list(
+            cls.objects.filter(pk__in=claimed).select_related('session__user1', 'session__user2')
+        )
+    
+    def claim(self):
+        """
+        Claim this job if it is pending and due.
+        
+        Returns False if a worker holds it or it has already finished.
+        """
+        now = timezone.now()
+        won = type(self).objects.filter(
+            pk=self.pk, status='pending', run_after__lte=now
+        ).update(
+            status='running',
+            locked_at=now,
+            attempts=models.F('attempts') + 1,
+            updated_at=now
+        )
+        self.refresh_from_db(fields=['status', 'locked_at', 'attempts', 'run_after'])
+        return bool(won)
+    
+    def run_now(self, max_attempts=5):
+        """
+        Claim and settle inline if the job is due (SETTLEMENT_QUEUE_EAGER).
+        
+        A failed run goes back to ``pending`` with backoff like a worker's;
+        in eager mode the ``settlement`` endpoint retries it once it is due.
+        """
+        if self.claim():
+            self.run(max_attempts=max_attempts)
+        return self.status == 'done'
+    
+    def run(self, max_attempts=5):
+        """
+        Settle the session; on error schedule a retry or give up.
+        
+        The job must have been claimed by this instance. The row is locked
+        and ownership re-checked before settling, so a job reclaimed as
+        stale while this worker was slow is left to the new owner instead
+        of being settled twice.
+        """
+        from ..settlement import settle_session
+        
+        claim = {'pk': self.pk, 'status': 'running', 'locked_at': self.locked_at}
+        try:
+            with transaction.atomic():
+                owned = type(self).objects.select_for_update().filter(**claim).exists()
+                if owned:
+                    summary = settle_session(self.session)
+                    self.status = 'done'
+                    self.result = summary
+                    self.locked_at = None
+                    self.last_error = ''
+                    self.save(update_fields=['status', 'result', 'locked_at', 'last_error', 'updated_at'])
+        except Exception as e:
+            self.last_error = f'{type(e).__name__}: {e}'
+            self.locked_at = None
+            if self.attempts >= max_attempts:
+                self.status = 'failed'
+            else:
+                self.status = 'pending'
+                # Exponential backoff: 2s, 4s, 8s, ...
+                self.run_after = timezone.now() + timedelta(seconds=2 ** self.attempts)
+            # Only record the failure if the job is still ours
+            owned = type(self).objects.filter(**claim).update(
+                status=self.status,
+                run_after=self.run_after,
+                locked_at=None,
+                last_error=self.last_error,
+                updated_at=timezone.now()
+            )
+        if not owned:
+            self.refresh_from_db()
+        return self.status == 'done'
@@ -0,0 +1,92 @@
+from django.db import models
+from django.conf import settings
+from decimal import Decimal
+
+
+class UserDailyStats(models.Model):
+    """
+    Per-user, per-day activity rollup.
+    Maintained incrementally by core.stats so profile charts are a single
+    range read instead of one aggregate per day.
+    """
+    
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='daily_stats'
+    )
+    date = models.DateField()
+    credits_earned = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        help_text='Credits earned on this day (teaching, signup, bounty)'
+    )
+    seconds_taught = models.PositiveIntegerField(
+        default=0,
+        help_text='Seconds taught on this day (by timer end time)'
+    )
+    
+    class Meta:
+        verbose_name = 'user daily stats'
+        verbose_name_plural = 'user daily stats'
+        ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'date'], name='unique_user_daily_stats'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user_id} on {self.date}: {self.credits_earned} credits, {self.seconds_taught}s"
+
+
+class CreditMonthlyRollup(models.Model):
+    """
+    Per-user, per-month ledger totals by transaction type and counterparty.
+    Maintained incrementally by core.stats from the ledger write path;
+    monthly statements are built from these rows instead of aggregating
+    CreditTransaction on every request.
+    
+    Rows with no counterparty (signup, bank support, ...) are not covered
+    by the unique constraint and may be split across more than one row
+    under concurrent writes, so readers should always sum.
+    """
+    
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='monthly_rollups'
+    )
+    month = models.DateField(help_text='First day of the month')
+    transaction_type = models.CharField(max_length=20)
+    counterparty = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        help_text='Other participant of the session, if any'
+    )
+    total = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        help_text='Net amount (positive earned, negative spent)'
+    )
+    count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        verbose_name = 'credit monthly rollup'
+        verbose_name_plural = 'credit monthly rollups'
+        ordering = ['-month']
+        indexes = [
+            models.Index(fields=['user', 'month']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'month', 'transaction_type', 'counterparty'],
+                name='unique_credit_monthly_rollup'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.user_id} {self.month:%Y-%m} {self.transaction_type}: {self.total}"
@@ -88,6 +88,27 @@ class User(AbstractBaseUser, PermissionsMixin):
         help_text='Current consecutive login streak in days'
     )
     
+    # Denormalized profile stats (maintained by core.stats, rebuilt with
+    # `manage.py rebuild_user_stats`)
+    review_count = models.PositiveIntegerField(
+        default=0,
+        help_text='Number of reviews received'
+    )
+    rating_total = models.PositiveIntegerField(
+        default=0,
+        help_text='Sum of all ratings received'
+    )
+    credits_earned_total = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        help_text='All-time credits earned (teaching, signup, bounty)'
+    )
+    seconds_taught_total = models.PositiveBigIntegerField(
+        default=0,
+        help_text='All-time seconds taught across stopped timers'
+    )
+    
     # Standard Django user fields
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
@@ -114,76 +135,83 @@ class User(AbstractBaseUser, PermissionsMixin):
     
     @property
     def average_rating(self):
-        """Calculate average rating from received reviews."""
-        from .review import Review
-        reviews = Review.objects.filter(reviewee=self)
-        if not reviews.exists():
+        """Average rating from received reviews."""
+        if not self.review_count:
             return None
-        return reviews.aggregate(models.Avg('rating'))['rating__avg']
+        return self.rating_total / self.review_count
     
     @property
     def total_reviews(self):
         """Count of received reviews."""
-        from .review import Review
-        return Review.objects.filter(reviewee=self).count()
+        return self.review_count
 
     @property
     def total_credits_earned(self):
-        """Calculate total credits earned (all time)."""
-        from .credit import CreditTransaction
-        earned_types = ['TEACHING', 'SIGNUP', 'BOUNTY']
-        earned_transactions = CreditTransaction.objects.filter(
-            user=self,
-            transaction_type__in=earned_types,
-            amount__gt=0
-        )
-        total = earned_transactions.aggregate(models.Sum('amount'))['amount__sum']
-        return total if total else Decimal('0.00')
+        """Total credits earned (all time)."""
+        return self.credits_earned_total
 
     @property
     def hours_taught(self):
-        """Calculate total hours taught (all time)."""
-        from .session import SessionTimer
-        timers = SessionTimer.objects.filter(teacher=self, end_time__isnull=False)
-        total_seconds = timers.aggregate(models.Sum('duration_seconds'))['duration_seconds__sum']
-        if not total_seconds:
+        """Total hours taught (all time)."""
+        if not self.seconds_taught_total:
             return 0.0
-        return round(total_seconds / 3600.0, 2)
+        return round(self.seconds_taught_total / 3600.0, 2)
 
-    def get_weekly_activity(self):
-        """Array of the past 7 days showing hours taught and credits earned."""
-        from .credit import CreditTransaction
-        from .session import SessionTimer
+    def get_activity(self, days=7):
+        """
+        Array of the past ``days`` days showing hours taught and credits earned.
+        Reads the UserDailyStats rollup in a single range query.
+        """
+        from .stats import UserDailyStats
         from django.utils import timezone
         from datetime import timedelta
 
-        today = timezone.now().date()
-        activity = []
-
-        earned_types = ['TEACHING', 'SIGNUP', 'BOUNTY']
+        today = timezone.localdate()
+        start = today - timedelta(days=days - 1)
 
-        for i in range(6, -1, -1):
-            target_date = today - timedelta(days=i)
-            
-            # Credits earned on this day
-            credits_earned = CreditTransaction.objects.filter(
+        # Use prefetched rollups (see activity_prefetch) to avoid N+1 queries
+        if hasattr(self, '_prefetched_objects_cache') and 'daily_stats' in self._prefetched_objects_cache:
+            rows = [r for r in self.daily_stats.all() if start <= r.date <= today]
+        else:
+            rows = UserDailyStats.objects.filter(
                 user=self,
-                transaction_type__in=earned_types,
-                amount__gt=0,
-                created_at__date=target_date
-            ).aggregate(models.Sum('amount'))['amount__sum'] or Decimal('0.00')
+                date__range=(start, today)
+            ).only('date', 'credits_earned', 'seconds_taught')
+        rollups = {row.date: row for row in rows}
 
-            # Seconds taught on this day
-            seconds_taught = SessionTimer.objects.filter(
-                teacher=self,
-                end_time__isnull=False,
-                end_time__date=target_date
-            ).aggregate(models.Sum('duration_seconds'))['duration_seconds__sum'] or 0
+        activity = []
+        for i in range(days):
+            target_date = start + timedelta(days=i)
+            row = rollups.get(target_date)
+            seconds_taught = row.seconds_taught if row else 0
+            credits_earned = row.credits_earned if row else Decimal('0.00')
 
             activity.append({
                 'date': target_date.strftime('%Y-%m-%d'),
                 'hours_taught': round(seconds_taught / 3600.0, 2),
                 'credits_earned': float(credits_earned),
             })
-            
+
         return activity
+
+    @staticmethod
+    def activity_prefetch(days=7):
+        """
+        Prefetch of recent UserDailyStats rows for get_activity(), so a page
+        of users loads its activity in a single query.
+        """
+        from .stats import UserDailyStats
+        from django.utils import timezone
+        from datetime import timedelta
+
+        start = timezone.localdate() - timedelta(days=days - 1)
+        return models.Prefetch(
+            'daily_stats',
+            queryset=UserDailyStats.objects.filter(date__gte=start).only(
+                'user', 'date', 'credits_earned', 'seconds_taught'
+            )
+        )
+
+    def get_weekly_activity(self):
+        """Array of the past 7 days showing hours taught and credits earned."""
+        return self.get_activity(days=7)
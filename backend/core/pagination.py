@@ -0,0 +1,100 @@
+import base64
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset ("seek") pagination on ``(<ordering_field>, id)``, newest first.
+    
+    Each page is a range scan starting just after the last row of the
+    previous one, so deep pages cost the same as the first and rows written
+    while paging never shift or duplicate results. The opaque ``cursor``
+    query param is taken from the previous response's ``next`` link.
+    
+    Query params:
+    - cursor: Position returned in ``next``
+    - limit: Page size (default 50, max 200)
+    """
+    
+    ordering_field = 'created_at'
+    page_size = 50
+    max_page_size = 200
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'limit'
+    invalid_cursor_message = 'Invalid cursor.'
+    
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+    
+    def encode_cursor(self, obj):
+        raw = f'{getattr(obj, self.ordering_field).isoformat()}|{obj.pk}'
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+    
+    def decode_cursor(self, cursor):
+        try:
+            raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+            position, pk = raw.rsplit('|', 1)
+            position = parse_datetime(position)
+            pk = int(pk)
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if position is None:
+            raise NotFound(self.invalid_cursor_message)
+        return position, pk
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        
+        field = self.ordering_field
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            position, pk = self.decode_cursor(cursor)
+            queryset = queryset.filter(
+                Q(**{f'{field}__lt': position}) | Q(**{field: position, 'pk__lt': pk})
+            )
+        
+        # One extra row tells us whether there is a next page
+        rows = list(queryset.order_by(f'-{field}', '-pk')[:page_size + 1])
+        page = rows[:page_size]
+        self.next_cursor = self.encode_cursor(page[-1]) if len(rows) > page_size else None
+        return page
+    
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+    
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+    
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class SessionKeysetPagination(KeysetPagination):
+    """Keyset pagination for session lists on ``(start_time, id)``."""
+    
+    ordering_field = 'start_time'
+    page_size = 20
+    max_page_size = 100
@@ -0,0 +1,60 @@
+import io
+
+import cbor2
+import msgpack
+import ujson
+from django.conf import settings
+from rest_framework import parsers
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class JSONParser(parsers.JSONParser):
+    """
+    DRF's JSONParser, decoding with ujson.
+
+    ujson accepts NaN and Infinity, which strict JSON forbids, so bodies
+    that may contain them (and bodies that aren't UTF-8) go through the
+    stock parser.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        body = stream.read()
+
+        if encoding.lower() not in ('utf-8', 'utf8') or (
+            self.strict and (b'NaN' in body or b'Infinity' in body)
+        ):
+            return super().parse(io.BytesIO(body), media_type, parser_context)
+        try:
+            return ujson.loads(body)
+        except ValueError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
+
+
+class MessagePackParser(BaseParser):
+    """Parses MessagePack request bodies (``Content-Type: application/msgpack``)."""
+
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False, timestamp=3)
+        except (ValueError, msgpack.UnpackException) as exc:
+            raise ParseError(f'MessagePack parse error - {str(exc) or "malformed data"}')
+
+
+class CBORParser(BaseParser):
+    """Parses CBOR request bodies (``Content-Type: application/cbor``)."""
+
+    media_type = 'application/cbor'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return cbor2.loads(stream.read())
+        except (ValueError, cbor2.CBORDecodeError) as exc:
+            raise ParseError(f'CBOR parse error - {str(exc) or "malformed data"}')
+
+
+BINARY_PARSER_CLASSES = (MessagePackParser, CBORParser)
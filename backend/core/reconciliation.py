@@ -0,0 +1,168 @@
+"""
+Ledger reconciliation.
+
+Checks, per user, that ``User.credits`` equals the sum of their
+``CreditTransaction`` amounts and that every row's ``balance_after`` equals
+the previous row's plus its amount. Users and transactions for a user-id
+range are streamed side by side with ``iterator()`` (ordered by user, then
+time), so memory stays bounded by the chunk size regardless of ledger
+size. Ranges are independent and can be checked in parallel (see the
+``reconcile_ledger`` command).
+
+Writes that land while a range is being streamed can look like
+discrepancies, so each suspect user is re-checked with their row locked
+before being reported.
+"""
+
+import json
+from decimal import Decimal
+from itertools import groupby
+from math import ceil
+from operator import itemgetter
+
+from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, transaction
+from django.db.models import Max, Min
+
+LEDGER_FIELDS = ('user_id', 'id', 'amount', 'balance_after')
+
+
+def user_id_ranges(parts):
+    """Split the user-id space into about ``parts`` half-open ranges."""
+    User = get_user_model()
+    bounds = User.objects.aggregate(lo=Min('pk'), hi=Max('pk'))
+    if bounds['lo'] is None:
+        return []
+    lo, hi = bounds['lo'], bounds['hi'] + 1
+    step = max(1, ceil((hi - lo) / max(1, parts)))
+    return [(start, min(start + step, hi)) for start in range(lo, hi, step)]
+
+
+def check_ledger(user_id, credits, rows):
+    """
+    Return the discrepancies for one user.
+
+    ``rows`` are ``LEDGER_FIELDS`` tuples ordered oldest first.
+    """
+    issues = []
+    total = Decimal('0.00')
+    previous = Decimal('0.00')
+    count = 0
+    chain_breaks = 0
+    first_break = None
+
+    for _, transaction_id, amount, balance_after in rows:
+        count += 1
+        total += amount
+        if balance_after != previous + amount:
+            chain_breaks += 1
+            if first_break is None:
+                first_break = {
+                    'transaction_id': transaction_id,
+                    'expected': previous + amount,
+                    'recorded': balance_after,
+                }
+        previous = balance_after
+
+    if chain_breaks:
+        issues.append({
+            'user_id': user_id,
+            'kind': 'chain',
+            'breaks': chain_breaks,
+            **first_break,
+        })
+    if total != credits:
+        issues.append({
+            'user_id': user_id,
+            'kind': 'balance',
+            'credits': credits,
+            'ledger_sum': total,
+            'difference': credits - total,
+            'transactions': count,
+        })
+    return issues
+
+
+def _stream(start_id, end_id, chunk_size):
+    """Yield (user_id, credits, ledger rows) for users in [start_id, end_id)."""
+    from .models import CreditTransaction
+
+    User = get_user_model()
+    users = User.objects.filter(
+        pk__gte=start_id, pk__lt=end_id
+    ).order_by('pk').values_list('pk', 'credits').iterator(chunk_size=chunk_size)
+    rows = CreditTransaction.objects.filter(
+        user_id__gte=start_id, user_id__lt=end_id
+    ).order_by('user_id', 'created_at', 'id').values_list(
+        *LEDGER_FIELDS
+    ).iterator(chunk_size=chunk_size)
+
+    groups = groupby(rows, key=itemgetter(0))
+    group = next(groups, None)
+    for user_id, credits in users:
+        while group is not None and group[0] < user_id:
+            group = next(groups, None)
+        if group is not None and group[0] == user_id:
+            yield user_id, credits, group[1]
+            group = next(groups, None)
+        else:
+            yield user_id, credits, ()
+
+
+def _counting(rows, result):
+    for row in rows:
+        result['transactions'] += 1
+        yield row
+
+
+def recheck_user(user_id, chunk_size=2000):
+    """Re-check one user with their row locked against concurrent writes."""
+    from .models import CreditTransaction
+
+    User = get_user_model()
+    with transaction.atomic():
+        credits = User.objects.select_for_update().filter(
+            pk=user_id
+        ).values_list('credits', flat=True).first()
+        if credits is None:
+            return []
+        rows = CreditTransaction.objects.filter(
+            user_id=user_id
+        ).order_by('created_at', 'id').values_list(
+            *LEDGER_FIELDS
+        ).iterator(chunk_size=chunk_size)
+        return check_ledger(user_id, credits, rows)
+
+
+def reconcile_range(start_id, end_id, chunk_size=5000, report_path=None, sample_size=10):
+    """
+    Reconcile users with ``start_id <= pk < end_id``.
+
+    Confirmed discrepancies are appended to ``report_path`` as JSON lines
+    (if given). Returns counts plus up to ``sample_size`` discrepancies.
+    """
+    result = {'users': 0, 'transactions': 0, 'discrepancies': 0, 'samples': []}
+    suspects = []
+    try:
+        for user_id, credits, rows in _stream(start_id, end_id, chunk_size):
+            result['users'] += 1
+            if check_ledger(user_id, credits, _counting(rows, result)):
+                suspects.append(user_id)
+
+        report = open(report_path, 'w') if report_path else None
+        try:
+            for user_id in suspects:
+                for issue in recheck_user(user_id):
+                    result['discrepancies'] += 1
+                    if len(result['samples']) < sample_size:
+                        result['samples'].append(issue)
+                    if report:
+                        report.write(json.dumps(issue, cls=DjangoJSONEncoder) + '\n')
+        finally:
+            if report:
+                report.close()
+    finally:
+        # Each worker (thread or forked process) owns its connection
+        connections.close_all()
+    return result
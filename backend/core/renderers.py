@@ -0,0 +1,128 @@
+import json
+from datetime import timezone
+
+import cbor2
+import msgpack
+import ujson
+from rest_framework import renderers
+from rest_framework.utils.encoders import JSONEncoder
+
+from .fields import RawJSON
+
+_encoder = JSONEncoder()
+
+# Shared UTF-8 prefix of U+2028 and U+2029
+_JS_LINE_TERMINATOR = b'\xe2\x80'
+
+
+def _to_primitive(obj):
+    """
+    Fallback for the ujson and binary encoders: pre-encoded RawJSON payloads
+    are decoded, everything else (datetimes, Decimals, lazy strings...) becomes what DRF's
+    JSONEncoder would have produced.
+    """
+    if isinstance(obj, RawJSON):
+        return obj.parse()
+    return _encoder.default(obj)
+
+
+class JSONRenderer(renderers.JSONRenderer):
+    """
+    DRF's JSONRenderer, encoding with ujson and passing ``RawJSON`` through.
+
+    Values ujson can't encode itself (datetimes, UUIDs, lazy strings...)
+    go through the fallback of DRF's JSONEncoder, and out-of-range floats
+    raise the same ValueError under STRICT_JSON, so responses decode to
+    the same data as with the stock renderer. The bytes can differ in float
+    exponents (ujson writes ``1e-7`` where the stdlib writes ``1e-07``).
+    Indented output (the browsable API, ``; indent=``) and non-compact
+    settings are left to the stock encoder.
+
+    Top-level ``RawJSON`` values in a dict response are left out of the
+    normal encoding pass. Their bytes are then spliced into the rendered
+    object as they are, so multi-megabyte whiteboard/code payloads are
+    never decoded or re-encoded.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not isinstance(data, dict):
+            return self.encode(data, accepted_media_type, renderer_context)
+
+        raw = {key: value for key, value in data.items() if isinstance(value, RawJSON)}
+        if not raw:
+            return self.encode(data, accepted_media_type, renderer_context)
+
+        rest = {key: value for key, value in data.items() if key not in raw}
+        body = self.encode(rest, accepted_media_type, renderer_context).rstrip()
+        # body is "{...}": reopen it and append the raw members
+        parts = [body[:-1]]
+        separator = b',' if rest else b''
+        for key, value in raw.items():
+            parts.append(separator + json.dumps(key).encode() + b':' + value.encoded)
+            separator = b','
+        parts.append(b'}')
+        return b''.join(parts)
+
+    def encode(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if not self.compact or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = ujson.dumps(
+                data,
+                ensure_ascii=self.ensure_ascii,
+                escape_forward_slashes=False,
+                allow_nan=not self.strict,
+                default=_to_primitive,
+            ).encode()
+        except OverflowError as exc:
+            # NaN/Infinity with allow_nan off. Raised as the stdlib encoder
+            # would rather than re-encoding, which would see generators in
+            # ``data`` already consumed.
+            raise ValueError('Out of range float values are not JSON compliant') from exc
+        # Like DRF, escape the line terminators that aren't valid in JS strings
+        if _JS_LINE_TERMINATOR in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    """Renders responses as MessagePack (``Accept: application/msgpack``)."""
+
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_to_primitive)
+
+
+class CBORRenderer(renderers.BaseRenderer):
+    """
+    Renders responses as CBOR (``Accept: application/cbor``).
+
+    Datetimes, Decimals and UUIDs use CBOR's standard tags.
+    """
+
+    media_type = 'application/cbor'
+    format = 'cbor'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return cbor2.dumps(
+            data,
+            default=lambda encoder, value: encoder.encode(_to_primitive(value)),
+            timezone=timezone.utc,
+        )
+
+
+# Opt-in binary encodings for the room polling endpoints
+BINARY_RENDERER_CLASSES = (MessagePackRenderer, CBORRenderer)
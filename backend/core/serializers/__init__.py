@@ -1,4 +1,4 @@
-from .user import UserSerializer, UserCreateSerializer, UserUpdateSerializer, UserPublicSerializer, UserMinimalSerializer
+from .user import UserSerializer, UserCreateSerializer, UserUpdateSerializer, UserPublicSerializer, UserMinimalSerializer, USER_STATS_FIELDS
 from .learning_request import LearningRequestPostSerializer, LearningRequestPostCreateSerializer
 from .session import SessionSerializer, SessionListSerializer, SessionCreateSerializer, SessionTimerSerializer
 from .review import ReviewSerializer, ReviewCreateSerializer
@@ -11,6 +11,7 @@ __all__ = [
     'UserUpdateSerializer',
     'UserPublicSerializer',
     'UserMinimalSerializer',
+    'USER_STATS_FIELDS',
     'LearningRequestPostSerializer',
     'LearningRequestPostCreateSerializer',
     'SessionSerializer',
@@ -6,7 +6,7 @@ class CreditTransactionSerializer(serializers.ModelSerializer):
     """Serializer for credit transaction history."""
     
     user_name = serializers.CharField(source='user.name', read_only=True)
-    session_id = serializers.IntegerField(source='session.id', read_only=True, allow_null=True)
+    session_id = serializers.IntegerField(read_only=True, allow_null=True)
     
     class Meta:
         model = CreditTransaction
@@ -0,0 +1,55 @@
+def _split_param(value):
+    """Split a comma-separated query param into a list of names."""
+    if not value:
+        return []
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+class DynamicFieldsMixin:
+    """
+    Sparse fieldsets and lazily-built expensive fields for ModelSerializers.
+
+    Fields listed in ``Meta.expandable_fields`` are left out of the payload
+    unless requested, so their (potentially costly) values are never
+    computed. Callers control the shape with:
+
+    - ``fields=[...]`` / ``?fields=a,b`` - render only these fields
+    - ``expand=[...]`` / ``?expand=a,b`` - add expandable fields to the default
+
+    Query params (read from ``context['request']``) take precedence over the
+    view's defaults for ``fields`` and are added on top of them for ``expand``.
+    """
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        fields, expand = self._requested(self.context.get('request'), fields, expand)
+
+        if fields:
+            allowed = set(fields)
+        else:
+            expandable = set(getattr(self.Meta, 'expandable_fields', ()))
+            allowed = set(self.fields) - (expandable - expand)
+
+        for name in list(self.fields):
+            if name not in allowed:
+                self.fields.pop(name)
+
+    @staticmethod
+    def _requested(request, fields, expand):
+        """``fields`` and ``expand`` with the request's query params applied."""
+        query_params = getattr(request, 'query_params', None) or {}
+        fields = _split_param(query_params.get('fields')) or fields
+        expand = set(expand or ()) | set(_split_param(query_params.get('expand')))
+        return fields, expand
+
+    @classmethod
+    def includes_field(cls, name, request=None, fields=None, expand=None):
+        """
+        Whether ``name`` will be rendered for these arguments, so views can
+        shape their querysets (e.g. prefetch) before building the serializer.
+        """
+        fields, expand = cls._requested(request, fields, expand)
+        if fields:
+            return name in fields
+        return name not in getattr(cls.Meta, 'expandable_fields', ()) or name in expand
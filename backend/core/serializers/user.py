@@ -2,11 +2,25 @@ from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
 
+from .mixins import DynamicFieldsMixin
+
 User = get_user_model()
 
+# Computed profile stats: only built when requested via expand/fields
+USER_STATS_FIELDS = [
+    'average_rating',
+    'total_reviews',
+    'total_credits_earned',
+    'hours_taught',
+    'weekly_activity',
+]
+
 
-class UserSerializer(serializers.ModelSerializer):
-    """Serializer for user details."""
+class UserSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """
+    Serializer for user details.
+    Profile stats are expandable; see DynamicFieldsMixin.
+    """
     
     average_rating = serializers.FloatField(read_only=True, allow_null=True)
     total_reviews = serializers.IntegerField(read_only=True)
@@ -41,6 +55,7 @@ class UserSerializer(serializers.ModelSerializer):
             'last_login_date', 'total_credits_earned', 'hours_taught', 
             'weekly_activity'
         ]
+        expandable_fields = USER_STATS_FIELDS
 
 
 class UserCreateSerializer(serializers.ModelSerializer):
@@ -103,8 +118,11 @@ class UserUpdateSerializer(serializers.ModelSerializer):
         fields = ['name', 'availability']
 
 
-class UserPublicSerializer(serializers.ModelSerializer):
-    """Public serializer for user info (no sensitive data)."""
+class UserPublicSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """
+    Public serializer for user info (no sensitive data).
+    Profile stats are expandable; see DynamicFieldsMixin.
+    """
     
     average_rating = serializers.FloatField(read_only=True, allow_null=True)
     total_reviews = serializers.IntegerField(read_only=True)
@@ -129,6 +147,7 @@ class UserPublicSerializer(serializers.ModelSerializer):
             'hours_taught',
             'weekly_activity',
         ]
+        expandable_fields = USER_STATS_FIELDS
 
 
 class UserMinimalSerializer(serializers.ModelSerializer):
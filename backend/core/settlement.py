@@ -0,0 +1,211 @@
+"""
+Session credit settlement.
+
+Credits are transferred based on teaching time (5 minutes = 1 credit) and
+the bank takes a 10% cut of every transfer. A settlement is posted as a
+single balanced JournalEntry: each transfer is a LEARNING and a TEACHING
+CreditTransaction leg, the bank's cut is a BankLedgerEntry.
+"""
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from .models import CreditTransaction, JournalEntry
+from .utils import calculate_credits
+
+BANK_CUT_RATE = Decimal('0.10')
+
+
+def _cut(amount):
+    """The bank's cut of a transfer of ``amount``."""
+    return (amount * BANK_CUT_RATE).quantize(Decimal('0.01'))
+
+
+def _affordable_charges(owed, balances):
+    """
+    Cap each learner's charge so nobody's net outflow exceeds their balance.
+
+    ``owed`` maps each participant's pk to the gross credits they owe the
+    other for being taught. Capping one learner lowers what the other earns,
+    which may in turn cap the other, so this repeats until both fit.
+    Charges only ever go down, so the result does not depend on which
+    participant is checked first.
+    """
+    charged = dict(owed)
+    first, second = charged
+    pairs = ((first, second), (second, first))
+    while True:
+        capped = False
+        for user_id, other_id in pairs:
+            income = charged[other_id] - _cut(charged[other_id])
+            limit = max(balances[user_id] + income, Decimal('0.00'))
+            if charged[user_id] > limit:
+                charged[user_id] = limit
+                capped = True
+        if not capped:
+            return charged
+
+
+def _empty_summary(session, user1_teaching_seconds, user2_teaching_seconds):
+    return {
+        'user1': {
+            'id': session.user1.id,
+            'name': session.user1.name,
+            'teaching_seconds': user1_teaching_seconds,
+            'credits_earned': 0,
+            'credits_spent': 0,
+        },
+        'user2': {
+            'id': session.user2.id,
+            'name': session.user2.name,
+            'teaching_seconds': user2_teaching_seconds,
+            'credits_earned': 0,
+            'credits_spent': 0,
+        },
+        'bank_cut': 0
+    }
+
+
+def _posted_summary(session, entry, user1_teaching_seconds, user2_teaching_seconds):
+    """Credit summary of a settlement that was already posted as ``entry``."""
+    credit_summary = _empty_summary(session, user1_teaching_seconds, user2_teaching_seconds)
+    keys = {session.user1_id: 'user1', session.user2_id: 'user2'}
+    for leg in entry.user_legs.all():
+        key = keys.get(leg.user_id)
+        if key is None:
+            continue
+        if leg.amount > 0:
+            credit_summary[key]['credits_earned'] += float(leg.amount)
+        else:
+            credit_summary[key]['credits_spent'] -= float(leg.amount)
+    credit_summary['bank_cut'] = float(
+        sum((leg.amount for leg in entry.bank_legs.all()), Decimal('0.00'))
+    )
+    return credit_summary
+
+
+def estimate_settlement(session):
+    """
+    Provisional credit summary from teaching time alone.
+
+    Does not read balances, so the final settlement may be lower if a
+    learner cannot cover the full amount.
+    """
+    user1_teaching_seconds = session.get_teaching_time(session.user1)
+    user2_teaching_seconds = session.get_teaching_time(session.user2)
+    credit_summary = _empty_summary(session, user1_teaching_seconds, user2_teaching_seconds)
+
+    for seconds, teacher_key, learner_key in (
+        (user1_teaching_seconds, 'user1', 'user2'),
+        (user2_teaching_seconds, 'user2', 'user1'),
+    ):
+        credits_needed = calculate_credits(seconds)
+        if credits_needed <= 0:
+            continue
+        bank_cut = _cut(credits_needed)
+        credit_summary[learner_key]['credits_spent'] = float(credits_needed)
+        credit_summary[teacher_key]['credits_earned'] = float(credits_needed - bank_cut)
+        credit_summary['bank_cut'] += float(bank_cut)
+
+    credit_summary['provisional'] = True
+    return credit_summary
+
+
+def settle_session(session):
+    """
+    Settle an ended session and return the credit summary.
+
+    Idempotent per session: if a settlement has already been posted, its
+    summary is returned and nothing is written.
+
+    Both participants' balances are read once under a row lock and both
+    directions are computed in memory; a learner pays less than the full
+    amount only if their net change would overdraw them. Legs stay gross (a user who both
+    taught and learned gets a TEACHING and a LEARNING leg) so stats and
+    statements see what was earned and spent, but each user's balance is
+    updated once with the net change and the bank gets one leg for the
+    combined cut.
+    """
+    User = get_user_model()
+    user1, user2 = session.user1, session.user2
+
+    user1_teaching_seconds = session.get_teaching_time(user1)
+    user2_teaching_seconds = session.get_teaching_time(user2)
+    credit_summary = _empty_summary(session, user1_teaching_seconds, user2_teaching_seconds)
+
+    if user1_teaching_seconds <= 0 and user2_teaching_seconds <= 0:
+        return credit_summary
+
+    with transaction.atomic():
+        # Lock both users (in pk order to avoid deadlocks) and read balances once
+        balances = dict(
+            User.objects.select_for_update()
+            .filter(pk__in=[user1.pk, user2.pk])
+            .order_by('pk')
+            .values_list('pk', 'credits')
+        )
+
+        # Settling is once per session: a second run (a reclaimed job, or
+        # eager mode racing a worker) reports the existing entry instead
+        posted = JournalEntry.objects.filter(session=session).first()
+        if posted is not None:
+            return _posted_summary(
+                session, posted, user1_teaching_seconds, user2_teaching_seconds
+            )
+
+        # Gross flows per direction, computed in memory. A learner's charge
+        # is capped only where their net outflow (charge minus what they
+        # earn teaching) exceeds their balance
+        owed = {
+            user2.pk: calculate_credits(user1_teaching_seconds),
+            user1.pk: calculate_credits(user2_teaching_seconds),
+        }
+        charged = _affordable_charges(owed, balances)
+        spent, earned = {}, {}
+        bank_total = Decimal('0.00')
+        for user, other, key, other_key in (
+            (user1, user2, 'user1', 'user2'),
+            (user2, user1, 'user2', 'user1'),
+        ):
+            spent[user.pk] = charged[user.pk]
+            earned[other.pk] = charged[user.pk] - _cut(charged[user.pk])
+            bank_total += _cut(charged[user.pk])
+            credit_summary[key]['credits_spent'] = float(spent[user.pk])
+            credit_summary[other_key]['credits_earned'] = float(earned[other.pk])
+        credit_summary['bank_cut'] = float(bank_total)
+
+        # Gross legs per direction keep earnings and spending visible to the
+        # stats and monthly rollups (and their rebuilds, which read the legs);
+        # JournalEntry.post nets each user's legs into a single balance
+        # update. The TEACHING leg goes first so the running balance_after
+        # never dips below a balance the user actually had
+        legs = []
+        for user, other in ((user1, user2), (user2, user1)):
+            balance = balances[user.pk]
+            for amount, transaction_type, description in (
+                (earned[user.pk], 'TEACHING', f'Teaching {other.name}'),
+                (-spent[user.pk], 'LEARNING', f'Learning from {other.name}'),
+            ):
+                if not amount:
+                    continue
+                balance += amount
+                legs.append(CreditTransaction(
+                    user=user,
+                    session=session,
+                    amount=amount,
+                    transaction_type=transaction_type,
+                    balance_after=balance,
+                    description=description
+                ))
+
+        if legs:
+            JournalEntry.post(
+                legs,
+                bank_amount=bank_total,
+                session=session,
+                description=f'Settlement for session {session.id}'
+            )
+
+    return credit_summary
@@ -0,0 +1,83 @@
+"""
+Signal handlers that keep denormalized stats, the autocomplete index and
+session tombstones in step with the write path.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import autocomplete, stats
+from .models import (
+    CreditTransaction, LearningRequestPost, Review, Session, SessionTimer,
+    SessionTombstone, User,
+)
+
+# Fields whose changes affect autocomplete suggestions
+USER_AUTOCOMPLETE_FIELDS = {'name', 'is_active', 'is_superuser'}
+POST_AUTOCOMPLETE_FIELDS = {'topic_to_learn', 'topic_to_teach', 'is_completed'}
+
+
+@receiver(post_save, sender=Review)
+def review_created(sender, instance, created, **kwargs):
+    if created:
+        stats.record_review(instance)
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    stats.forget_review(instance)
+
+
+@receiver(post_save, sender=CreditTransaction)
+def credit_transaction_created(sender, instance, created, **kwargs):
+    if created:
+        stats.record_credit_transaction(instance)
+
+
+@receiver(post_save, sender=SessionTimer)
+def session_timer_stopped(sender, instance, created, update_fields=None, **kwargs):
+    """Count teaching time once, when the timer's end_time is first written."""
+    if instance.end_time is None:
+        return
+    if created or (update_fields and 'end_time' in update_fields):
+        stats.record_teaching(instance)
+
+
+def _invalidate_autocomplete_on_save(created, update_fields, watched):
+    if created or update_fields is None or watched & set(update_fields):
+        transaction.on_commit(autocomplete.invalidate)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    _invalidate_autocomplete_on_save(created, update_fields, USER_AUTOCOMPLETE_FIELDS)
+
+
+@receiver(post_save, sender=LearningRequestPost)
+def post_saved(sender, instance, created, update_fields=None, **kwargs):
+    _invalidate_autocomplete_on_save(created, update_fields, POST_AUTOCOMPLETE_FIELDS)
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=LearningRequestPost)
+def autocomplete_source_deleted(sender, instance, **kwargs):
+    transaction.on_commit(autocomplete.invalidate)
+
+
+@receiver(post_delete, sender=Session)
+def session_deleted(sender, instance, **kwargs):
+    """Leave a tombstone so incremental session list sync drops it."""
+    SessionTombstone.objects.create(
+        session_id=instance.pk,
+        user1_id=instance.user1_id,
+        user2_id=instance.user2_id,
+    )
+    ttl = getattr(settings, 'SESSION_TOMBSTONE_TTL', 7 * 24 * 60 * 60)
+    SessionTombstone.objects.filter(
+        deleted_at__lt=timezone.now() - timedelta(seconds=ttl)
+    ).delete()
@@ -0,0 +1,109 @@
+"""
+Monthly credit statements.
+
+Served entirely from ``CreditMonthlyRollup`` rows (maintained by
+``core.stats`` on the ledger write path), so a statement costs a couple of
+small indexed reads however many transactions the user has. Balances are
+running sums of the ledger: opening is everything before the month and
+closing adds the month's net change.
+"""
+
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+from django.db.models import Sum
+
+CENT = Decimal('0.01')
+
+
+def _money(value):
+    return Decimal(str(value or 0)).quantize(CENT)
+
+
+def parse_month(value):
+    """Parse ``YYYY-MM`` into the first day of that month, or None."""
+    try:
+        year, month = value.split('-')
+        return date(int(year), int(month), 1)
+    except (AttributeError, ValueError):
+        return None
+
+
+def statement_months(user):
+    """Balances and net change for every month with activity, newest first."""
+    from .models import CreditMonthlyRollup
+
+    rows = CreditMonthlyRollup.objects.filter(user=user).order_by().values(
+        'month'
+    ).annotate(net=Sum('total'), transactions=Sum('count')).order_by('month')
+
+    months = []
+    balance = Decimal('0.00')
+    for row in rows:
+        net = _money(row['net'])
+        months.append({
+            'month': row['month'].strftime('%Y-%m'),
+            'opening_balance': balance,
+            'closing_balance': balance + net,
+            'net_change': net,
+            'transactions': row['transactions'],
+        })
+        balance += net
+    months.reverse()
+    return months
+
+
+def monthly_statement(user, month):
+    """Totals by type and per-counterparty breakdown for one month."""
+    from .models import CreditMonthlyRollup
+
+    rollups = CreditMonthlyRollup.objects.filter(user=user)
+    opening = _money(
+        rollups.filter(month__lt=month).aggregate(total=Sum('total'))['total']
+    )
+
+    by_type = defaultdict(lambda: {'total': Decimal('0.00'), 'transactions': 0})
+    counterparties = {}
+    net = Decimal('0.00')
+
+    for row in rollups.filter(month=month).select_related('counterparty'):
+        total = _money(row.total)
+        net += total
+
+        type_totals = by_type[row.transaction_type]
+        type_totals['total'] += total
+        type_totals['transactions'] += row.count
+
+        if row.counterparty_id is None:
+            continue
+        party = counterparties.get(row.counterparty_id)
+        if party is None:
+            party = counterparties[row.counterparty_id] = {
+                'id': row.counterparty_id,
+                'name': row.counterparty.name,
+                'earned': Decimal('0.00'),
+                'spent': Decimal('0.00'),
+                'net': Decimal('0.00'),
+                'transactions': 0,
+            }
+        if total >= 0:
+            party['earned'] += total
+        else:
+            party['spent'] -= total
+        party['net'] += total
+        party['transactions'] += row.count
+
+    return {
+        'month': month.strftime('%Y-%m'),
+        'opening_balance': opening,
+        'closing_balance': opening + net,
+        'net_change': net,
+        'totals_by_type': [
+            {'transaction_type': name, **totals}
+            for name, totals in sorted(by_type.items())
+        ],
+        'counterparties': sorted(
+            counterparties.values(), key=lambda party: -abs(party['net'])
+        ),
+    }
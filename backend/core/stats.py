@@ -0,0 +1,276 @@
+"""
+Denormalized user statistics.
+
+Profile and feed serializers read rating, review count, credits earned and
+hours taught straight from columns on ``User`` instead of aggregating on
+every read, activity charts read ``UserDailyStats`` rollups and monthly
+credit statements read ``CreditMonthlyRollup``. The helpers below keep all
+three in step with the write path (see ``core.signals``) and rebuild them
+from the raw tables.
+"""
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction as db_transaction
+from django.db.models import Case, Count, DateField, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, TruncDate, TruncMonth
+from django.utils import timezone
+
+# Transaction types that count towards "credits earned" on the profile
+EARNED_TRANSACTION_TYPES = ('TEACHING', 'SIGNUP', 'BOUNTY')
+
+
+def _apply_deltas(owner, field_name, user_id, **deltas):
+    """
+    Atomically add ``deltas`` to the user's stats columns.
+
+    The in-memory user cached on ``owner`` (if any) is bumped as well so a
+    response serialized right after the write reflects the change without
+    a refresh_from_db().
+    """
+    User = get_user_model()
+    User.objects.filter(pk=user_id).update(
+        **{name: F(name) + delta for name, delta in deltas.items()}
+    )
+
+    field = owner._meta.get_field(field_name)
+    if field.is_cached(owner):
+        user = field.get_cached_value(owner)
+        for name, delta in deltas.items():
+            setattr(user, name, getattr(user, name) + delta)
+
+
+def _upsert_rollup(model, lookup, **deltas):
+    """Atomically add ``deltas`` to the ``model`` row matching ``lookup``, creating it if needed."""
+    increments = {name: F(name) + delta for name, delta in deltas.items()}
+    rows = model.objects.filter(**lookup)
+    if None in lookup.values():
+        # NULLs never collide in a unique constraint, so several rows may
+        # match; add the delta to just one of them
+        rows = model.objects.filter(pk__in=Subquery(rows.values('pk')[:1]))
+
+    if rows.update(**increments):
+        return
+    try:
+        with db_transaction.atomic():
+            model.objects.create(**lookup, **deltas)
+    except IntegrityError:
+        # Another writer created the row first; fold our delta into it.
+        rows.update(**increments)
+
+
+def _local_date(when):
+    return timezone.localdate(when) if timezone.is_aware(when) else when.date()
+
+
+def _apply_daily_deltas(user_id, when, **deltas):
+    """Atomically add ``deltas`` to the user's rollup row for ``when``'s date."""
+    from .models import UserDailyStats
+
+    _upsert_rollup(UserDailyStats, {'user_id': user_id, 'date': _local_date(when)}, **deltas)
+
+
+def _counterparty_id(transaction):
+    """The other participant of the transaction's session, if any."""
+    if transaction.session_id is None:
+        return None
+    session = transaction.session
+    if session.user1_id == transaction.user_id:
+        return session.user2_id
+    return session.user1_id
+
+
+def record_review(review):
+    """Account for a newly created review."""
+    _apply_deltas(
+        review, 'reviewee', review.reviewee_id,
+        review_count=1,
+        rating_total=review.rating,
+    )
+
+
+def forget_review(review):
+    """Account for a deleted review (including cascades from its session)."""
+    _apply_deltas(
+        review, 'reviewee', review.reviewee_id,
+        review_count=-1,
+        rating_total=-review.rating,
+    )
+
+
+def record_credit_transaction(transaction):
+    """Account for a newly recorded credit transaction."""
+    from .models import CreditMonthlyRollup
+
+    amount = Decimal(str(transaction.amount))
+    _upsert_rollup(
+        CreditMonthlyRollup,
+        {
+            'user_id': transaction.user_id,
+            'month': _local_date(transaction.created_at).replace(day=1),
+            'transaction_type': transaction.transaction_type,
+            'counterparty_id': _counterparty_id(transaction),
+        },
+        total=amount,
+        count=1,
+    )
+
+    if transaction.transaction_type not in EARNED_TRANSACTION_TYPES or amount <= 0:
+        return
+    _apply_deltas(
+        transaction, 'user', transaction.user_id,
+        credits_earned_total=amount,
+    )
+    _apply_daily_deltas(
+        transaction.user_id, transaction.created_at,
+        credits_earned=amount,
+    )
+
+
+def record_teaching(timer):
+    """Account for a stopped teaching timer."""
+    if not timer.duration_seconds:
+        return
+    _apply_deltas(
+        timer, 'teacher', timer.teacher_id,
+        seconds_taught_total=timer.duration_seconds,
+    )
+    _apply_daily_deltas(
+        timer.teacher_id, timer.end_time,
+        seconds_taught=timer.duration_seconds,
+    )
+
+
+def rebuild_user_stats(users=None):
+    """
+    Recompute the denormalized stats columns from the source tables.
+
+    Runs as a single correlated UPDATE over ``users`` (all users by
+    default). Returns the number of rows updated.
+    """
+    from .models import CreditTransaction, Review, SessionTimer
+
+    User = get_user_model()
+    if users is None:
+        users = User.objects.all()
+
+    reviews = Review.objects.filter(
+        reviewee=OuterRef('pk')
+    ).order_by().values('reviewee')
+    earned = CreditTransaction.objects.filter(
+        user=OuterRef('pk'),
+        transaction_type__in=EARNED_TRANSACTION_TYPES,
+        amount__gt=0,
+    ).order_by().values('user')
+    taught = SessionTimer.objects.filter(
+        teacher=OuterRef('pk'),
+        end_time__isnull=False,
+    ).order_by().values('teacher')
+
+    return users.order_by().update(
+        review_count=Coalesce(
+            Subquery(reviews.annotate(n=Count('id')).values('n')), Value(0)
+        ),
+        rating_total=Coalesce(
+            Subquery(reviews.annotate(total=Sum('rating')).values('total')), Value(0)
+        ),
+        credits_earned_total=Coalesce(
+            Subquery(earned.annotate(total=Sum('amount')).values('total')),
+            Value(Decimal('0.00')),
+        ),
+        seconds_taught_total=Coalesce(
+            Subquery(taught.annotate(total=Sum('duration_seconds')).values('total')),
+            Value(0),
+        ),
+    )
+
+
+def rebuild_daily_stats(users=None, batch_size=1000):
+    """
+    Recompute ``UserDailyStats`` rollups from the source tables.
+
+    Existing rows for ``users`` (all users by default) are replaced. Returns
+    the number of rollup rows written.
+    """
+    from .models import CreditTransaction, SessionTimer, UserDailyStats
+
+    User = get_user_model()
+    if users is None:
+        users = User.objects.all()
+    user_ids = users.order_by().values('pk')
+
+    earned = CreditTransaction.objects.filter(
+        user__in=user_ids,
+        transaction_type__in=EARNED_TRANSACTION_TYPES,
+        amount__gt=0,
+    ).annotate(
+        day=TruncDate('created_at')
+    ).order_by().values('user_id', 'day').annotate(total=Sum('amount'))
+    taught = SessionTimer.objects.filter(
+        teacher__in=user_ids,
+        end_time__isnull=False,
+    ).annotate(
+        day=TruncDate('end_time')
+    ).order_by().values('teacher_id', 'day').annotate(total=Sum('duration_seconds'))
+
+    rollups = {}
+    for row in earned.iterator():
+        key = (row['user_id'], row['day'])
+        rollups[key] = UserDailyStats(user_id=key[0], date=key[1], credits_earned=row['total'])
+    for row in taught.iterator():
+        key = (row['teacher_id'], row['day'])
+        rollup = rollups.get(key)
+        if rollup is None:
+            rollup = rollups[key] = UserDailyStats(user_id=key[0], date=key[1])
+        rollup.seconds_taught = row['total']
+
+    with db_transaction.atomic():
+        UserDailyStats.objects.filter(user__in=user_ids).delete()
+        UserDailyStats.objects.bulk_create(rollups.values(), batch_size=batch_size)
+    return len(rollups)
+
+
+def rebuild_monthly_rollups(users=None, batch_size=1000):
+    """
+    Recompute ``CreditMonthlyRollup`` rows from ``CreditTransaction``.
+
+    Existing rows for ``users`` (all users by default) are replaced. Returns
+    the number of rollup rows written.
+    """
+    from .models import CreditMonthlyRollup, CreditTransaction
+
+    User = get_user_model()
+    if users is None:
+        users = User.objects.all()
+    user_ids = users.order_by().values('pk')
+
+    grouped = CreditTransaction.objects.filter(
+        user__in=user_ids,
+    ).annotate(
+        month=TruncMonth('created_at', output_field=DateField()),
+        counterparty_id=Case(
+            When(session__isnull=True, then=Value(None)),
+            When(session__user1=F('user'), then=F('session__user2')),
+            default=F('session__user1'),
+        ),
+    ).order_by().values(
+        'user_id', 'month', 'transaction_type', 'counterparty_id'
+    ).annotate(total=Sum('amount'), count=Count('id'))
+
+    rollups = [
+        CreditMonthlyRollup(
+            user_id=row['user_id'],
+            month=row['month'],
+            transaction_type=row['transaction_type'],
+            counterparty_id=row['counterparty_id'],
+            total=Decimal(str(row['total'])).quantize(Decimal('0.01')),
+            count=row['count'],
+        )
+        for row in grouped.iterator()
+    ]
+
+    with db_transaction.atomic():
+        CreditMonthlyRollup.objects.filter(user__in=user_ids).delete()
+        CreditMonthlyRollup.objects.bulk_create(rollups, batch_size=batch_size)
+    return len(rollups)
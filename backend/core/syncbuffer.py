@@ -0,0 +1,135 @@
+"""
+Write-behind buffer for the collaborative workspace.
+
+While someone draws, the whiteboard pushes ``POST /sessions/<id>/sync/``
+several times a second. With SYNC_WRITE_BEHIND on, each push only updates
+the session's entries in the Django cache. ``updates`` pollers read the
+state from there. The buffered state is checkpointed to the session row
+at most every ``SYNC_CHECKPOINT_INTERVAL`` seconds per session, and
+always when a participant leaves the room or the session ends. Row writes
+therefore scale with the number of live sessions, not with the stroke
+rate.
+
+The buffered ``sync_version`` is a cache counter seeded from the row. A
+checkpoint writes only if it is newer than the stored version, so a slow
+checkpoint can never overwrite a newer one. Deployments with several web
+processes need a shared cache backend, so SYNC_WRITE_BEHIND defaults to
+on only when CACHES is not the per-process LocMemCache (production uses
+Redis). If the cache evicts part of a session's buffer, ``snapshot``
+falls back to the row rather than mixing buffered and stored state.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+# Buffered payload fields, stored on Session under the same names
+FIELDS = ('whiteboard_data', 'code_data')
+
+
+def enabled():
+    return getattr(settings, 'SYNC_WRITE_BEHIND', False)
+
+
+def _ttl():
+    return getattr(settings, 'SYNC_BUFFER_TTL', 24 * 60 * 60)
+
+
+def _key(session_id, part):
+    return f'session_sync_{session_id}_{part}'
+
+
+def _next_version(session):
+    key = _key(session.pk, 'version')
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Nothing buffered yet: continue from the stored version
+        cache.add(key, session.sync_version or 0, timeout=_ttl())
+        return cache.incr(key)
+
+
+def push(session, user, **payload):
+    """
+    Buffer whiteboard/code state pushed by ``user``.
+
+    ``payload`` holds the FIELDS that were sent. Returns the new
+    sync_version. A checkpoint is written if one is due.
+    """
+    values = {_key(session.pk, field): value for field, value in payload.items()}
+    values[_key(session.pk, 'meta')] = {
+        'last_sync_time': timezone.now(),
+        'last_sync_by': user.id,
+    }
+    cache.set_many(values, timeout=_ttl())
+    version = _next_version(session)
+    checkpoint_if_due(session.pk)
+    return version
+
+
+def snapshot(session):
+    """
+    Current workspace state for ``session``: the buffer if it is ahead of
+    the stored row, otherwise the row itself.
+    """
+    state = {
+        'whiteboard_data': session.whiteboard_data,
+        'code_data': session.code_data,
+        'last_sync_time': session.last_sync_time,
+        'last_sync_by': session.last_sync_by_id,
+        'sync_version': session.sync_version,
+    }
+    if not enabled():
+        return state
+
+    keys = [_key(session.pk, part) for part in ('version', 'meta', *FIELDS)]
+    buffered = cache.get_many(keys)
+    version = buffered.get(keys[0])
+    meta = buffered.get(keys[1])
+    # meta is written with every push; without it the buffer was evicted
+    if version is None or meta is None or version <= session.sync_version:
+        return state
+
+    state['sync_version'] = version
+    state.update(meta)
+    for field, key in zip(FIELDS, keys[2:]):
+        if key in buffered:
+            state[field] = buffered[key]
+    return state
+
+
+def checkpoint(session_id):
+    """
+    Write the buffered state to the session row if it is newer than what is
+    stored. Returns whether the row was written.
+    """
+    from .models import Session
+
+    # Read the version before the payloads: at worst the row gets payloads
+    # newer than its version and the next checkpoint writes them again
+    version = cache.get(_key(session_id, 'version'))
+    if version is None:
+        return False
+    keys = [_key(session_id, part) for part in ('meta', *FIELDS)]
+    buffered = cache.get_many(keys)
+
+    changes = {'sync_version': version}
+    meta = buffered.get(keys[0])
+    if meta:
+        changes['last_sync_time'] = meta['last_sync_time']
+        changes['last_sync_by_id'] = meta['last_sync_by']
+    for field, key in zip(FIELDS, keys[1:]):
+        if key in buffered:
+            changes[field] = buffered[key]
+
+    return bool(
+        Session.objects.filter(pk=session_id, sync_version__lt=version).update(**changes)
+    )
+
+
+def checkpoint_if_due(session_id):
+    """Checkpoint unless this session was checkpointed in the last interval."""
+    interval = getattr(settings, 'SYNC_CHECKPOINT_INTERVAL', 5)
+    if cache.add(_key(session_id, 'checkpointed'), True, timeout=interval):
+        return checkpoint(session_id)
+    return False
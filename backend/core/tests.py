@@ -0,0 +1,777 @@
+import io
+import json
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F, QuerySet
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework import renderers
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import autocomplete
+from .fields import RawJSON, compress
+from .models import (
+    Bank, BankLedgerEntry, CreditTransaction, IdempotencyKey, JournalEntry, LearningRequestPost,
+    Review, Session, SessionTimer, SettlementJob, User,
+)
+from .renderers import JSONRenderer
+from .settlement import estimate_settlement, settle_session
+from .views import SessionViewSet
+
+
+class _Warnings(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.WARNING)
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+@override_settings(QUERY_BUDGET_CHECKS=True)
+class SessionQueryBudgetTests(TransactionTestCase):
+    """
+    Every SessionViewSet action stays within its ``query_budgets`` entry on
+    its most expensive paths. Runs without a wrapping transaction so the
+    counts match real requests (BEGIN, not test savepoints).
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.warnings = _Warnings()
+        logger = logging.getLogger('core.views.mixins')
+        logger.addHandler(self.warnings)
+        self.addCleanup(logger.removeHandler, self.warnings)
+
+        self.actions = set()
+        get_query_budget = SessionViewSet.get_query_budget
+
+        def record(view):
+            self.actions.add(view.action)
+            return get_query_budget(view)
+
+        patcher = mock.patch.object(
+            SessionViewSet, 'get_query_budget', autospec=True, side_effect=record
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.learner = self._user('learner')
+        self.teacher = self._user('teacher')
+        # Some history for the list/counts/annotation queries to walk. It is
+        # from earlier days, so stopping a timer today writes the first
+        # daily stats rollup (the expensive path)
+        now = timezone.now() - timedelta(days=2)
+        for _ in range(5):
+            past = Session.objects.create(
+                user1=self.learner, user2=self.teacher, status='completed', is_active=False
+            )
+            SessionTimer.objects.create(
+                session=past, teacher=self.teacher,
+                start_time=now - timedelta(minutes=9), end_time=now, duration_seconds=540
+            )
+
+    def _user(self, name):
+        user = User.objects.create_user(email=f'{name}@example.com', name=name, password='pw')
+        user.auth = {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(user).access_token}'}
+        return user
+
+    def _request(self, method, url, user, **extra):
+        response = getattr(self.client, method)(url, content_type='application/json', **user.auth, **extra)
+        self.assertLess(response.status_code, 400, f'{method.upper()} {url}: {response.content[:200]}')
+        return response
+
+    def _backdate_running_timer(self, session):
+        # Make the running timer record teaching time (and stats) when stopped
+        SessionTimer.objects.filter(session=session, end_time__isnull=True).update(
+            start_time=timezone.now() - timedelta(minutes=6)
+        )
+
+    def _run_session_flow(self):
+        learner, teacher = self.learner, self.teacher
+        since = int((timezone.now() - timedelta(hours=1)).timestamp() * 1_000_000)
+
+        self._request('get', '/api/sessions/', learner)
+        self._request('get', f'/api/sessions/?updated_since={since}&status=pending,accepted', learner)
+        self._request('get', '/api/sessions/counts/', learner)
+
+        post = LearningRequestPost.objects.create(creator=teacher, topic_to_learn='Rust')
+        session = Session.objects.create(user1=learner, user2=teacher, learning_request=post)
+        url = f'/api/sessions/{session.pk}/'
+        self._request('get', url, learner)
+        self._request('post', url + 'respond/', learner, data={'decision': 'accept'})
+        proposed = (timezone.now() + timedelta(minutes=1)).isoformat()
+        self._request('post', url + 'propose-time/', teacher, data={'time': proposed})
+        self._request('post', url + 'confirm-time/', learner, data={})
+        self._request('post', url + 'join-lobby/', learner)
+        self._request('post', url + 'join-lobby/', teacher)
+
+        self._request('post', url + 'sync/', learner, data={'whiteboard_data': {'elements': [1]}})
+        self._request('post', url + 'sync/', learner, data={'whiteboard_data': {'elements': [2]}})
+        self._request('post', url + 'sync/', teacher, data={'signal_data': {'type': 'candidate'}})
+        self._request('get', url + 'updates/', teacher)
+
+        self._request('post', url + 'timer/start/', learner)
+        self._request('get', url, learner)
+        self._backdate_running_timer(session)
+        self._request('post', url + 'timer/start/', teacher)
+        self._backdate_running_timer(session)
+        self._request('post', url + 'timer/stop/', teacher)
+        self._request('post', url + 'timer/start/', learner)
+        self._backdate_running_timer(session)
+        self._request('post', url + 'leave/', teacher)
+        self._request('post', url + 'end/', learner, HTTP_IDEMPOTENCY_KEY=str(uuid.uuid4()))
+        self._request('get', url + 'settlement/', learner)
+
+        # Polls that activate and that expire (with penalties) a scheduled session
+        now = timezone.now()
+        activating = Session.objects.create(
+            user1=learner, user2=teacher, status='scheduled',
+            scheduled_time=now - timedelta(minutes=1),
+            user1_last_room_presence=now, user2_last_room_presence=now,
+        )
+        self._request('get', f'/api/sessions/{activating.pk}/updates/', learner)
+        expiring = Session.objects.create(
+            user1=learner, user2=teacher, status='scheduled',
+            scheduled_time=now - timedelta(minutes=20),
+        )
+        self._request('get', f'/api/sessions/{expiring.pk}/updates/', learner)
+
+    def assertWithinBudgets(self):
+        self.assertEqual(self.warnings.messages, [])
+        self.assertEqual(self.actions, set(SessionViewSet.query_budgets))
+
+    @override_settings(SYNC_WRITE_BEHIND=False, SETTLEMENT_QUEUE_EAGER=False)
+    def test_actions_within_budget(self):
+        self._run_session_flow()
+        self.assertWithinBudgets()
+
+    @override_settings(SYNC_WRITE_BEHIND=True, SETTLEMENT_QUEUE_EAGER=False)
+    def test_actions_within_budget_with_write_behind(self):
+        self._run_session_flow()
+        self.assertWithinBudgets()
+
+    @override_settings(SYNC_WRITE_BEHIND=False, SETTLEMENT_QUEUE_EAGER=True)
+    def test_actions_within_budget_with_eager_settlement(self):
+        self._run_session_flow()
+        self.assertWithinBudgets()
+
+
+def _taught_session(learner_teacher_seconds):
+    """An ended session between two new users with finished teaching timers."""
+    user1, user2 = (
+        User.objects.create_user(email=f'{name}@example.com', name=name, password='pw')
+        for name in (uuid.uuid4().hex, uuid.uuid4().hex)
+    )
+    session = Session.objects.create(user1=user1, user2=user2, status='completed', is_active=False)
+    end = timezone.now()
+    for teacher, seconds in zip((user1, user2), learner_teacher_seconds):
+        if seconds:
+            SessionTimer.objects.create(
+                session=session, teacher=teacher,
+                start_time=end - timedelta(seconds=seconds), end_time=end, duration_seconds=seconds
+            )
+    return session
+
+
+def _set_credits(user, credits):
+    User.objects.filter(pk=user.pk).update(credits=Decimal(credits))
+    user.credits = Decimal(credits)
+
+
+def _credits(user):
+    return User.objects.values_list('credits', flat=True).get(pk=user.pk)
+
+
+class JournalEntryTests(TestCase):
+    """JournalEntry.post and the unbalanced() audit."""
+
+    def test_post_writes_balanced_legs(self):
+        session = _taught_session((600, 0))
+        learner, teacher = session.user2, session.user1
+        legs = [
+            CreditTransaction(user=learner, session=session, amount=Decimal('-2.00'),
+                              transaction_type='LEARNING', balance_after=Decimal('13.00')),
+            CreditTransaction(user=teacher, session=session, amount=Decimal('1.80'),
+                              transaction_type='TEACHING', balance_after=Decimal('16.80')),
+        ]
+
+        entry = JournalEntry.post(legs, bank_amount=Decimal('0.20'), session=session)
+
+        user_total = sum(leg.amount for leg in entry.user_legs.all())
+        bank_total = sum(leg.amount for leg in entry.bank_legs.all())
+        self.assertEqual(user_total + bank_total, 0)
+        self.assertFalse(JournalEntry.unbalanced().exists())
+        self.assertEqual(_credits(learner), Decimal('13.00'))
+        self.assertEqual(_credits(teacher), Decimal('16.80'))
+
+    def test_post_refuses_unbalanced_legs(self):
+        session = _taught_session((600, 0))
+        legs = [
+            CreditTransaction(user=session.user2, session=session, amount=Decimal('-2.00'),
+                              transaction_type='LEARNING', balance_after=Decimal('13.00')),
+        ]
+
+        with self.assertRaises(ValueError):
+            JournalEntry.post(legs, bank_amount=Decimal('0.10'), session=session)
+
+        self.assertFalse(JournalEntry.objects.exists())
+        self.assertEqual(_credits(session.user2), Decimal('15.00'))
+
+    def test_unbalanced_finds_tampered_entries(self):
+        session = _taught_session((600, 0))
+        settle_session(session)
+        BankLedgerEntry.objects.filter(session=session).update(amount=Decimal('0.30'))
+
+        self.assertEqual(list(JournalEntry.unbalanced()), list(JournalEntry.objects.filter(session=session)))
+
+
+class SettleSessionTests(TestCase):
+    """core.settlement.settle_session."""
+
+    def assertPostedBalanced(self, session):
+        entries = JournalEntry.objects.filter(session=session)
+        self.assertEqual(entries.count(), 1)
+        self.assertFalse(JournalEntry.unbalanced().exists())
+        return entries.get()
+
+    def test_one_way(self):
+        session = _taught_session((600, 0))
+
+        summary = settle_session(session)
+
+        entry = self.assertPostedBalanced(session)
+        self.assertEqual(
+            sorted(entry.user_legs.values_list('user_id', 'transaction_type', 'amount')),
+            sorted([
+                (session.user1_id, 'TEACHING', Decimal('1.80')),
+                (session.user2_id, 'LEARNING', Decimal('-2.00')),
+            ]),
+        )
+        self.assertEqual(list(entry.bank_legs.values_list('amount', flat=True)), [Decimal('0.20')])
+        self.assertEqual(summary['bank_cut'], 0.2)
+        self.assertEqual(_credits(session.user1), Decimal('16.80'))
+        self.assertEqual(_credits(session.user2), Decimal('13.00'))
+
+    def test_two_way(self):
+        session = _taught_session((600, 1500))
+
+        summary = settle_session(session)
+
+        entry = self.assertPostedBalanced(session)
+        self.assertEqual(entry.user_legs.count(), 4)
+        # One bank leg for both cuts (0.20 + 0.50)
+        self.assertEqual(list(entry.bank_legs.values_list('amount', flat=True)), [Decimal('0.70')])
+        self.assertAlmostEqual(summary['bank_cut'], 0.7)
+        self.assertEqual(_credits(session.user1), Decimal('15.00') + Decimal('1.80') - Decimal('5.00'))
+        self.assertEqual(_credits(session.user2), Decimal('15.00') + Decimal('4.50') - Decimal('2.00'))
+
+    def test_insufficient_balance_charges_what_the_learner_has(self):
+        session = _taught_session((600, 0))
+        _set_credits(session.user2, '0.50')
+
+        summary = settle_session(session)
+
+        self.assertPostedBalanced(session)
+        self.assertEqual(summary['user2']['credits_spent'], 0.5)
+        self.assertEqual(summary['user1']['credits_earned'], 0.45)
+        self.assertEqual(summary['bank_cut'], 0.05)
+        self.assertEqual(_credits(session.user2), Decimal('0.00'))
+        self.assertEqual(_credits(session.user1), Decimal('15.45'))
+
+    def test_empty_balance_posts_nothing(self):
+        session = _taught_session((600, 0))
+        _set_credits(session.user2, '0.00')
+
+        summary = settle_session(session)
+
+        self.assertFalse(JournalEntry.objects.exists())
+        self.assertEqual(summary['user1']['credits_earned'], 0)
+        self.assertEqual(_credits(session.user1), Decimal('15.00'))
+
+    def test_second_call_returns_the_posted_summary(self):
+        session = _taught_session((600, 1500))
+        first = settle_session(session)
+
+        second = settle_session(session)
+
+        self.assertEqual(second, first)
+        self.assertEqual(JournalEntry.objects.filter(session=session).count(), 1)
+        self.assertEqual(CreditTransaction.objects.filter(session=session).count(), 4)
+        self.assertEqual(_credits(session.user1), Decimal('11.80'))
+
+    def test_bank_balance_follows_settlements_through_roll_up(self):
+        for seconds in ((600, 0), (300, 900), (0, 1200)):
+            settle_session(_taught_session(seconds))
+        # 0.20 + (0.10 + 0.30) + 0.40
+        self.assertEqual(Bank.get_balance(), Decimal('1.00'))
+
+        Bank.roll_up()
+
+        self.assertEqual(Bank.get_balance(), Decimal('1.00'))
+        self.assertEqual(Bank.get_instance().total_credits, Decimal('1.00'))
+
+    def test_two_way_caps_only_net_outflow(self):
+        # user2 can only cover 1.00 up front, but earns more teaching (3.60)
+        # than they spend learning (2.00), so nothing is capped
+        session = _taught_session((600, 1200))
+        _set_credits(session.user2, '1.00')
+
+        summary = settle_session(session)
+
+        self.assertEqual(summary['user1']['credits_spent'], 4.0)
+        self.assertEqual(summary['user1']['credits_earned'], 1.8)
+        self.assertEqual(summary['user2']['credits_spent'], 2.0)
+        self.assertEqual(summary['user2']['credits_earned'], 3.6)
+        self.assertAlmostEqual(summary['bank_cut'], 0.6)
+        estimate = estimate_settlement(session)
+        for key in ('user1', 'user2'):
+            for field in ('credits_spent', 'credits_earned'):
+                self.assertEqual(summary[key][field], estimate[key][field])
+        self.assertEqual(_credits(session.user1), Decimal('12.80'))
+        self.assertEqual(_credits(session.user2), Decimal('2.60'))
+
+    def test_two_way_result_does_not_depend_on_user_order(self):
+        # Same session with the participants swapped
+        a = _taught_session((600, 1200))
+        _set_credits(a.user2, '1.00')
+        b = _taught_session((1200, 600))
+        _set_credits(b.user1, '1.00')
+
+        settle_session(a)
+        settle_session(b)
+
+        self.assertEqual(_credits(a.user1), _credits(b.user2))
+        self.assertEqual(_credits(a.user2), _credits(b.user1))
+
+    def test_two_way_caps_net_overdraft(self):
+        # user2 owes 4.00 and earns 0.90: they can pay their 0.50 plus 0.90
+        session = _taught_session((1200, 300))
+        _set_credits(session.user2, '0.50')
+
+        summary = settle_session(session)
+
+        self.assertEqual(summary['user2']['credits_spent'], 1.4)
+        self.assertEqual(_credits(session.user2), Decimal('0.00'))
+
+    def test_teaching_leg_precedes_learning_leg(self):
+        session = _taught_session((600, 1200))
+        _set_credits(session.user2, '1.00')
+
+        settle_session(session)
+
+        legs = list(
+            CreditTransaction.objects.filter(user=session.user2).order_by('id')
+            .values_list('transaction_type', 'amount', 'balance_after')
+        )
+        self.assertEqual(legs, [
+            ('TEACHING', Decimal('3.60'), Decimal('4.60')),
+            ('LEARNING', Decimal('-2.00'), Decimal('2.60')),
+        ])
+
+
+class ApplyBalanceChangeTests(TestCase):
+    """CreditTransaction.apply_balance_change on both backend code paths."""
+
+    def _check_overdraft_is_refused(self):
+        name = uuid.uuid4().hex
+        user = User.objects.create_user(email=f'{name}@example.com', name=name, password='pw')
+        _set_credits(user, '5.00')
+
+        self.assertEqual(CreditTransaction.apply_balance_change(user, '-5.00'), Decimal('0.00'))
+        with self.assertRaises(ValueError):
+            CreditTransaction.apply_balance_change(user, '-0.01')
+        self.assertEqual(_credits(user), Decimal('0.00'))
+        self.assertEqual(CreditTransaction.apply_balance_change(user, '2.50'), Decimal('2.50'))
+        self.assertEqual(_credits(user), Decimal('2.50'))
+
+    def test_overdraft_is_refused(self):
+        self._check_overdraft_is_refused()
+
+    def test_overdraft_is_refused_without_update_returning(self):
+        with mock.patch('core.models.credit._can_return_from_update', return_value=False):
+            self._check_overdraft_is_refused()
+
+
+class BankTests(TestCase):
+    """Bank balance as rolled-up total plus ledger tail."""
+
+    def test_balance_agrees_before_and_after_roll_up(self):
+        self.assertEqual(Bank.get_balance(), Decimal('0.00'))
+        Bank.add_credits('1.10')
+        Bank.add_credits('2.25')
+        Bank.deduct_credits('0.35')
+        self.assertEqual(Bank.get_balance(), Decimal('3.00'))
+
+        self.assertEqual(Bank.roll_up(batch_size=2), 3)
+        self.assertEqual(Bank.get_balance(), Decimal('3.00'))
+        self.assertEqual(Bank.get_instance().total_credits, Decimal('3.00'))
+        self.assertFalse(BankLedgerEntry.objects.filter(rolled_up=False).exists())
+
+        Bank.add_credits('0.05')
+        self.assertEqual(Bank.get_balance(), Decimal('3.05'))
+
+    def test_payout_beyond_balance_is_refused(self):
+        Bank.add_credits('1.00')
+        with self.assertRaises(ValueError):
+            Bank.deduct_credits('1.01')
+        self.assertEqual(Bank.get_balance(), Decimal('1.00'))
+
+
+class ReviewStatsTests(TestCase):
+    """Denormalized rating columns follow review creation and deletion."""
+
+    def test_deleting_reviews_reverses_rating_totals(self):
+        kept, dropped = _taught_session((60, 0)), _taught_session((60, 0))
+        reviewee = kept.user1
+        dropped.user1 = reviewee
+        dropped.save()
+        Review.objects.create(session=kept, reviewer=kept.user2, reviewee=reviewee, rating=5)
+        first = Review.objects.create(session=dropped, reviewer=dropped.user2, reviewee=reviewee, rating=1)
+        Review.objects.create(session=dropped, reviewer=kept.user2, reviewee=reviewee, rating=2)
+
+        first.delete()
+        reviewee.refresh_from_db()
+        self.assertEqual((reviewee.review_count, reviewee.rating_total), (2, 7))
+
+        # Cascades from the session run the same handler
+        dropped.delete()
+        reviewee.refresh_from_db()
+        self.assertEqual((reviewee.review_count, reviewee.rating_total), (1, 5))
+        self.assertEqual(reviewee.average_rating, 5)
+
+
+class AutocompleteViewTests(TestCase):
+    """GET /api/autocomplete/."""
+
+    def test_own_name_does_not_use_up_the_limit(self):
+        users = [
+            User.objects.create_user(email=f'ada{i}@example.com', name=f'Ada {i}', password='pw')
+            for i in range(4)
+        ]
+        # on_commit invalidation does not fire inside TestCase; start cold
+        autocomplete._state['index'] = None
+        token = RefreshToken.for_user(users[0]).access_token
+
+        response = self.client.get(
+            '/api/autocomplete/?q=ada&limit=3', HTTP_AUTHORIZATION=f'Bearer {token}'
+        )
+
+        names = [user['name'] for user in response.json()['users']]
+        self.assertEqual(names, ['Ada 1', 'Ada 2', 'Ada 3'])
+
+
+def _auth(user):
+    return {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(user).access_token}'}
+
+
+class SettlementJobTests(TransactionTestCase):
+    """The DB-backed settlement queue: claiming, retries and eager mode."""
+
+    def _job(self, seconds=(600, 0)):
+        return SettlementJob.enqueue(_taught_session(seconds))
+
+    def _make_due(self, job):
+        SettlementJob.objects.filter(pk=job.pk).update(run_after=timezone.now())
+
+    def test_claims_are_exclusive(self):
+        job = self._job()
+
+        first = SettlementJob.claim_batch()
+        second = SettlementJob.claim_batch()
+
+        self.assertEqual([claimed.pk for claimed in first], [job.pk])
+        self.assertEqual(second, [])
+        self.assertFalse(SettlementJob.objects.get(pk=job.pk).claim())
+        self.assertEqual(SettlementJob.objects.get(pk=job.pk).attempts, 1)
+
+    def test_stale_claim_is_reclaimed_and_settled_once(self):
+        job = self._job()
+        [stale] = SettlementJob.claim_batch()
+        SettlementJob.objects.filter(pk=job.pk).update(
+            locked_at=timezone.now() - timedelta(minutes=10)
+        )
+        stale.locked_at = SettlementJob.objects.get(pk=job.pk).locked_at
+
+        [fresh] = SettlementJob.claim_batch()
+        self.assertEqual(fresh.attempts, 2)
+
+        # The slow first worker no longer owns the job and must not settle it
+        self.assertFalse(stale.run())
+        self.assertEqual(stale.status, 'running')
+        self.assertFalse(JournalEntry.objects.exists())
+
+        self.assertTrue(fresh.run())
+        self.assertEqual(JournalEntry.objects.filter(session=job.session).count(), 1)
+        self.assertEqual(_credits(job.session.user2), Decimal('13.00'))
+
+    def test_failures_back_off_exponentially_then_fail(self):
+        job = self._job()
+
+        with mock.patch('core.settlement.settle_session', side_effect=RuntimeError('db down')):
+            for attempt in range(1, 4):
+                self._make_due(job)
+                [claimed] = SettlementJob.claim_batch()
+                before = timezone.now()
+                self.assertFalse(claimed.run(max_attempts=3))
+
+                stored = SettlementJob.objects.get(pk=job.pk)
+                self.assertEqual(stored.attempts, attempt)
+                self.assertEqual(stored.last_error, 'RuntimeError: db down')
+                self.assertIsNone(stored.locked_at)
+                if attempt < 3:
+                    self.assertEqual(stored.status, 'pending')
+                    delay = (stored.run_after - before).total_seconds()
+                    self.assertAlmostEqual(delay, 2 ** attempt, delta=1)
+                    # Not due again until the backoff has passed
+                    self.assertEqual(SettlementJob.claim_batch(), [])
+
+        self.assertEqual(stored.status, 'failed')
+        self._make_due(job)
+        self.assertEqual(SettlementJob.claim_batch(), [])
+        self.assertFalse(JournalEntry.objects.exists())
+
+    def _active_session(self):
+        session = _taught_session((600, 0))
+        Session.objects.filter(pk=session.pk).update(status='active', is_active=True)
+        return session
+
+    @override_settings(SETTLEMENT_QUEUE_EAGER=True)
+    def test_eager_end_settles_inline(self):
+        session = self._active_session()
+
+        response = self.client.post(f'/api/sessions/{session.pk}/end/', **_auth(session.user2))
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['settlement']['status'], 'done')
+        self.assertNotIn('provisional', data['credit_summary'])
+        self.assertEqual(SettlementJob.objects.get(session=session).status, 'done')
+        self.assertEqual(_credits(session.user2), Decimal('13.00'))
+
+    @override_settings(SETTLEMENT_QUEUE_EAGER=True)
+    def test_eager_failure_is_retried_by_the_settlement_endpoint(self):
+        session = self._active_session()
+        url = f'/api/sessions/{session.pk}/'
+
+        with mock.patch('core.settlement.settle_session', side_effect=RuntimeError('db down')):
+            response = self.client.post(url + 'end/', **_auth(session.user2))
+        self.assertEqual(response.json()['settlement']['status'], 'pending')
+        self.assertTrue(response.json()['credit_summary']['provisional'])
+
+        # Still backing off: the poll reports pending without retrying
+        response = self.client.get(url + 'settlement/', **_auth(session.user2))
+        self.assertEqual((response.json()['status'], response.json()['attempts']), ('pending', 1))
+
+        SettlementJob.objects.filter(session=session).update(run_after=timezone.now())
+        response = self.client.get(url + 'settlement/', **_auth(session.user2))
+        self.assertEqual((response.json()['status'], response.json()['attempts']), ('done', 2))
+        self.assertEqual(JournalEntry.objects.filter(session=session).count(), 1)
+
+
+class _IdempotencyChecks:
+    """
+    Idempotency-Key behaviour shared by the credit-moving endpoints.
+
+    Subclasses set up ``self.user``, ``self.url`` and the key ``self.scope``, and count the
+    handler's side effects in ``handled()``.
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    def _post(self, key, data=None):
+        return self.client.post(
+            self.url, data or {}, content_type='application/json',
+            HTTP_IDEMPOTENCY_KEY=key, **_auth(self.user)
+        )
+
+    def test_duplicate_replays_the_first_response(self):
+        first = self._post('k1')
+        self.assertEqual(first.status_code, 200)
+
+        cached = self._post('k1')
+        cache.clear()
+        stored = self._post('k1')
+
+        for replay in (cached, stored):
+            self.assertEqual((replay.status_code, replay.json()), (200, first.json()))
+            self.assertEqual(replay['Idempotent-Replayed'], 'true')
+        self.assertEqual(self.handled(), 1)
+
+    def test_key_reused_for_a_different_body_is_rejected(self):
+        self._post('k1', {'note': 'a'})
+
+        response = self._post('k1', {'note': 'b'})
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(self.handled(), 1)
+
+    @override_settings(IDEMPOTENCY_KEY_TTL=60)
+    def test_expired_key_runs_the_handler_again(self):
+        self._post('k1')
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(seconds=61))
+        cache.clear()
+
+        response = self._post('k1')
+
+        # The endpoint's own duplicate check answers, not a replay
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(IdempotencyKey.objects.get().status_code, 400)
+
+    def test_concurrent_duplicate_replays_the_winner(self):
+        first = QuerySet.first
+
+        def lose_race(queryset):
+            if queryset.model is not IdempotencyKey:
+                return first(queryset)
+            # The lookup misses, then another request commits the key, so
+            # this one's insert hits the unique constraint
+            IdempotencyKey.objects.create(
+                user=self.user, scope=self.scope, key='k1', fingerprint='same',
+                status_code=200, response_body={'winner': True}
+            )
+            return None
+
+        with mock.patch('core.idempotency._fingerprint', return_value='same'), \
+                mock.patch.object(QuerySet, 'first', autospec=True, side_effect=lose_race):
+            response = self._post('k1')
+
+        self.assertEqual((response.status_code, response.json()), (200, {'winner': True}))
+        self.assertEqual(response['Idempotent-Replayed'], 'true')
+        self.assertEqual(self.handled(), 0)
+
+
+class EndIdempotencyTests(_IdempotencyChecks, TransactionTestCase):
+    """Idempotency-Key on POST /api/sessions/<id>/end/."""
+
+    def setUp(self):
+        super().setUp()
+        session = _taught_session((600, 0))
+        Session.objects.filter(pk=session.pk).update(status='active', is_active=True)
+        self.user, self.url = session.user2, f'/api/sessions/{session.pk}/end/'
+        self.scope = 'session-end'
+
+    def handled(self):
+        return SettlementJob.objects.count()
+
+
+class BankSupportIdempotencyTests(_IdempotencyChecks, TransactionTestCase):
+    """Idempotency-Key on POST /api/bank/support/."""
+
+    def setUp(self):
+        super().setUp()
+        Bank.add_credits('100.00')
+        self.user = _taught_session((0, 0)).user1
+        _set_credits(self.user, '0.00')
+        self.url, self.scope = '/api/bank/support/', 'bank-support'
+
+    def handled(self):
+        return CreditTransaction.objects.filter(transaction_type='SUPPORT').count()
+
+
+class CompressRoomSnapshotsTests(TestCase):
+    """manage.py compress_room_snapshots."""
+
+    def _plain_snapshot(self, session, scene):
+        # Write uncompressed bytes directly, as rows saved before compression
+        table = connection.ops.quote_name(Session._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {table} SET whiteboard_data = %s WHERE id = %s',
+                [RawJSON.from_value(scene).encoded, session.pk]
+            )
+
+    def _stored(self, session):
+        return Session.objects.values_list('whiteboard_data', flat=True).get(pk=session.pk)
+
+    def test_sync_during_the_run_is_not_overwritten(self):
+        scene = {'elements': [{'id': i, 'type': 'rectangle'} for i in range(50)]}
+        synced, idle = _taught_session((0, 0)), _taught_session((0, 0))
+        for session in (synced, idle):
+            self._plain_snapshot(session, scene)
+        latest = {'elements': []}
+
+        def sync_then_compress(data, codec=None):
+            # A sync lands on the first session after its batch was read
+            if Session.objects.filter(pk=synced.pk, sync_version=0).exists():
+                Session.objects.filter(pk=synced.pk).update(
+                    whiteboard_data=RawJSON.from_value(latest), sync_version=F('sync_version') + 1
+                )
+            return compress(data, codec)
+
+        out = io.StringIO()
+        with mock.patch(
+            'core.management.commands.compress_room_snapshots.compress', side_effect=sync_then_compress
+        ):
+            call_command('compress_room_snapshots', stdout=out)
+
+        self.assertEqual(self._stored(synced).parse(), latest)
+        self.assertIsNotNone(self._stored(idle).stored)
+        self.assertEqual(self._stored(idle).parse(), scene)
+        self.assertIn('Compressed 1 session(s)', out.getvalue())
+        self.assertIn('Skipped 1 session(s)', out.getvalue())
+
+
+class JSONRendererTests(SimpleTestCase):
+    """core.renderers.JSONRenderer (ujson) against DRF's stock renderer."""
+
+    def assertRendersLikeStock(self, build):
+        # build() returns fresh data, so one-shot iterators are not shared
+        self.assertEqual(JSONRenderer().render(build()), renderers.JSONRenderer().render(build()))
+
+    def test_fallback_types_match_stock(self):
+        when = datetime(2026, 10, 19, 9, 0, 0, 123456, tzinfo=dt_timezone.utc)
+        self.assertRendersLikeStock(lambda: {
+            'decimal': Decimal('12.50'),
+            'datetime': when,
+            'date': when.date(),
+            'time': when.time(),
+            'duration': timedelta(seconds=90),
+            'uuid': uuid.UUID(int=5),
+            'lazy': gettext_lazy('Not found.'),
+            'text': 'caf\u00e9 \u2014 \u2028line\u2029 a/b',
+            'int_keys': {1: 'a'},
+            'big': 2 ** 70,
+            'nested': [[{'a': None, 'b': True, 'f': 0.1}]],
+        })
+
+    def test_iterables_render_their_items(self):
+        self.assertRendersLikeStock(lambda: (i for i in range(3)))
+        self.assertRendersLikeStock(lambda: {'a': map(str, [1, 2]), 'b': {'x': 1}.keys(), 'c': {3}})
+        self.assertEqual(JSONRenderer().render({'a': (i for i in range(3))}), b'{"a":[0,1,2]}')
+
+    def test_non_finite_floats_raise_value_error_when_strict(self):
+        for value in (float('nan'), float('inf')):
+            with self.assertRaises(ValueError):
+                renderers.JSONRenderer().render([value])
+            with self.assertRaises(ValueError):
+                JSONRenderer().render([value])
+
+    def test_float_exponents_differ_from_stock(self):
+        # Same value, different spelling: only the bytes differ from stock
+        fast, stock = JSONRenderer().render([1e-07]), renderers.JSONRenderer().render([1e-07])
+        self.assertEqual(fast, b'[1e-7]')
+        self.assertEqual(stock, b'[1e-07]')
+        self.assertEqual(json.loads(fast), json.loads(stock))
+
+    def test_raw_json_is_spliced(self):
+        rendered = JSONRenderer().render({'a': 1, 'scene': RawJSON(b'{"x":[1,2]}')})
+        self.assertEqual(rendered, b'{"a":1,"scene":{"x":[1,2]}}')
+
+    def test_indented_output_uses_stock_encoder(self):
+        data = {'a': [1e-07]}
+        media_type = 'application/json; indent=4'
+        self.assertEqual(
+            JSONRenderer().render(data, media_type),
+            renderers.JSONRenderer().render(data, media_type),
+        )
@@ -20,9 +20,13 @@ from .views import (
     BankSupportView,
     ReviewViewSet,
     CreditTransactionListView,
+    CreditTransactionExportView,
+    CreditStatementListView,
+    CreditStatementView,
     CreditBalanceView,
     PresenceViewSet,
     ChatViewSet,
+    AutocompleteView,
 )
 from .views.misc import execute_code
 
@@ -45,9 +49,15 @@ urlpatterns = [
     path('users/me/', UserMeView.as_view(), name='user-me'),
     path('users/<int:pk>/', UserDetailView.as_view(), name='user-detail'),
     
+    # Search-as-you-type suggestions
+    path('autocomplete/', AutocompleteView.as_view(), name='autocomplete'),
+    
     # Credit endpoints
     path('credits/', CreditBalanceView.as_view(), name='credit-balance'),
     path('credits/transactions/', CreditTransactionListView.as_view(), name='credit-transactions'),
+    path('credits/transactions/export.<str:export_format>', CreditTransactionExportView.as_view(), name='credit-transactions-export'),
+    path('credits/statements/', CreditStatementListView.as_view(), name='credit-statements'),
+    path('credits/statements/<str:month>/', CreditStatementView.as_view(), name='credit-statement'),
     
     # Bank support
     path('bank/support/', BankSupportView.as_view(), name='bank-support'),
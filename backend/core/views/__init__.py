@@ -4,9 +4,10 @@ from .learning_request import LearningRequestPostViewSet
 from .session import SessionViewSet
 from .bank import BankSupportView
 from .review import ReviewViewSet
-from .credit import CreditTransactionListView, CreditBalanceView
+from .credit import CreditTransactionListView, CreditTransactionExportView, CreditStatementListView, CreditStatementView, CreditBalanceView
 from .presence import PresenceViewSet
 from .chat_views import ChatViewSet
+from .autocomplete import AutocompleteView
 
 __all__ = [
     'SignupView',
@@ -20,7 +21,11 @@ __all__ = [
     'BankSupportView',
     'ReviewViewSet',
     'CreditTransactionListView',
+    'CreditTransactionExportView',
+    'CreditStatementListView',
+    'CreditStatementView',
     'CreditBalanceView',
     'PresenceViewSet',
     'ChatViewSet',
+    'AutocompleteView',
 ]
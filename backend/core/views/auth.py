@@ -5,6 +5,7 @@ from rest_framework.permissions import AllowAny
 from rest_framework_simplejwt.tokens import RefreshToken
 
 from ..serializers import UserSerializer, UserCreateSerializer
+from ..idempotency import run_idempotent
 
 
 class SignupView(APIView):
@@ -12,6 +13,7 @@ class SignupView(APIView):
     User registration endpoint.
     Creates a new user and returns JWT tokens.
     New users automatically receive 15 credits.
+    Returns a lean user payload; pass ?expand= for profile stats.
     """
     
     permission_classes = [AllowAny]
@@ -33,7 +35,7 @@ class SignupView(APIView):
             refresh = RefreshToken.for_user(user)
             
             return Response({
-                'user': UserSerializer(user).data,
+                'user': UserSerializer(user, context={'request': request}).data,
                 'tokens': {
                     'refresh': str(refresh),
                     'access': str(refresh.access_token),
@@ -47,6 +49,7 @@ class LoginView(APIView):
     """
     User login endpoint.
     Authenticates user and returns JWT tokens.
+    Returns a lean user payload; pass ?expand= for profile stats.
     """
     
     permission_classes = [AllowAny]
@@ -60,7 +63,6 @@ class LoginView(APIView):
 
     def post(self, request):
         from django.contrib.auth import authenticate
-        from django.utils import timezone
         
         email = request.data.get('email', '').lower().strip()
         password = request.data.get('password', '')
@@ -85,7 +87,31 @@ class LoginView(APIView):
                 status=status.HTTP_401_UNAUTHORIZED
             )
         
-        # Streak logic
+        # Streak logic (a retried login with the same Idempotency-Key replays
+        # the first outcome instead of paying the reward again)
+        streak = run_idempotent(
+            request, user, 'login-streak',
+            lambda: self._update_login_streak(user),
+            include_body=False
+        )
+        streak_rewarded = streak.data.get('streak_rewarded', False)
+        
+        # Generate JWT tokens
+        refresh = RefreshToken.for_user(user)
+        
+        return Response({
+            'user': UserSerializer(user, context={'request': request}).data,
+            'streak_rewarded': streak_rewarded,
+            'tokens': {
+                'refresh': str(refresh),
+                'access': str(refresh.access_token),
+            }
+        })
+
+    def _update_login_streak(self, user):
+        """Advance the daily login streak and pay the 7-day reward."""
+        from django.utils import timezone
+        
         today = timezone.now().date()
         streak_rewarded = False
         
@@ -104,33 +130,20 @@ class LoginView(APIView):
                 from ..models import CreditTransaction
                 from decimal import Decimal
                 
-                reward_amount = Decimal('7.00')
-                user.credits += reward_amount
-                
-                CreditTransaction.objects.create(
+                # Atomic balance update; never overwrites concurrent changes
+                CreditTransaction.record_transaction(
                     user=user,
-                    amount=reward_amount,
+                    amount=Decimal('7.00'),
                     transaction_type='BOUNTY',
-                    balance_after=user.credits,
                     description='7-Day Login Streak Reward'
                 )
                 
                 user.login_streak = 0
                 streak_rewarded = True
                 
-            user.save(update_fields=['last_login_date', 'login_streak', 'credits'])
+            user.save(update_fields=['last_login_date', 'login_streak'])
         
-        # Generate JWT tokens
-        refresh = RefreshToken.for_user(user)
-        
-        return Response({
-            'user': UserSerializer(user).data,
-            'streak_rewarded': streak_rewarded,
-            'tokens': {
-                'refresh': str(refresh),
-                'access': str(refresh.access_token),
-            }
-        })
+        return Response({'streak_rewarded': streak_rewarded})
 
 
 class LogoutView(APIView):
@@ -0,0 +1,30 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+
+from ..autocomplete import get_index
+
+
+class AutocompleteView(APIView):
+    """
+    Search-as-you-type suggestions for user names and post topics.
+    GET /api/autocomplete/?q=py&limit=8
+
+    Served from an in-process prefix index (see core.autocomplete).
+    """
+    
+    permission_classes = [IsAuthenticated]
+    max_limit = 20
+    
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'users': [], 'topics': []})
+        
+        try:
+            limit = int(request.query_params.get('limit', 8))
+        except ValueError:
+            limit = 8
+        limit = max(1, min(limit, self.max_limit))
+        
+        return Response(get_index().suggest(query, limit=limit, exclude_user_id=request.user.id))
@@ -2,6 +2,7 @@ from decimal import Decimal
 from django.utils import timezone
 from django.conf import settings
 from datetime import timedelta
+from django.db import transaction as db_transaction
 
 from rest_framework import status
 from rest_framework.views import APIView
@@ -10,6 +11,7 @@ from rest_framework.permissions import IsAuthenticated
 
 from ..models import Bank, CreditTransaction
 from ..serializers import UserSerializer
+from ..idempotency import idempotent
 
 
 class BankSupportView(APIView):
@@ -39,6 +41,7 @@ class BankSupportView(APIView):
             'cooldown_ends': eligibility.get('cooldown_ends'),
         })
     
+    @idempotent('bank-support')
     def post(self, request):
         """Request support credits from the bank."""
         user = request.user
@@ -52,25 +55,32 @@ class BankSupportView(APIView):
         
         support_amount = Decimal(str(eligibility['amount']))
         
-        # Record support transaction
-        CreditTransaction.record_transaction(
-            user=user,
-            amount=support_amount,
-            transaction_type='SUPPORT',
-            description='Bank support credits'
-        )
-        
-        # Deduct from bank
-        bank = Bank.get_instance()
-        bank.deduct_credits(support_amount)
-        
-        # Update last support request time
-        user.last_support_request = timezone.now()
-        user.save(update_fields=['last_support_request'])
+        with db_transaction.atomic():
+            # Deduct from bank (appends a payout to the bank ledger)
+            try:
+                Bank.deduct_credits(
+                    support_amount,
+                    user=user,
+                    description='Bank support credits'
+                )
+            except ValueError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            
+            # Record support transaction
+            CreditTransaction.record_transaction(
+                user=user,
+                amount=support_amount,
+                transaction_type='SUPPORT',
+                description='Bank support credits'
+            )
+            
+            # Update last support request time
+            user.last_support_request = timezone.now()
+            user.save(update_fields=['last_support_request'])
         
         return Response({
             'message': f'You received {support_amount} support credits.',
-            'user': UserSerializer(user).data
+            'user': UserSerializer(user, context={'request': request}).data
         })
     
     def _check_eligibility(self, user):
@@ -6,6 +6,7 @@ from django.shortcuts import get_object_or_404
 from ..models.session import Session
 from ..models.chat import ChatMessage
 from ..serializers.chat import ChatMessageSerializer
+from .mixins import ROOM_PARSER_CLASSES, ROOM_RENDERER_CLASSES
 
 class ChatViewSet(viewsets.ViewSet):
     """
@@ -13,6 +14,8 @@ class ChatViewSet(viewsets.ViewSet):
     Replaces ChatConsumer WebSocket logic.
     """
     permission_classes = [IsAuthenticated]
+    renderer_classes = ROOM_RENDERER_CLASSES
+    parser_classes = ROOM_PARSER_CLASSES
 
     @action(detail=True, methods=['get'])
     def messages(self, request, pk=None):
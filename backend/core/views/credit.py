@@ -1,37 +1,197 @@
+import csv
+import json
+from datetime import datetime, time, timedelta
+
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.generics import ListAPIView
+from rest_framework.exceptions import ValidationError
 from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 
 from ..models import CreditTransaction
+from ..pagination import KeysetPagination
 from ..serializers import CreditTransactionSerializer
+from ..statements import monthly_statement, parse_month, statement_months
 
 User = get_user_model()
 
+# Columns written by the CSV/JSONL export, in order
+EXPORT_FIELDS = [
+    'id',
+    'created_at',
+    'transaction_type',
+    'amount',
+    'balance_after',
+    'session_id',
+    'description',
+]
+
 
-class CreditTransactionListView(ListAPIView):
+def _parse_bound(value, param, end=False):
     """
-    List credit transactions for the current user.
+    Parse a ``start_date``/``end_date`` query param.
     
-    Query params:
-    - type: Filter by transaction type (TEACHING, LEARNING, SIGNUP, SUPPORT, BANK_CUT)
-    - limit: Number of transactions to return (default 50)
+    Accepts an ISO date (whole day, inclusive) or datetime. Returns an aware
+    datetime; for ``end`` dates this is the start of the following day, to
+    be used as an exclusive bound.
     """
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValidationError({'error': f'Invalid {param}: use YYYY-MM-DD or an ISO datetime.'})
+        if end:
+            day += timedelta(days=1)
+        moment = datetime.combine(day, time.min)
+    elif end:
+        moment += timedelta(microseconds=1)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+class CreditHistoryMixin:
+    """
+    The current user's transactions, filtered by query params.
     
-    permission_classes = [IsAuthenticated]
-    serializer_class = CreditTransactionSerializer
+    Query params:
+    - type: Filter by transaction type (TEACHING, LEARNING, SIGNUP, SUPPORT, BANK_CUT, BOUNTY)
+    - start_date: Only transactions on/after this date or datetime
+    - end_date: Only transactions on/before this date or datetime
+    """
     
     def get_queryset(self):
         queryset = CreditTransaction.objects.filter(user=self.request.user)
+        params = self.request.query_params
         
         # Filter by transaction type if provided
-        tx_type = self.request.query_params.get('type', None)
+        tx_type = params.get('type', None)
         if tx_type:
             queryset = queryset.filter(transaction_type=tx_type.upper())
         
-        return queryset.order_by('-created_at')[:50]
+        if params.get('start_date'):
+            queryset = queryset.filter(
+                created_at__gte=_parse_bound(params['start_date'], 'start_date')
+            )
+        if params.get('end_date'):
+            queryset = queryset.filter(
+                created_at__lt=_parse_bound(params['end_date'], 'end_date', end=True)
+            )
+        
+        return queryset
+
+
+class CreditTransactionListView(CreditHistoryMixin, ListAPIView):
+    """
+    List credit transactions for the current user, newest first.
+    
+    Filters as in CreditHistoryMixin. Pages are keyset-paginated on
+    (created_at, id): follow ``next`` for older rows. ``limit`` sets the
+    page size (default 50, max 200).
+    """
+    
+    permission_classes = [IsAuthenticated]
+    serializer_class = CreditTransactionSerializer
+    pagination_class = KeysetPagination
+    
+    def get_queryset(self):
+        return super().get_queryset().select_related('user')
+
+
+def _with_header(header, rows):
+    yield header
+    yield from rows
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to the caller."""
+    
+    def write(self, value):
+        return value
+
+
+class CreditTransactionExportView(CreditHistoryMixin, APIView):
+    """
+    Download the current user's full credit history as CSV or JSON lines.
+    
+    GET /credits/transactions/export.csv
+    GET /credits/transactions/export.jsonl
+    
+    Takes the same filters as the list. Rows are streamed from a
+    server-side cursor, so memory use does not grow with history length.
+    """
+    
+    permission_classes = [IsAuthenticated]
+    chunk_size = 2000
+    
+    def get(self, request, export_format):
+        rows = self.get_queryset().order_by('-created_at', '-id').values_list(
+            *EXPORT_FIELDS
+        ).iterator(chunk_size=self.chunk_size)
+        
+        if export_format == 'csv':
+            writer = csv.writer(_Echo())
+            content = (
+                writer.writerow(row)
+                for row in _with_header(EXPORT_FIELDS, rows)
+            )
+            content_type = 'text/csv'
+        elif export_format == 'jsonl':
+            content = (
+                json.dumps(dict(zip(EXPORT_FIELDS, row)), cls=DjangoJSONEncoder) + '\n'
+                for row in rows
+            )
+            content_type = 'application/x-ndjson'
+        else:
+            return Response(
+                {'error': 'Unsupported export format. Use csv or jsonl.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="credit-history.{export_format}"'
+        return response
+
+
+class CreditStatementListView(APIView):
+    """
+    Months with credit activity for the current user, newest first, with
+    opening/closing balances and net change. Read from monthly rollups.
+    """
+    
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        return Response(statement_months(request.user))
+
+
+class CreditStatementView(APIView):
+    """
+    Monthly credit statement for the current user.
+    
+    GET /credits/statements/<YYYY-MM>/
+    
+    Opening and closing balances, totals by transaction type and a
+    breakdown per counterparty (the other session participant), read
+    from monthly rollups rather than raw transactions.
+    """
+    
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request, month):
+        month_start = parse_month(month)
+        if month_start is None:
+            return Response(
+                {'error': 'Invalid month: use YYYY-MM.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(monthly_statement(request.user, month_start))
 
 
 class CreditBalanceView(APIView):
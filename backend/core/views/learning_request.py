@@ -104,6 +104,6 @@ class LearningRequestPostViewSet(viewsets.ModelViewSet):
         posts = LearningRequestPost.objects.filter(
             creator=request.user,
             is_completed=False
-        )
+        ).select_related('creator')
         serializer = LearningRequestPostSerializer(posts, many=True)
         return Response(serializer.data)
@@ -0,0 +1,63 @@
+import logging
+
+from django.conf import settings
+from django.db import connection
+from rest_framework.settings import api_settings
+
+from ..parsers import BINARY_PARSER_CLASSES
+from ..renderers import BINARY_RENDERER_CLASSES
+
+logger = logging.getLogger(__name__)
+
+# The room endpoints (updates, sync, chat, presence) are polled constantly,
+# so on top of the defaults they accept and produce MessagePack and CBOR
+# when a client asks for them via Content-Type / Accept
+ROOM_RENDERER_CLASSES = [*api_settings.DEFAULT_RENDERER_CLASSES, *BINARY_RENDERER_CLASSES]
+ROOM_PARSER_CLASSES = [*api_settings.DEFAULT_PARSER_CLASSES, *BINARY_PARSER_CLASSES]
+
+
+class _QueryCounter:
+    """``connection.execute_wrapper`` hook that counts executed queries."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class QueryBudgetMixin:
+    """
+    Per-action query budgets for viewsets.
+
+    ``query_budgets`` maps an action name to the most queries one request
+    to it should run, authentication included. When QUERY_BUDGET_CHECKS is
+    on (it follows DEBUG by default), requests are counted and going over
+    budget logs a warning, so a regression such as a lost select_related or
+    an N+1 in a serializer shows up while developing instead of in
+    production.
+    """
+
+    query_budgets = {}
+
+    def get_query_budget(self):
+        """Budget for the current request's action, or None if unbudgeted."""
+        return self.query_budgets.get(getattr(self, 'action', None))
+
+    def dispatch(self, request, *args, **kwargs):
+        if not getattr(settings, 'QUERY_BUDGET_CHECKS', settings.DEBUG):
+            return super().dispatch(request, *args, **kwargs)
+
+        counter = _QueryCounter()
+        with connection.execute_wrapper(counter):
+            response = super().dispatch(request, *args, **kwargs)
+
+        action = getattr(self, 'action', None)
+        budget = self.get_query_budget()
+        if budget is not None and counter.count > budget:
+            logger.warning(
+                '%s.%s ran %d queries (budget %d)',
+                type(self).__name__, action, counter.count, budget
+            )
+        return response
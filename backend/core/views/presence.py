@@ -8,6 +8,7 @@ from rest_framework.permissions import IsAuthenticated
 from django.db import models
 from ..serializers import UserPublicSerializer, UserMinimalSerializer
 from ..models import Session
+from .mixins import ROOM_PARSER_CLASSES, ROOM_RENDERER_CLASSES
 
 User = get_user_model()
 
@@ -17,6 +18,8 @@ class PresenceViewSet(viewsets.ViewSet):
     Replaces PresenceConsumer WebSocket logic.
     """
     permission_classes = [IsAuthenticated]
+    renderer_classes = ROOM_RENDERER_CLASSES
+    parser_classes = ROOM_PARSER_CLASSES
 
     @action(detail=False, methods=['post'])
     def heartbeat(self, request):
@@ -1,47 +1,224 @@
-from decimal import Decimal
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
 from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+from datetime import datetime, timedelta, timezone as dt_timezone
 import uuid
 
-from ..models import Session, SessionTimer, LearningRequestPost
+from ..models import Session, SessionTimer, SessionTombstone, LearningRequestPost, SettlementJob
 from ..serializers import (
     SessionSerializer,
     SessionListSerializer,
     SessionCreateSerializer,
     SessionTimerSerializer
 )
-from ..utils import calculate_credits
+from ..fields import RawJSON
+from ..pagination import SessionKeysetPagination
+from ..settlement import estimate_settlement
+from ..idempotency import idempotent
+from .. import syncbuffer
+from .mixins import QueryBudgetMixin, ROOM_PARSER_CLASSES, ROOM_RENDERER_CLASSES
 
 User = get_user_model()
 
+SESSION_STATUSES = [value for value, _ in Session.STATUS_CHOICES]
 
-class SessionViewSet(viewsets.ModelViewSet):
+
+def _parse_statuses(value):
+    """Parse a comma-separated ``status`` query param into a list of statuses."""
+    statuses = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = sorted(set(statuses) - set(SESSION_STATUSES))
+    if unknown:
+        raise ValidationError({
+            'error': f'Invalid status: {", ".join(unknown)}. Use any of {", ".join(SESSION_STATUSES)}.'
+        })
+    return statuses
+
+
+class SessionViewSet(QueryBudgetMixin, viewsets.ModelViewSet):
     """
     ViewSet for learning sessions.
     
     Endpoints:
-    - GET /sessions/ - List user's sessions
+    - GET /sessions/ - List user's sessions (keyset-paginated, newest first)
+    - GET /sessions/?status=pending,active - Only sessions in these states
+    - GET /sessions/?updated_since=<cursor> - Sessions changed since cursor
+    - GET /sessions/counts/ - Number of sessions per status
     - POST /sessions/ - Create a new session
     - GET /sessions/{id}/ - Get session details
     - POST /sessions/{id}/timer/start/ - Start teaching timer
     - POST /sessions/{id}/timer/stop/ - Stop teaching timer
+    - POST /sessions/{id}/leave/ - Leave the room (persists workspace state)
     - POST /sessions/{id}/end/ - End session and process credits
     """
     
     permission_classes = [IsAuthenticated]
+    pagination_class = SessionKeysetPagination
     
-    def get_queryset(self):
-        """Return sessions where user is a participant."""
+    # Large JSON columns that only the workspace endpoints read
+    HEAVY_FIELDS = ('whiteboard_data', 'code_data', 'signal_data')
+    
+    # Actions that render teaching time from SQL annotations instead of
+    # loading the timer rows
+    ANNOTATED_ACTIONS = {
+        'list', 'respond_to_request', 'propose_time', 'confirm_time',
+        'join_lobby', 'settlement',
+    }
+    
+    # Most queries per request, JWT user lookup included (see
+    # QueryBudgetMixin). Worst cases measured on SQLite, which also counts
+    # BEGIN: list with ?updated_since and ?status, retrieve with a running
+    # timer, a teaching-timer switch or stop and an end/Idempotency-Key
+    # that write the first stats rollups of the day/month, an updates poll
+    # that expires the session with penalties, and sync/leave with
+    # write-behind. Enforced by core.tests.
+    query_budgets = {
+        'list': 4,
+        'counts': 2,
+        'retrieve': 4,
+        'respond_to_request': 6,
+        'propose_time': 4,
+        'confirm_time': 6,
+        'join_lobby': 8,
+        'updates': 17,
+        'sync': 3,
+        'leave': 4,
+        'start_timer': 13,
+        'stop_timer': 9,
+        'end': 31,
+        'settlement': 3,
+    }
+    
+    # Extra queries when SETTLEMENT_QUEUE_EAGER settles inline (end, or a
+    # settlement retry): a two-way settlement writing fresh rollups
+    EAGER_SETTLEMENT_BUDGET = 36
+    
+    def get_query_budget(self):
+        budget = super().get_query_budget()
+        if (
+            budget is not None
+            and self.action in ('end', 'settlement')
+            and getattr(settings, 'SETTLEMENT_QUEUE_EAGER', False)
+        ):
+            budget += self.EAGER_SETTLEMENT_BUDGET
+        return budget
+    
+    def _participant_sessions(self):
         user = self.request.user
-        return Session.objects.filter(
-            user1=user
-        ).prefetch_related('timers') | Session.objects.filter(
-            user2=user
-        ).prefetch_related('timers')
+        return Session.objects.filter(Q(user1=user) | Q(user2=user))
+    
+    def _status_filter(self):
+        """Statuses requested with ``?status=``, or None for all."""
+        value = self.request.query_params.get('status')
+        return _parse_statuses(value) if value else None
+    
+    def get_queryset(self):
+        """
+        Return sessions where user is a participant, shaped for the action.
+        
+        Only the workspace endpoints load the heavy JSON columns, and
+        timers are prefetched only where the response lists them.
+        """
+        queryset = self._participant_sessions()
+        
+        if self.action == 'sync':
+            # Authorize and bump the sync counter; the pushed data replaces
+            # the stored whiteboard/code, so those are never read
+            return queryset.only('id', 'user1', 'user2', 'sync_version', 'signal_data')
+        if self.action == 'leave':
+            return queryset.only('id', 'user1', 'user2')
+        if self.action in ('start_timer', 'stop_timer'):
+            return queryset.defer(*self.HEAVY_FIELDS)
+        
+        queryset = queryset.select_related('user1', 'user2', 'proposer')
+        if self.action != 'updates':
+            queryset = queryset.defer(*self.HEAVY_FIELDS)
+        
+        if self.action in self.ANNOTATED_ACTIONS:
+            if self.action == 'list':
+                statuses = self._status_filter()
+                if statuses:
+                    queryset = queryset.filter(status__in=statuses)
+            # Teaching time per row comes from SQL annotations, not timers
+            return queryset.annotate(**Session.teaching_time_annotations())
+        return queryset.prefetch_related('timers')
+    
+    def list(self, request, *args, **kwargs):
+        """
+        List sessions, or sync incrementally with ``?updated_since=<cursor>``.
+        
+        The incremental form returns only sessions whose list-visible fields
+        changed after the cursor, ids of sessions deleted since then and a
+        new cursor to send next time. An empty cursor, or one older than
+        SESSION_TOMBSTONE_TTL, returns everything with ``reset: true``.
+        With ``?status=``, sessions that changed into another status are
+        reported in ``deleted`` as well, since they left the filtered list.
+        """
+        if 'updated_since' not in request.query_params:
+            return super().list(request, *args, **kwargs)
+        
+        now = timezone.now()
+        cursor = request.query_params['updated_since']
+        since = None
+        if cursor:
+            try:
+                since = datetime.fromtimestamp(int(cursor) / 1_000_000, tz=dt_timezone.utc)
+            except (ValueError, OverflowError, OSError):
+                return Response(
+                    {'error': 'Invalid updated_since cursor.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        
+        ttl = timedelta(seconds=getattr(settings, 'SESSION_TOMBSTONE_TTL', 7 * 24 * 60 * 60))
+        reset = since is None or since < now - ttl
+        queryset = self.get_queryset()
+        deleted = []
+        if not reset:
+            # Overlap the window slightly so writes committed out of order
+            # around the previous cursor are not missed
+            lower = since - timedelta(seconds=2)
+            queryset = queryset.filter(updated_at__gt=lower)
+            deleted = list(
+                SessionTombstone.objects.filter(
+                    Q(user1_id=request.user.id) | Q(user2_id=request.user.id),
+                    deleted_at__gt=lower
+                ).values_list('session_id', flat=True)
+            )
+            statuses = self._status_filter()
+            if statuses:
+                deleted += self._participant_sessions().filter(
+                    updated_at__gt=lower
+                ).exclude(status__in=statuses).values_list('id', flat=True)
+        
+        return Response({
+            'sessions': self.get_serializer(queryset, many=True).data,
+            'deleted': deleted,
+            'cursor': str(int(now.timestamp() * 1_000_000)),
+            'reset': reset,
+        })
+    
+    @action(detail=False, methods=['get'])
+    def counts(self, request):
+        """
+        Number of the user's sessions in each status, from one grouped query.
+        
+        Response: {"counts": {"pending": 1, "active": 0, ...}, "total": 1}
+        """
+        counts = dict.fromkeys(SESSION_STATUSES, 0)
+        counts.update(
+            self._participant_sessions()
+            .order_by()
+            .values_list('status')
+            .annotate(count=Count('id'))
+        )
+        return Response({'counts': counts, 'total': sum(counts.values())})
     
     def get_serializer_class(self):
         if self.action == 'create':
@@ -68,7 +245,6 @@ class SessionViewSet(viewsets.ModelViewSet):
             return Response({'error': 'This post is already fulfilled.'}, status=status.HTTP_400_BAD_REQUEST)
             
         # Check for existing pending/active request
-        from django.db.models import Q
         existing = Session.objects.filter(
             user1=post.creator,
             user2=request.user,
@@ -98,7 +274,7 @@ class SessionViewSet(viewsets.ModelViewSet):
         user = request.user
         
         # Verify user is participant
-        if user not in [session.user1, session.user2]:
+        if user.id not in (session.user1_id, session.user2_id):
             return Response(
                 {'error': 'You are not a participant in this session.'},
                 status=status.HTTP_403_FORBIDDEN
@@ -113,16 +289,13 @@ class SessionViewSet(viewsets.ModelViewSet):
         
         # Check if there's already a running timer
         active_timer = session.get_active_timer()
-        if active_timer:
-            if active_timer.teacher == user:
-                return Response(
-                    {'error': 'Your timer is already running.'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            # Stop the other user's timer first
-            active_timer.stop()
+        if active_timer and active_timer.teacher_id == user.id:
+            return Response(
+                {'error': 'Your timer is already running.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        # Start new timer
+        # Stop the other user's timer (if any) and start ours atomically
         timer = SessionTimer.start_timer(session, user)
         
         return Response({
@@ -139,7 +312,7 @@ class SessionViewSet(viewsets.ModelViewSet):
         user = request.user
         
         # Verify user is participant
-        if user not in [session.user1, session.user2]:
+        if user.id not in (session.user1_id, session.user2_id):
             return Response(
                 {'error': 'You are not a participant in this session.'},
                 status=status.HTTP_403_FORBIDDEN
@@ -154,11 +327,12 @@ class SessionViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        if active_timer.teacher != user:
+        if active_timer.teacher_id != user.id:
             return Response(
                 {'error': 'You can only stop your own timer.'},
                 status=status.HTTP_403_FORBIDDEN
             )
+        active_timer.teacher = user
         
         # Stop timer
         active_timer.stop()
@@ -176,15 +350,14 @@ class SessionViewSet(viewsets.ModelViewSet):
             return Response({'error': 'Only the learner can respond to the request.'}, status=status.HTTP_403_FORBIDDEN)
             
         decision = request.data.get('decision') # 'accept' or 'reject'
-        if decision == 'accept':
-            session.status = 'accepted'
-            session.save(update_fields=['status'])
-        elif decision == 'reject':
-            session.status = 'rejected'
-            session.is_active = False
-            session.save(update_fields=['status', 'is_active'])
-        else:
+        if decision not in ('accept', 'reject'):
             return Response({'error': 'Invalid decision.'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if not session.transition(decision, actor=request.user):
+            return Response(
+                {'error': f'Session is already {session.status}.'},
+                status=status.HTTP_409_CONFLICT
+            )
             
         return Response(SessionSerializer(session, context={'request': request}).data)
 
@@ -215,10 +388,19 @@ class SessionViewSet(viewsets.ModelViewSet):
         if not session.proposed_time or session.proposer == request.user:
             return Response({'error': 'No time to confirm or you are the proposer.'}, status=status.HTTP_400_BAD_REQUEST)
             
-        session.scheduled_time = session.proposed_time
-        session.status = 'scheduled'
-        session.room_id = str(uuid.uuid4())
-        session.save(update_fields=['scheduled_time', 'status', 'room_id'])
+        # Only confirm the proposal this user saw, in a schedulable state
+        scheduled = session.transition(
+            'schedule',
+            actor=request.user,
+            guard={'proposed_time': session.proposed_time, 'proposer': session.proposer_id},
+            scheduled_time=session.proposed_time,
+            room_id=str(uuid.uuid4()),
+        )
+        if not scheduled:
+            return Response(
+                {'error': 'The session or its proposed time has changed.'},
+                status=status.HTTP_409_CONFLICT
+            )
         
         return Response(SessionSerializer(session, context={'request': request}).data)
 
@@ -226,34 +408,35 @@ class SessionViewSet(viewsets.ModelViewSet):
     def join_lobby(self, request, pk=None):
         """Signal presence in the waiting room."""
         session = self.get_object()
-        from django.utils import timezone
         now = timezone.now()
         
         if request.user == session.user1:
-            session.user1_lobby_joined_at = now
-            session.save(update_fields=['user1_lobby_joined_at'])
+            lobby_field = 'user1_lobby_joined_at'
         elif request.user == session.user2:
-            session.user2_lobby_joined_at = now
-            session.save(update_fields=['user2_lobby_joined_at'])
+            lobby_field = 'user2_lobby_joined_at'
         else:
             return Response({'error': 'Not a participant.'}, status=status.HTTP_403_FORBIDDEN)
+        
+        Session.objects.filter(pk=session.pk).update(**{lobby_field: now})
+        setattr(session, lobby_field, now)
             
-        # If both are in lobby and it's near or after scheduled time, activate session
-        if session.user1_lobby_joined_at and session.user2_lobby_joined_at:
-            if session.status == 'scheduled':
-                session.status = 'active'
-                session.save(update_fields=['status'])
+        # Once both are in the lobby, activate the session. The database
+        # checks both join times, so two users joining at once can't both
+        # miss each other.
+        if session.status == 'scheduled':
+            session.transition('activate', actor=request.user, guard={
+                'user1_lobby_joined_at__isnull': False,
+                'user2_lobby_joined_at__isnull': False,
+            })
                 
         return Response(SessionSerializer(session, context={'request': request}).data)
     
-    @action(detail=True, methods=['get'])
+    @action(detail=True, methods=['get'], renderer_classes=ROOM_RENDERER_CLASSES)
     def updates(self, request, pk=None):
         """
         Poll for session updates. 
         Also handles auto-start and expiration/penalties.
         """
-        from datetime import timedelta
-        from django.utils import timezone
         from ..models import CreditTransaction
         
         session = self.get_object()
@@ -264,13 +447,12 @@ class SessionViewSet(viewsets.ModelViewSet):
             return Response({'error': 'Not a participant'}, status=status.HTTP_403_FORBIDDEN)
             
         # 1. Update Room Presence (existing logic)
-        update_fields = []
         if user == session.user1:
-            session.user1_last_room_presence = now
-            update_fields.append('user1_last_room_presence')
+            presence_field, peer_presence_field = 'user1_last_room_presence', 'user2_last_room_presence'
         else:
-            session.user2_last_room_presence = now
-            update_fields.append('user2_last_room_presence')
+            presence_field, peer_presence_field = 'user2_last_room_presence', 'user1_last_room_presence'
+        Session.objects.filter(pk=session.pk).update(**{presence_field: now})
+        setattr(session, presence_field, now)
             
         # 2. Check for Session Activation (if both are in presence)
         # (This is a more real-time version of join_lobby check)
@@ -279,11 +461,12 @@ class SessionViewSet(viewsets.ModelViewSet):
         u2_present = session.user2_last_room_presence and session.user2_last_room_presence > threshold
         
         if u1_present and u2_present and session.status == 'scheduled':
-            session.status = 'active'
-            if 'status' not in update_fields:
-                update_fields.append('status')
+            session.transition('activate', actor=user, guard={
+                f'{peer_presence_field}__gt': threshold,
+            })
 
-        # 3. Check for Expiration & Penalties (10 minutes after scheduled time)
+        # 3. Check for Expiration & Penalties (10 minutes after scheduled time).
+        # Only the request that wins the expiry transition applies penalties.
         penalty_applied = False
         if session.status == 'scheduled' and session.scheduled_time:
             expiry_limit = session.scheduled_time + timedelta(minutes=10)
@@ -292,45 +475,44 @@ class SessionViewSet(viewsets.ModelViewSet):
                 u1_joined = session.user1_lobby_joined_at or u1_present
                 u2_joined = session.user2_lobby_joined_at or u2_present
                 
-                # Penalty Logic: Lose 1 credit if not joined
-                if not u1_joined:
-                    CreditTransaction.record_transaction(
-                        user=session.user1,
-                        amount=-1,
-                        transaction_type='PENALTY',
-                        session=session,
-                        description="Penalty: Failed to join scheduled session."
-                    )
-                    penalty_applied = True
-                
-                if not u2_joined:
-                    CreditTransaction.record_transaction(
-                        user=session.user2,
-                        amount=-1,
-                        transaction_type='PENALTY',
-                        session=session,
-                        description="Penalty: Failed to join scheduled session."
-                    )
-                    penalty_applied = True
-                
-                session.status = 'expired'
-                session.is_active = False
-                update_fields.extend(['status', 'is_active'])
-
-        if update_fields:
-            session.save(update_fields=update_fields)
+                with transaction.atomic():
+                    expired = session.transition('expire', guard={
+                        'scheduled_time': session.scheduled_time,
+                    })
+                    
+                    # Penalty Logic: Lose 1 credit if not joined
+                    absentees = [
+                        participant
+                        for joined, participant in ((u1_joined, session.user1), (u2_joined, session.user2))
+                        if expired and not joined
+                    ]
+                    for absentee in absentees:
+                        CreditTransaction.record_transaction(
+                            user=absentee,
+                            amount=-1,
+                            transaction_type='PENALTY',
+                            session=session,
+                            description="Penalty: Failed to join scheduled session."
+                        )
+                        penalty_applied = True
             
         # Determine peer presence for UI
         is_peer_in_room = u2_present if user == session.user1 else u1_present
+        
+        # Workspace state, from the write-behind buffer when it is ahead
+        workspace = syncbuffer.snapshot(session)
+        if workspace['sync_version'] > session.sync_version:
+            # Flushes the tail of a drawing burst once the interval passes
+            syncbuffer.checkpoint_if_due(session.pk)
             
         data = {
             'session': SessionSerializer(session, context={'request': request}).data,
             'is_peer_in_room': is_peer_in_room,
-            'whiteboard_data': session.whiteboard_data,
-            'code_data': session.code_data,
-            'last_sync_time': session.last_sync_time.isoformat() if session.last_sync_time else None,
-            'last_sync_by': session.last_sync_by_id,
-            'sync_version': session.sync_version,
+            'whiteboard_data': workspace['whiteboard_data'],
+            'code_data': workspace['code_data'],
+            'last_sync_time': workspace['last_sync_time'].isoformat() if workspace['last_sync_time'] else None,
+            'last_sync_by': workspace['last_sync_by'],
+            'sync_version': workspace['sync_version'],
             'signal_data': session.signal_data,
             'signal_timestamp': session.signal_timestamp,
             'your_credits': float(user.credits),
@@ -338,7 +520,10 @@ class SessionViewSet(viewsets.ModelViewSet):
         
         return Response(data)
 
-    @action(detail=True, methods=['post'])
+    @action(
+        detail=True, methods=['post'],
+        renderer_classes=ROOM_RENDERER_CLASSES, parser_classes=ROOM_PARSER_CLASSES,
+    )
     def sync(self, request, pk=None):
         """
         Receive whiteboard/code updates from clients.
@@ -347,7 +532,7 @@ class SessionViewSet(viewsets.ModelViewSet):
         session = self.get_object()
         
         # Verify user is participant
-        if request.user not in [session.user1, session.user2]:
+        if request.user.id not in (session.user1_id, session.user2_id):
             return Response({'error': 'Not a participant'}, status=status.HTTP_403_FORBIDDEN)
             
         whiteboard_data = request.data.get('whiteboard_data')
@@ -355,31 +540,50 @@ class SessionViewSet(viewsets.ModelViewSet):
         signal_data = request.data.get('signal_data')
         now = timezone.now()
         
+        # Strip source: 'local' to ensure polling clients accept it
+        for payload in (whiteboard_data, code_data):
+            if isinstance(payload, dict):
+                payload.pop('source', None)
+        # Encode once; from here on the payloads are opaque bytes that are
+        # stored, buffered and spliced into updates responses unparsed
+        try:
+            if whiteboard_data is not None:
+                whiteboard_data = RawJSON.from_value(whiteboard_data)
+            if code_data is not None:
+                code_data = RawJSON.from_value(code_data)
+        except (TypeError, ValueError):
+            # MessagePack/CBOR bodies can carry values JSON has no form for
+            return Response(
+                {'error': 'whiteboard_data and code_data must be JSON-compatible'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
         # Only update sync metadata when actual collaborative data changes
         has_collab_data = whiteboard_data is not None or code_data is not None
         update_fields = []
-        
-        if has_collab_data:
+        sync_version = session.sync_version
+        
+        if has_collab_data and syncbuffer.enabled():
+            # Buffer in the cache; the row is checkpointed periodically
+            payload = {'whiteboard_data': whiteboard_data, 'code_data': code_data}
+            sync_version = syncbuffer.push(
+                session, request.user,
+                **{field: value for field, value in payload.items() if value is not None}
+            )
+        elif has_collab_data:
             session.last_sync_time = now
             session.last_sync_by = request.user
             # FIX: Increment version counter so frontend can detect changes
             # using an integer instead of a timestamp (immune to clock skew)
-            session.sync_version = (session.sync_version or 0) + 1
+            session.sync_version = sync_version = (session.sync_version or 0) + 1
             update_fields.extend(['last_sync_time', 'last_sync_by', 'sync_version'])
-        
-        if whiteboard_data is not None:
-            # Strip source: 'local' to ensure polling clients accept it
-            if isinstance(whiteboard_data, dict):
-                whiteboard_data.pop('source', None)
-            session.whiteboard_data = whiteboard_data
-            update_fields.append('whiteboard_data')
             
-        if code_data is not None:
-            # Strip source: 'local'
-            if isinstance(code_data, dict):
-                code_data.pop('source', None)
-            session.code_data = code_data
-            update_fields.append('code_data')
+            if whiteboard_data is not None:
+                session.whiteboard_data = whiteboard_data
+                update_fields.append('whiteboard_data')
+            if code_data is not None:
+                session.code_data = code_data
+                update_fields.append('code_data')
             
         if signal_data is not None:
             # Initialize if empty
@@ -392,11 +596,11 @@ class SessionViewSet(viewsets.ModelViewSet):
             if sig_type in ['offer', 'answer']:
                 session.signal_data[sig_type] = signal_data
             elif sig_type == 'ready':
-                role = 'caller' if request.user == session.user1 else 'callee'
+                role = 'caller' if request.user.id == session.user1_id else 'callee'
                 session.signal_data[f'ready_{role}'] = True
                 session.signal_data['ready_signal'] = signal_data
             elif sig_type == 'candidate':
-                role = 'caller' if request.user == session.user1 else 'callee'
+                role = 'caller' if request.user.id == session.user1_id else 'callee'
                 key = f'candidates_{role}'
                 candidates = session.signal_data.get(key, [])
                 candidates.append(signal_data)
@@ -409,16 +613,43 @@ class SessionViewSet(viewsets.ModelViewSet):
         if update_fields:
             session.save(update_fields=update_fields)
         
-        return Response({'status': 'synced', 'sync_version': session.sync_version})
+        return Response({'status': 'synced', 'sync_version': sync_version})
 
+    @action(detail=True, methods=['post'])
+    def leave(self, request, pk=None):
+        """
+        Leave the session room.
+        
+        Clears the caller's room presence and checkpoints the workspace
+        sync buffer, so the state is persisted when the room empties.
+        """
+        session = self.get_object()
+        if request.user.id == session.user1_id:
+            presence_field = 'user1_last_room_presence'
+        elif request.user.id == session.user2_id:
+            presence_field = 'user2_last_room_presence'
+        else:
+            return Response({'error': 'Not a participant'}, status=status.HTTP_403_FORBIDDEN)
+        
+        Session.objects.filter(pk=session.pk).update(**{presence_field: None})
+        syncbuffer.checkpoint(session.pk)
+        return Response({'status': 'left'})
     
     @action(detail=True, methods=['post'])
+    @idempotent('session-end')
     def end(self, request, pk=None):
         """
-        End the session and process credit transfers.
+        End the session and queue its credit settlement.
         Credits are transferred based on teaching time.
         Bank takes 10% cut from each transfer.
         Also marks the linked LearningRequestPost as completed.
+        
+        Settlement runs in the background (run_settlement_worker); the
+        response carries a provisional summary. Poll
+        GET /sessions/{id}/settlement/ for the final one.
+        
+        Send an Idempotency-Key header to make retries replay the first
+        response instead of failing with "already ended".
         """
         session = self.get_object()
         user = request.user
@@ -437,21 +668,55 @@ class SessionViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # End session (this also stops any running timers)
-        session.end_session()
+        with transaction.atomic():
+            # End session (this also stops any running timers); a concurrent
+            # end may have won since the check above
+            if not session.end_session(actor=user):
+                return Response(
+                    {'error': 'Session is already ended.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            
+            # Persist any whiteboard/code state still in the sync buffer
+            syncbuffer.checkpoint(session.pk)
+            
+            # Mark linked learning post as completed
+            if session.learning_request and not session.learning_request.is_completed:
+                session.learning_request.is_completed = True
+                session.learning_request.save(update_fields=['is_completed'])
+            
+            # Queue the credit transfer (one balanced journal entry)
+            job = SettlementJob.enqueue(session)
         
-        # Mark linked learning post as completed
-        if session.learning_request and not session.learning_request.is_completed:
-            session.learning_request.is_completed = True
-            session.learning_request.save(update_fields=['is_completed'])
+        if getattr(settings, 'SETTLEMENT_QUEUE_EAGER', False):
+            job.run_now(max_attempts=getattr(settings, 'SETTLEMENT_MAX_ATTEMPTS', 5))
         
-        # Calculate and transfer credits
-        credit_summary = self._process_credit_transfers(session)
+        credit_summary = job.result if job.status == 'done' else estimate_settlement(session)
         
         return Response({
             'message': 'Session ended.',
             'session': SessionSerializer(session).data,
-            'credit_summary': credit_summary
+            'credit_summary': credit_summary,
+            'settlement': {'id': job.id, 'status': job.status},
+        })
+    
+    @action(detail=True, methods=['get'])
+    def settlement(self, request, pk=None):
+        """Status of the session's credit settlement and its final summary."""
+        session = self.get_object()
+        job = SettlementJob.objects.filter(session=session).first()
+        if not job:
+            return Response({'error': 'Session has not been ended.'}, status=status.HTTP_404_NOT_FOUND)
+        
+        # Without a worker, failed eager settlements are retried from here
+        if job.status == 'pending' and getattr(settings, 'SETTLEMENT_QUEUE_EAGER', False):
+            job.run_now(max_attempts=getattr(settings, 'SETTLEMENT_MAX_ATTEMPTS', 5))
+        
+        return Response({
+            'id': job.id,
+            'status': job.status,
+            'attempts': job.attempts,
+            'credit_summary': job.result if job.status == 'done' else estimate_settlement(session),
         })
 
     @action(detail=False, methods=['post'], url_path='dm/(?P<user_id>\\d+)')
@@ -471,7 +736,6 @@ class SessionViewSet(viewsets.ModelViewSet):
             return Response({'error': 'Cannot chat with yourself.'}, status=status.HTTP_400_BAD_REQUEST)
             
         # Check for existing active session
-        from django.db.models import Q
         active_session = Session.objects.filter(
             (Q(user1=user, user2=target_user) | Q(user1=target_user, user2=user)),
             is_active=True
@@ -489,118 +753,3 @@ class SessionViewSet(viewsets.ModelViewSet):
         )
         
         return Response(SessionSerializer(session).data, status=status.HTTP_201_CREATED)
-    
-    def _process_credit_transfers(self, session):
-        """
-        Process credit transfers based on teaching time.
-        5 minutes teaching = 1 credit
-        Bank takes 10% cut from teacher earnings.
-        """
-        from django.db import transaction
-        from ..models import Bank, CreditTransaction
-        
-        user1_teaching_seconds = session.get_teaching_time(session.user1)
-        user2_teaching_seconds = session.get_teaching_time(session.user2)
-        
-        credit_summary = {
-            'user1': {
-                'id': session.user1.id,
-                'name': session.user1.name,
-                'teaching_seconds': user1_teaching_seconds,
-                'credits_earned': 0,
-                'credits_spent': 0,
-            },
-            'user2': {
-                'id': session.user2.id,
-                'name': session.user2.name,
-                'teaching_seconds': user2_teaching_seconds,
-                'credits_earned': 0,
-                'credits_spent': 0,
-            },
-            'bank_cut': 0
-        }
-        
-        bank = Bank.get_instance()
-        
-        with transaction.atomic():
-            # User1 taught, User2 learns
-            if user1_teaching_seconds > 0:
-                # Refresh from DB to get latest credits
-                session.user1.refresh_from_db()
-                session.user2.refresh_from_db()
-                
-                credits_needed = calculate_credits(user1_teaching_seconds)
-                
-                # Check learner (user2) balance
-                learner_balance = session.user2.credits
-                actual_credits = min(credits_needed, learner_balance)
-                
-                if actual_credits > 0:
-                    bank_cut = actual_credits * Decimal('0.10')
-                    teacher_receives = actual_credits - bank_cut
-                    
-                    # Deduct from learner (user2)
-                    CreditTransaction.record_transaction(
-                        user=session.user2,
-                        amount=-actual_credits,
-                        transaction_type='LEARNING',
-                        session=session,
-                        description=f'Learning from {session.user1.name}'
-                    )
-                    credit_summary['user2']['credits_spent'] = float(actual_credits)
-                    
-                    # Add to teacher (user1) - minus bank cut
-                    CreditTransaction.record_transaction(
-                        user=session.user1,
-                        amount=teacher_receives,
-                        transaction_type='TEACHING',
-                        session=session,
-                        description=f'Teaching {session.user2.name}'
-                    )
-                    credit_summary['user1']['credits_earned'] = float(teacher_receives)
-                    
-                    # Bank takes cut
-                    bank.add_credits(bank_cut)
-                    credit_summary['bank_cut'] += float(bank_cut)
-            
-            # User2 taught, User1 learns
-            if user2_teaching_seconds > 0:
-                # Refresh from DB to get latest credits
-                session.user1.refresh_from_db()
-                session.user2.refresh_from_db()
-
-                credits_needed = calculate_credits(user2_teaching_seconds)
-                
-                # Check learner (user1) balance
-                learner_balance = session.user1.credits
-                actual_credits = min(credits_needed, learner_balance)
-                
-                if actual_credits > 0:
-                    bank_cut = actual_credits * Decimal('0.10')
-                    teacher_receives = actual_credits - bank_cut
-                    
-                    # Deduct from learner (user1)
-                    CreditTransaction.record_transaction(
-                        user=session.user1,
-                        amount=-actual_credits,
-                        transaction_type='LEARNING',
-                        session=session,
-                        description=f'Learning from {session.user2.name}'
-                    )
-                    credit_summary['user1']['credits_spent'] = float(actual_credits)
-                    
-                    # Add to teacher (user2) - minus bank cut
-                    CreditTransaction.record_transaction(
-                        user=session.user2,
-                        amount=teacher_receives,
-                        transaction_type='TEACHING',
-                        session=session,
-                        description=f'Teaching {session.user1.name}'
-                    )
-                    credit_summary['user2']['credits_earned'] = float(teacher_receives)
-                    
-                    # Bank takes cut
-                    bank.add_credits(bank_cut)
-                    credit_summary['bank_cut'] += float(bank_cut)
-        
-        return credit_summary
@@ -3,21 +3,25 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 
-from ..serializers import UserSerializer, UserUpdateSerializer
+from ..serializers import UserSerializer, UserUpdateSerializer, USER_STATS_FIELDS
 
 
 class UserMeView(APIView):
     """
     Current user profile endpoint.
-    GET: Retrieve current user's profile
-    PATCH: Update current user's profile
+    GET: Retrieve current user's profile (full stats unless ?fields= is given)
+    PATCH: Update current user's profile (lean payload, ?expand= for stats)
     """
     
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
         """Get current user profile."""
-        serializer = UserSerializer(request.user)
+        serializer = UserSerializer(
+            request.user,
+            expand=USER_STATS_FIELDS,
+            context={'request': request}
+        )
         return Response(serializer.data)
     
     def patch(self, request):
@@ -30,7 +34,7 @@ class UserMeView(APIView):
         
         if serializer.is_valid():
             serializer.save()
-            return Response(UserSerializer(request.user).data)
+            return Response(UserSerializer(request.user, context={'request': request}).data)
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -51,7 +55,11 @@ class UserDetailView(APIView):
         User = get_user_model()
         try:
             user = User.objects.get(pk=pk)
-            serializer = UserPublicSerializer(user)
+            serializer = UserPublicSerializer(
+                user,
+                expand=USER_STATS_FIELDS,
+                context={'request': request}
+            )
             return Response(serializer.data)
         except User.DoesNotExist:
             return Response(
@@ -64,6 +72,9 @@ class UserListView(APIView):
     """
     List users with optional search.
     GET /api/users/?search=query
+
+    Profile stats are read from denormalized columns; weekly activity is
+    opt-in (?expand=weekly_activity) and loaded for the whole page at once.
     """
     
     permission_classes = [IsAuthenticated]
@@ -79,16 +90,26 @@ class UserListView(APIView):
             
             print(f"UserListView: searching for '{query}' by user {request.user}")
             
+            expand = [f for f in USER_STATS_FIELDS if f != 'weekly_activity']
+            
             if query:
                 users = User.objects.filter(
                     Q(name__icontains=query) | Q(email__icontains=query)
-                ).exclude(is_superuser=True)[:20]  # Limit to 20 results, hide admins
+                ).exclude(is_superuser=True)
+                if UserPublicSerializer.includes_field('weekly_activity', request, expand=expand):
+                    users = users.prefetch_related(User.activity_prefetch())
+                users = users[:20]  # Limit to 20 results, hide admins
             else:
                 # If no query, return empty list or maybe distinct users?
                 # For now, return empty to avoid listing everyone
                 users = User.objects.none()
                 
-            serializer = UserPublicSerializer(users, many=True)
+            serializer = UserPublicSerializer(
+                users,
+                many=True,
+                expand=expand,
+                context={'request': request}
+            )
             return Response(serializer.data)
         except Exception as e:
             import traceback
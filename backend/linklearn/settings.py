@@ -172,6 +172,16 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    'DEFAULT_RENDERER_CLASSES': (
+        # ujson-backed; splices pre-encoded RawJSON payloads into responses as-is
+        'core.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'core.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
 }
@@ -210,6 +220,24 @@ else:
         },
     }
 
+# Cache
+# Per-process memory in development; production shares Redis with channels so
+# every web process sees the same cache (required by the sync write-behind
+# buffer, see SYNC_WRITE_BEHIND below)
+if DEBUG:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': f"redis://{os.getenv('REDIS_HOST', '127.0.0.1')}:{os.getenv('REDIS_PORT', 6379)}/1",
+        },
+    }
+
 # CORS Configuration
 CORS_ALLOWED_ORIGINS = [
     origin.strip() for origin in os.getenv(
@@ -237,9 +265,10 @@ CORS_ALLOW_HEADERS = [
     "user-agent",
     "x-csrftoken",
     "x-requested-with",
+    "idempotency-key",
 ]
 
-CORS_EXPOSE_HEADERS = ['Content-Type', 'X-CSRFToken']
+CORS_EXPOSE_HEADERS = ['Content-Type', 'X-CSRFToken', 'Idempotent-Replayed']
 CORS_ALLOW_CREDENTIALS = True
 CORS_PREFLIGHT_MAX_AGE = 86400
 
@@ -259,3 +288,40 @@ if os.getenv('CSRF_TRUSTED_ORIGINS'):
 
 # Bank Support Credit Configuration
 SUPPORT_CREDIT_COOLDOWN_HOURS = 24  # Hours between support requests
+
+# Session settlement queue (see `manage.py run_settlement_worker`)
+# Eager mode settles inline during the request, e.g. for local dev without a worker.
+SETTLEMENT_QUEUE_EAGER = os.getenv('SETTLEMENT_QUEUE_EAGER', 'False').lower() == 'true'
+SETTLEMENT_MAX_ATTEMPTS = 5
+# The settlement worker also folds the bank ledger into Bank.total_credits
+# this often (seconds)
+BANK_ROLLUP_INTERVAL = 5 * 60
+
+# How long deleted sessions are reported to incremental list sync (seconds);
+# clients with an older cursor get a full resync instead
+SESSION_TOMBSTONE_TTL = 7 * 24 * 60 * 60
+
+# Workspace sync write-behind buffer (see core/syncbuffer.py): whiteboard/code
+# pushes are buffered in the cache and written to the session row at most
+# every SYNC_CHECKPOINT_INTERVAL seconds, and when a user leaves or the
+# session ends. Needs a cache shared by all web processes, so it is off by
+# default with the per-process LocMemCache
+_SHARED_CACHE = CACHES['default']['BACKEND'] != 'django.core.cache.backends.locmem.LocMemCache'
+SYNC_WRITE_BEHIND = os.getenv('SYNC_WRITE_BEHIND', str(_SHARED_CACHE)).lower() == 'true'
+SYNC_CHECKPOINT_INTERVAL = 5
+SYNC_BUFFER_TTL = 24 * 60 * 60
+
+# Codec for compressed room snapshots (whiteboard/code): 'zstd' or 'zlib'.
+# Defaults to zstd when the zstandard package is installed. Every process
+# reading zstd rows needs zstandard.
+ROOM_SNAPSHOT_CODEC = os.getenv('ROOM_SNAPSHOT_CODEC') or None
+
+# Log a warning when a viewset action runs more queries than its declared
+# budget (see core/views/mixins.py)
+QUERY_BUDGET_CHECKS = DEBUG
+
+# Idempotency-Key replay window in seconds (see core/idempotency.py)
+IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+
+# Autocomplete: max seconds a process serves its in-memory index before rebuilding
+AUTOCOMPLETE_MAX_AGE = 60
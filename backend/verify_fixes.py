@@ -51,10 +51,9 @@ def test_credit_validation():
         duration_seconds=600
     )
     
-    # Process transfers manually using the logic from our view
-    from core.views.session import SessionViewSet
-    viewset = SessionViewSet()
-    summary = viewset._process_credit_transfers(session)
+    # Settle directly (what the settlement worker runs for an ended session)
+    from core.settlement import settle_session
+    summary = settle_session(session)
     
     u1.refresh_from_db()
     print(f"Learner (U1) balance after transfer: {u1.credits}")
@@ -70,19 +69,19 @@ def test_credit_validation():
 
 def test_bank_accounting():
     print("\nTesting Bank Accounting...")
-    bank = Bank.get_instance()
-    initial_credits = bank.total_credits
+    # Make sure the bank can cover the payout
+    support_amount = Decimal('6.00')
+    Bank.add_credits(support_amount)
+    initial_credits = Bank.get_balance()
     
     u1 = User.objects.create_user(email='u1@test.com', name='U1', password='password')
     u1.credits = Decimal('0.00')
     u1.save()
     
     # Trigger BankSupportView.post logic manually
-    support_amount = Decimal('6.00')
-    bank.deduct_credits(support_amount)
+    Bank.deduct_credits(support_amount, user=u1)
     
-    bank.refresh_from_db()
-    final_credits = bank.total_credits
+    final_credits = Bank.get_balance()
     
     print(f"Bank credits: {initial_credits} -> {final_credits}")
     
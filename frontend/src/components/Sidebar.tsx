@@ -1,7 +1,7 @@
 import { Link, useLocation } from 'react-router-dom'
 import { useAuthStore } from '@/stores/authStore'
 import { useUIStore } from '@/stores/uiStore'
-import api from '@/lib/api'
+import api, { idempotencyHeaders } from '@/lib/api'
 import clsx from 'clsx'
 import { motion } from 'framer-motion'
 
@@ -23,7 +23,7 @@ export default function Sidebar() {
 
     const handleRequestSupport = async () => {
         try {
-            const response = await api.post('/bank/support/')
+            const response = await api.post('/bank/support/', undefined, { headers: idempotencyHeaders() })
             alert(response.data.message)
             // Refresh profile to show new credits
             useAuthStore.getState().fetchProfile()
@@ -1,7 +1,7 @@
 import { useEffect, useRef, useCallback, useState } from 'react'
 import { useAuthStore } from '@/stores/authStore'
 import { usePolling } from './usePolling'
-import api from '@/lib/api'
+import api, { idempotencyHeaders } from '@/lib/api'
 import type { Session, SessionTimer } from '@/types'
 
 interface SessionSocketState {
@@ -157,6 +157,26 @@ export function useSessionSocket(sessionId: string | number | undefined): Sessio
         immediate: true
     }, [fetchUpdates])
 
+    // Tell the server when we leave the room so it persists the buffered
+    // whiteboard/code state. keepalive lets the request outlive the page.
+    useEffect(() => {
+        if (!sessionId) return
+        const leave = () => {
+            const token = accessTokenRef.current
+            if (!token) return
+            fetch(`${import.meta.env.VITE_API_URL}/api/sessions/${sessionId}/leave/`, {
+                method: 'POST',
+                keepalive: true,
+                headers: { Authorization: `Bearer ${token}` },
+            }).catch(() => {/* best effort */})
+        }
+        window.addEventListener('pagehide', leave)
+        return () => {
+            window.removeEventListener('pagehide', leave)
+            leave()
+        }
+    }, [sessionId])
+
     // FIX: startTimer/stopTimer now await fetchUpdates so the UI updates INSTANTLY
     // instead of waiting for the next natural poll (up to 1.5s later)
     const startTimer = useCallback(async () => {
@@ -179,7 +199,7 @@ export function useSessionSocket(sessionId: string | number | undefined): Sessio
 
     const endSession = useCallback(async () => {
         try {
-            await api.post(`/sessions/${sessionId}/end/`)
+            await api.post(`/sessions/${sessionId}/end/`, undefined, { headers: idempotencyHeaders() })
             await fetchUpdates()
         } catch (err: any) {
             setError(err.response?.data?.error || 'Failed to end session')
@@ -8,6 +8,12 @@ const api = axios.create({
     },
 })
 
+// Fresh Idempotency-Key for one user action on a credit-moving endpoint.
+// Retries of the same request (e.g. after a token refresh) reuse its config,
+// so the server replays the first response instead of moving credits again.
+export const idempotencyHeaders = () => ({
+    'Idempotency-Key': crypto.randomUUID(),
+})
 
 // Helper to get access token from store or localStorage fallback
 const getAccessToken = (): string | null => {
@@ -70,7 +70,11 @@ export default function ProfilePage() {
                 let userId: number | string | undefined
 
                 if (isOwnProfile) {
-                    if (currentUser) {
+                    if (currentUser && currentUser.weekly_activity === undefined) {
+                        // Login/signup return a lean user; load the full profile stats
+                        await fetchProfile()
+                        return // Will re-run when currentUser is updated
+                    } else if (currentUser) {
                         userId = currentUser.id
                         setProfile({
                             id: currentUser.id,
@@ -79,8 +83,8 @@ export default function ProfilePage() {
                             credits: currentUser.credits,
                             is_online: currentUser.is_online,
                             availability: currentUser.availability,
-                            average_rating: currentUser.average_rating,
-                            total_reviews: currentUser.total_reviews,
+                            average_rating: currentUser.average_rating ?? null,
+                            total_reviews: currentUser.total_reviews ?? 0,
                             date_joined: currentUser.date_joined,
                             login_streak: currentUser.login_streak,
                             total_credits_earned: currentUser.total_credits_earned,
@@ -165,8 +169,8 @@ export default function ProfilePage() {
                 credits: currentUser.credits,
                 is_online: currentUser.is_online,
                 availability: currentUser.availability,
-                average_rating: currentUser.average_rating,
-                total_reviews: currentUser.total_reviews,
+                average_rating: currentUser.average_rating ?? null,
+                total_reviews: currentUser.total_reviews ?? 0,
                 date_joined: currentUser.date_joined,
                 login_streak: currentUser.login_streak,
                 total_credits_earned: currentUser.total_credits_earned,
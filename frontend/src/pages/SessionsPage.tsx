@@ -11,11 +11,13 @@ const formatScheduledTime = (time: string | null) => {
 }
 
 export default function SessionsPage() {
-    const { sessions, isLoading, error, fetchSessions } = useSessionsStore()
+    const { sessions, history, historyNext, counts, isLoading, error, fetchSessions, fetchHistory, fetchCounts } = useSessionsStore()
     const { user } = useAuthStore()
 
     useEffect(() => {
         fetchSessions()
+        fetchHistory()
+        fetchCounts()
         
         // Auto-poll every 30 seconds for background updates
         const interval = setInterval(() => {
@@ -23,7 +25,7 @@ export default function SessionsPage() {
         }, 30_000)
         
         return () => clearInterval(interval)
-    }, [fetchSessions])
+    }, [fetchSessions, fetchHistory, fetchCounts])
 
     // Only show full-page loader if data is empty AND we are loading for the first time
     if (isLoading && sessions.length === 0) {
@@ -51,9 +53,9 @@ export default function SessionsPage() {
     // Active: Currently active sessions
     const activeSessions = sessions.filter(s => s.status === 'active' && !terminalStatuses.includes(s.status))
     
-    // Past: Any session with a terminal status
-    const pastSessions = sessions.filter(s => terminalStatuses.includes(s.status))
-        .sort((a, b) => new Date(b.start_time).getTime() - new Date(a.start_time).getTime())
+    // Past: Any session with a terminal status, paged from the server
+    const pastSessions = history
+    const pastTotal = terminalStatuses.reduce((total, status) => total + (counts[status as keyof typeof counts] ?? 0), 0)
 
     return (
         <div className="max-w-4xl mx-auto space-y-8 animate-fade-in pb-12">
@@ -141,7 +143,7 @@ export default function SessionsPage() {
             {/* Past Sessions */}
             {pastSessions.length > 0 && (
                 <section className="space-y-4">
-                    <h2 className="text-lg font-bold text-slate-700">Past History</h2>
+                    <h2 className="text-lg font-bold text-slate-700">Past History ({pastTotal || pastSessions.length})</h2>
                     <div className="space-y-2">
                         {pastSessions.map(session => (
                             <div key={session.id} className="card p-4 flex items-center justify-between opacity-70 grayscale-[0.5]">
@@ -168,6 +170,11 @@ export default function SessionsPage() {
                             </div>
                         ))}
                     </div>
+                    {historyNext && (
+                        <button onClick={() => fetchHistory(true)} className="btn-secondary w-full py-2 text-sm">
+                            Load older sessions
+                        </button>
+                    )}
                 </section>
             )}
         </div>
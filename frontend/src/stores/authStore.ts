@@ -1,6 +1,6 @@
 import { create } from 'zustand'
 import { persist } from 'zustand/middleware'
-import api from '@/lib/api'
+import api, { idempotencyHeaders } from '@/lib/api'
 import type { User } from '@/types'
 
 interface AuthState {
@@ -36,7 +36,7 @@ export const useAuthStore = create<AuthState>()(
             login: async (email: string, password: string) => {
                 set({ isLoading: true })
                 try {
-                    const response = await api.post('auth/login/', { email, password })
+                    const response = await api.post('auth/login/', { email, password }, { headers: idempotencyHeaders() })
                     const { tokens, user, streak_rewarded } = response.data
                     const { access, refresh } = tokens
 
@@ -1,6 +1,6 @@
 import { create } from 'zustand'
-import api from '@/lib/api'
-import type { Session, Review, ReviewCreate } from '@/types'
+import api, { idempotencyHeaders } from '@/lib/api'
+import type { Session, SessionStatus, Review, ReviewCreate } from '@/types'
 import { useAuthStore } from './authStore'
 
 interface SessionsState {
@@ -8,9 +8,15 @@ interface SessionsState {
     currentSession: Session | null
     isLoading: boolean
     error: string | null
+    syncCursor: string | null
+    history: Session[]
+    historyNext: string | null
+    counts: Partial<Record<SessionStatus, number>>
 
     // Actions
     fetchSessions: (background?: boolean) => Promise<void>
+    fetchHistory: (loadMore?: boolean) => Promise<void>
+    fetchCounts: () => Promise<void>
     fetchSession: (id: number) => Promise<Session | null>
     createSession: (user2Id: number, learningRequestId?: number) => Promise<Session>
     respondToRequest: (sessionId: number, decision: 'accept' | 'reject') => Promise<Session>
@@ -23,27 +29,94 @@ interface SessionsState {
     setCurrentSession: (session: Session | null) => void
 }
 
-export const useSessionsStore = create<SessionsState>((set) => ({
+interface SessionSyncResponse {
+    sessions: Session[]
+    deleted: number[]
+    cursor: string
+    reset: boolean
+}
+
+interface SessionPage {
+    next: string | null
+    results: Session[]
+}
+
+// The hub keeps open sessions in sync; finished ones are paged on demand
+const OPEN_STATUSES = 'pending,accepted,scheduled,active'
+const HISTORY_STATUSES = 'completed,expired,rejected'
+
+const byStartTimeDesc = (a: Session, b: Session) =>
+    new Date(b.start_time).getTime() - new Date(a.start_time).getTime()
+
+export const useSessionsStore = create<SessionsState>((set, get) => ({
     sessions: [],
     currentSession: null,
     isLoading: false,
     error: null,
+    syncCursor: null,
+    history: [],
+    historyNext: null,
+    counts: {},
 
     fetchSessions: async (background = false) => {
         if (!background) {
             set({ isLoading: true, error: null })
         }
         try {
-            const response = await api.get('sessions/')
-            const sessions = Array.isArray(response.data)
-                ? response.data
-                : (response.data?.results ?? [])
-            set({ sessions, isLoading: false })
+            // Foreground loads resync all open sessions; background polls
+            // only fetch those changed since the last cursor
+            const cursor = background ? get().syncCursor : null
+            const response = await api.get<SessionSyncResponse>('sessions/', {
+                params: { updated_since: cursor ?? '', status: OPEN_STATUSES },
+            })
+            const { sessions: changed, deleted, cursor: nextCursor, reset } = response.data
+
+            let sessions: Session[]
+            if (reset) {
+                sessions = changed
+            } else {
+                const merged = new Map(get().sessions.map((s) => [s.id, s]))
+                changed.forEach((s) => merged.set(s.id, s))
+                deleted.forEach((id) => merged.delete(id))
+                sessions = Array.from(merged.values())
+            }
+            set({ sessions: sessions.sort(byStartTimeDesc), syncCursor: nextCursor, isLoading: false })
+
+            // Sessions that left the open list may have just finished
+            if (!reset && deleted.length > 0) {
+                get().fetchHistory()
+                get().fetchCounts()
+            }
         } catch (error) {
             set({ error: 'Failed to load sessions', isLoading: false })
         }
     },
 
+    fetchHistory: async (loadMore = false) => {
+        try {
+            const next = loadMore ? get().historyNext : null
+            if (loadMore && !next) return
+            const response = next
+                ? await api.get<SessionPage>(next)
+                : await api.get<SessionPage>('sessions/', { params: { status: HISTORY_STATUSES } })
+            set((state) => ({
+                history: loadMore ? [...state.history, ...response.data.results] : response.data.results,
+                historyNext: response.data.next,
+            }))
+        } catch (error) {
+            set({ error: 'Failed to load session history' })
+        }
+    },
+
+    fetchCounts: async () => {
+        try {
+            const response = await api.get('sessions/counts/')
+            set({ counts: response.data.counts })
+        } catch (error) {
+            /* counts are informational; keep the previous ones */
+        }
+    },
+
     fetchSession: async (id: number) => {
         set({ isLoading: true, error: null })
         try {
@@ -143,7 +216,7 @@ export const useSessionsStore = create<SessionsState>((set) => ({
 
     endSession: async (id: number) => {
         try {
-            const response = await api.post(`sessions/${id}/end/`)
+            const response = await api.post(`sessions/${id}/end/`, undefined, { headers: idempotencyHeaders() })
             const updated = response.data.session
 
             // Update local session state immediately
@@ -152,12 +225,9 @@ export const useSessionsStore = create<SessionsState>((set) => ({
                 currentSession: state.currentSession?.id === id ? updated : state.currentSession
             }))
 
-            // Also re-fetch full sessions list to catch any server-side changes
+            // Also pull any other server-side changes to the sessions list
             // (e.g., related post being marked as complete)
-            api.get('sessions/').then((r) => {
-                const sessions = Array.isArray(r.data) ? r.data : (r.data?.results ?? [])
-                set({ sessions })
-            }).catch(() => {/* silently ignore background fetch error */})
+            get().fetchSessions(true)
 
             // Sync credits to authStore
             useAuthStore.getState().fetchProfile()
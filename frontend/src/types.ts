@@ -12,13 +12,14 @@ export interface User {
     is_online: boolean
     availability?: string
     date_joined: string
-    average_rating: number | null
-    total_reviews: number
+    // Profile stats are only included when expanded (see /users/me/)
+    average_rating?: number | null
+    total_reviews?: number
     login_streak: number
     last_login_date: string | null
-    total_credits_earned: number
-    hours_taught: number
-    weekly_activity: { date: string; hours_taught: number; credits_earned: number }[]
+    total_credits_earned?: number
+    hours_taught?: number
+    weekly_activity?: { date: string; hours_taught: number; credits_earned: number }[]
 }
 
 export interface UserPublic {
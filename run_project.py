@@ -15,9 +15,11 @@ VENV_PYTHON = PROJECT_ROOT / ".venv" / "bin" / "python.exe"
 # Commands
 if VENV_PYTHON.exists():
     BACKEND_CMD = [str(VENV_PYTHON), "manage.py", "runserver"]
+    WORKER_CMD = [str(VENV_PYTHON), "manage.py", "run_settlement_worker"]
 else:
     print(f"Warning: Virtual environment not found at {VENV_PYTHON}. Using system 'python'.")
     BACKEND_CMD = ["python", "manage.py", "runserver"]
+    WORKER_CMD = ["python", "manage.py", "run_settlement_worker"]
 
 FRONTEND_CMD = ["npm", "run", "dev"]
 FRONTEND_URL = "http://localhost:5173"
@@ -27,6 +29,8 @@ def graceful_shutdown(signum, frame):
     # Terminate processes
     if 'backend_process' in globals() and backend_process:
         backend_process.terminate()
+    if 'worker_process' in globals() and worker_process:
+        worker_process.terminate()
     if 'frontend_process' in globals() and frontend_process:
         # On Windows, terminating the npm wrapper might not kill the node process.
         # We might need a more aggressive kill if specific issues arise, but terminate is standard.
@@ -49,6 +53,14 @@ backend_process = subprocess.Popen(
     shell=False # Direct execution is better if we have the executable path
 )
 
+# Start Settlement Worker
+print(f"💳 Starting Settlement Worker...")
+worker_process = subprocess.Popen(
+    WORKER_CMD,
+    cwd=BACKEND_DIR,
+    shell=False
+)
+
 # Start Frontend
 print(f"⚛️  Starting Frontend (npm run dev)...")
 # Shell=True is often needed for npm on Windows to find the executable/cmd
@@ -75,6 +87,9 @@ try:
         if backend_process.poll() is not None:
             print("❌ Backend process triggered unexpected exit.")
             break
+        if worker_process.poll() is not None:
+            print("❌ Settlement worker triggered unexpected exit.")
+            break
         if frontend_process.poll() is not None:
             print("❌ Frontend process triggered unexpected exit.")
             break